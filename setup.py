@@ -27,6 +27,7 @@ extra_reqs = {
     ],
     "docs": ["mkdocs", "mkdocs-material", "pdocs"],
     "server": ["uvicorn[standard]==0.19.0"],
+    "compression": ["pymongo[snappy,zstd]~=4.6.2"],
 }
 
 setup(
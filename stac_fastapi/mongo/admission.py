@@ -0,0 +1,127 @@
+"""Admission control of the requests, per class of routes."""
+
+import os
+from typing import Any, Dict, Optional
+
+from starlette import status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from stac_fastapi.mongo.utilities import ConcurrencyLimiter, Overloaded, route_endpoint
+
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("STAC_ADMISSION_QUEUE_TIMEOUT", "5"))
+
+# The class of the read endpoints, the other writes are transactions. Endpoints of no
+# class, such as the landing page, the health checks and the subscriptions, whose
+# streams last as long as their clients, are not limited. The searches of a batch each
+# take a turn of the search class, see `BatchSearchExtension`.
+ROUTE_CLASSES: Dict[str, Optional[str]] = {
+    "GET /search": "search",
+    "POST /search": "search",
+    "GET /collections/{collection_id}/items": "search",
+    "GET /collections/{collection_id}/changes": "search",
+    "GET /aggregate": "search",
+    "POST /aggregate": "search",
+    "GET /collections/{collection_id}/aggregate": "search",
+    "POST /collections/{collection_id}/aggregate": "search",
+    "GET /collections/{collection_id}/items/{item_id}": "item",
+    "POST /collections/{collection_id}/items/get": "item",
+    "POST /collections/{collection_id}/items/diff": "item",
+    "GET /collections": "collection",
+    "GET /collections/{collection_id}": "collection",
+    "GET /queryables": "collection",
+    "GET /collections/{collection_id}/queryables": "collection",
+    "POST /search/batch": None,
+    "POST /search/subscribe": None,
+}
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def route_class(endpoint: Optional[str]) -> Optional[str]:
+    """
+    Get the class of an endpoint.
+
+    Args:
+        endpoint (Optional[str]): The endpoint, see `route_endpoint`.
+
+    Returns:
+        Optional[str]: `search`, `item`, `collection` or `transaction`, None for the
+            endpoints that are not limited.
+    """
+    if endpoint is None:
+        return None
+    if endpoint in ROUTE_CLASSES:
+        return ROUTE_CLASSES[endpoint]
+    method, _, _ = endpoint.partition(" ")
+    return "transaction" if method in WRITE_METHODS else None
+
+
+def _limiters_from_env() -> Dict[str, ConcurrencyLimiter]:
+    """Build the limiters of the classes given a concurrency, `STAC_{CLASS}_CONCURRENCY`."""
+    limiters = {}
+    for name in ("search", "item", "collection", "transaction"):
+        limit = int(os.getenv(f"STAC_{name.upper()}_CONCURRENCY", "0"))
+        if limit > 0:
+            max_queued = int(os.getenv(f"STAC_{name.upper()}_QUEUE_SIZE", str(limit)))
+            limiters[name] = ConcurrencyLimiter(
+                limit, max_queued, ADMISSION_QUEUE_TIMEOUT
+            )
+    return limiters
+
+
+# The limiters of the classes of routes, shared by the application
+admission_limiters = _limiters_from_env()
+
+
+def admission_metrics() -> Dict[str, Dict[str, Any]]:
+    """Return the requests running and waiting, admitted and refused, per class."""
+    return {name: limiter.metrics() for name, limiter in admission_limiters.items()}
+
+
+class AdmissionControlMiddleware:
+    """
+    Limit the requests running at once, per class of routes.
+
+    Searches, item reads, collection reads and transactions each have a limit of
+    requests running at once and a bounded queue of requests waiting for their turn,
+    see `ConcurrencyLimiter`, so that a burst of heavy searches does not slow down the
+    cheap item reads. Requests over the limit of a full queue, or waiting longer than
+    `STAC_ADMISSION_QUEUE_TIMEOUT` seconds, are refused with `429 Too Many Requests`
+    and a `Retry-After` header. The classes without a limit are not queued.
+
+    Attributes:
+        app (ASGIApp): The wrapped application.
+        limiters (Dict[str, ConcurrencyLimiter]): The limiters per class, those of
+            `STAC_{CLASS}_CONCURRENCY` and `STAC_{CLASS}_QUEUE_SIZE`, see
+            `admission_limiters`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiters: Optional[Dict[str, ConcurrencyLimiter]] = None,
+    ):
+        """Initialize the AdmissionControlMiddleware."""
+        self.app = app
+        self.limiters = admission_limiters if limiters is None else limiters
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run a request once its class admits it, or refuse it."""
+        limiter = None
+        if scope["type"] == "http" and self.limiters:
+            name = route_class(route_endpoint(scope))
+            limiter = self.limiters.get(name) if name else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            async with limiter.slot():
+                await self.app(scope, receive, send)
+        except Overloaded as e:
+            response = JSONResponse(
+                {"code": "Overloaded", "description": str(e)},
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
@@ -1,33 +1,68 @@
 """FastAPI application."""
 
+import asyncio
 import logging
 import os
+from typing import Any, Awaitable, Callable, Dict
 
 from stac_fastapi.api.app import StacApi
+from stac_fastapi.api.errors import DEFAULT_STATUS_CODES
 from stac_fastapi.api.models import create_get_request_model, create_post_request_model
-from stac_fastapi.core.core import (
-    CoreClient,
-    EsAsyncBaseFiltersClient,
-    TransactionsClient,
+from stac_fastapi.core.extensions.aggregation import (
+    EsAggregationExtensionGetRequest,
+    EsAggregationExtensionPostRequest,
 )
-from stac_fastapi.core.extensions import QueryExtension
 from stac_fastapi.core.route_dependencies import get_route_dependencies
 from stac_fastapi.core.session import Session
 from stac_fastapi.extensions.core import (
+    AggregationExtension,
+    CollectionSearchExtension,
+    CollectionSearchFilterExtension,
     FieldsExtension,
     FilterExtension,
+    FreeTextExtension,
     SortExtension,
     TokenPaginationExtension,
     TransactionExtension,
 )
 
 # from stac_fastapi.extensions.third_party import BulkTransactionExtension
-from stac_fastapi.mongo.config import AsyncMongoDBSettings
+from stac_fastapi.extensions.core.fields import FieldsConformanceClasses
+from stac_fastapi.extensions.core.free_text import FreeTextConformanceClasses
+from stac_fastapi.extensions.core.sort import SortConformanceClasses
+from stac_fastapi.mongo.admission import (
+    AdmissionControlMiddleware,
+    admission_limiters,
+    admission_metrics,
+)
+from stac_fastapi.mongo.config import AsyncMongoDBSettings, mongo_clients, pool_metrics
+from stac_fastapi.mongo.consistency import (
+    CAUSAL_CONSISTENCY,
+    CausalConsistencyMiddleware,
+)
+from stac_fastapi.mongo.core import CoreClient, TransactionsClient
 from stac_fastapi.mongo.database_logic import (
+    DATABASE,
     DatabaseLogic,
+    check_change_streams,
     create_collection_index,
     create_item_index,
 )
+from stac_fastapi.mongo.extensions import (
+    BatchSearchExtension,
+    ChangesExtension,
+    FacetsExtension,
+    IngestExtension,
+    ItemsDiffExtension,
+    ItemsGetExtension,
+    MongoAsyncAggregationClient,
+    MongoAsyncBaseFiltersClient,
+    NearExtension,
+    QueryExtension,
+    SubscriptionExtension,
+)
+from stac_fastapi.mongo.ingest import INGEST_SPOOL, IngestQueue
+from stac_fastapi.mongo.timeouts import TIMEOUT_STATUS_CODES, QueryTimeoutMiddleware
 
 logger = logging.getLogger(__name__)
 
@@ -36,17 +71,31 @@ session = Session.create_from_settings(settings)
 
 database_logic = DatabaseLogic()
 
+# Item POSTs are spooled and written in bulk when a spool is configured
+ingest_queue = IngestQueue(database_logic, INGEST_SPOOL) if INGEST_SPOOL else None
+
 filter_extension = FilterExtension(
-    client=EsAsyncBaseFiltersClient(database=database_logic)
+    client=MongoAsyncBaseFiltersClient(database=database_logic)
 )
 filter_extension.conformance_classes.append(
     "http://www.opengis.net/spec/cql2/1.0/conf/advanced-comparison-operators"
 )
 
-extensions = [
+aggregation_extension = AggregationExtension(
+    client=MongoAsyncAggregationClient(
+        database=database_logic, session=session, settings=settings
+    )
+)
+aggregation_extension.POST = EsAggregationExtensionPostRequest
+aggregation_extension.GET = EsAggregationExtensionGetRequest
+
+search_extensions = [
     TransactionExtension(
         client=TransactionsClient(
-            database=database_logic, session=session, settings=settings
+            database=database_logic,
+            session=session,
+            settings=settings,
+            ingest=ingest_queue,
         ),
         settings=settings,
     ),
@@ -62,24 +111,87 @@ extensions = [
     SortExtension(),
     TokenPaginationExtension(),
     filter_extension,
+    FacetsExtension(),
+    NearExtension(),
+    FreeTextExtension(),
+]
+
+collection_search_extension = CollectionSearchExtension.from_extensions(
+    [
+        FreeTextExtension(conformance_classes=[FreeTextConformanceClasses.COLLECTIONS]),
+        CollectionSearchFilterExtension(),
+        SortExtension(conformance_classes=[SortConformanceClasses.COLLECTIONS]),
+        FieldsExtension(conformance_classes=[FieldsConformanceClasses.COLLECTIONS]),
+    ]
+)
+
+extensions = [aggregation_extension, collection_search_extension] + search_extensions
+
+post_request_model = create_post_request_model(search_extensions)
+
+core_client = CoreClient(
+    database=database_logic,
+    session=session,
+    post_request_model=post_request_model,
+    landing_page_id=os.getenv("STAC_FASTAPI_LANDING_PAGE_ID", "stac-fastapi"),
+)
+
+extensions += [
+    BatchSearchExtension(
+        client=core_client, search_post_request_model=post_request_model
+    ),
+    ItemsGetExtension(client=core_client),
+    ItemsDiffExtension(client=core_client),
+    ChangesExtension(client=core_client),
+    SubscriptionExtension(
+        client=core_client, search_post_request_model=post_request_model
+    ),
 ]
+if ingest_queue is not None:
+    extensions.append(IngestExtension(queue=ingest_queue))
+
+
+async def health_check() -> Dict[str, Any]:
+    """Report the API as up, with its MongoDB connection pool and admission metrics."""
+    return {
+        "status": "UP",
+        "mongodb": {"pool": pool_metrics.metrics()},
+        "admission": admission_metrics(),
+    }
 
-post_request_model = create_post_request_model(extensions)
 
 api = StacApi(
     settings=settings,
     extensions=extensions,
-    client=CoreClient(
-        database=database_logic,
-        session=session,
-        post_request_model=post_request_model,
-        landing_page_id=os.getenv("STAC_FASTAPI_LANDING_PAGE_ID", "stac-fastapi"),
-    ),
-    search_get_request_model=create_get_request_model(extensions),
+    client=core_client,
+    collections_get_request_model=collection_search_extension.GET,
+    search_get_request_model=create_get_request_model(search_extensions),
     search_post_request_model=post_request_model,
     route_dependencies=get_route_dependencies(),
+    health_check=health_check,
+    exceptions={**DEFAULT_STATUS_CODES, **TIMEOUT_STATUS_CODES},
 )
 app = api.app
+if CAUSAL_CONSISTENCY:
+    # Reads of a client after its own writes wait for the secondaries to apply them
+    app.add_middleware(CausalConsistencyMiddleware)
+# The requests run within their time budget and stop on disconnect
+app.add_middleware(QueryTimeoutMiddleware)
+if admission_limiters:
+    # Outermost, the time waiting for a turn is not part of the time budget
+    app.add_middleware(AdmissionControlMiddleware)
+
+
+async def _run_periodically(
+    job: Callable[[], Awaitable[None]], name: str, interval: int
+) -> None:
+    """Run a maintenance job of the database every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await job()
+        except Exception as e:
+            logger.error(f"Error running {name}: {e}")
 
 
 @app.on_event("startup")
@@ -90,6 +202,49 @@ async def _startup_event() -> None:
         await create_collection_index()
         await create_item_index()
 
+    app.state.maintenance_tasks = []
+
+    refresh_interval = int(os.getenv("STAC_QUERYABLES_REFRESH_INTERVAL", "0"))
+    if refresh_interval > 0:
+        app.state.maintenance_tasks.append(
+            asyncio.create_task(
+                _run_periodically(
+                    database_logic.refresh_queryables,
+                    "queryables refresh",
+                    refresh_interval,
+                )
+            )
+        )
+
+    reconcile_interval = int(os.getenv("STAC_STATS_RECONCILE_INTERVAL", "0"))
+    if reconcile_interval > 0:
+        app.state.maintenance_tasks.append(
+            asyncio.create_task(
+                _run_periodically(
+                    database_logic.reconcile_collection_stats,
+                    "collection statistics reconcile",
+                    reconcile_interval,
+                )
+            )
+        )
+
+    if os.getenv("STAC_CACHE_INVALIDATION", "false") == "true":
+        # Fail the startup rather than the background task
+        check_change_streams(DATABASE)
+        # Keeps the in-process caches consistent with the writes of the other replicas
+        app.state.maintenance_tasks.append(
+            asyncio.create_task(database_logic.watch_cache_invalidations())
+        )
+
+
+@app.on_event("shutdown")
+async def _shutdown_event() -> None:
+    for task in getattr(app.state, "maintenance_tasks", []):
+        task.cancel()
+    # Write the item inserts still waiting for their batch
+    await database_logic.item_writer.close()
+    mongo_clients.close()
+
 
 def run() -> None:
     """Run app from command line using uvicorn if available."""
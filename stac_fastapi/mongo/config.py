@@ -1,10 +1,20 @@
 """API configuration."""
 import os
 import ssl
-from typing import Any, Dict, Set
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional, Set
 
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import MongoClient
+from pymongo import MongoClient, WriteConcern, monitoring
+from pymongo.errors import ConfigurationError
+from pymongo.read_preferences import (
+    _MONGOS_MODES,
+    _ServerMode,
+    make_read_preference,
+    read_pref_mode_from_name,
+)
 
 from stac_fastapi.types.config import ApiSettings
 
@@ -45,10 +55,228 @@ def _mongodb_config() -> Dict[str, Any]:
     return config
 
 
+def write_concern_from_env(name: str) -> Optional[WriteConcern]:
+    """
+    Build the write concern of a class of writes from an environment variable.
+
+    The variable holds comma-separated `w`, `j` and `wtimeout` (milliseconds) options,
+    such as `w=1,j=false` or `w=majority,j=true,wtimeout=5000`.
+
+    Args:
+        name (str): The name of the environment variable.
+
+    Returns:
+        Optional[WriteConcern]: The write concern, None when the variable is not set, the
+            writes then use the write concern of the connection string.
+
+    Raises:
+        ValueError: If an option is unknown or its value is not valid.
+    """
+    value = os.getenv(name, "").strip()
+    if not value:
+        return None
+
+    options: Dict[str, Any] = {}
+    for option in value.split(","):
+        key, _, setting = (part.strip() for part in option.partition("="))
+        if key == "w":
+            options["w"] = int(setting) if setting.isdigit() else setting
+        elif key == "j" and setting.lower() in ("true", "false"):
+            options["j"] = setting.lower() == "true"
+        elif key == "wtimeout" and setting.isdigit():
+            options["wtimeout"] = int(setting)
+        else:
+            raise ValueError(f"Invalid write concern option {option!r} in {name}")
+    return WriteConcern(**options)
+
+
+def read_preference_from_env(name: str) -> Optional[_ServerMode]:
+    """
+    Build the read preference of a class of reads from an environment variable.
+
+    The variable holds comma-separated `readPreference` and `maxStalenessSeconds`
+    options, named like in the connection string, such as
+    `readPreference=secondaryPreferred,maxStalenessSeconds=120`. The staleness bound,
+    at least 90 seconds, only applies to the modes reading from secondaries.
+
+    Args:
+        name (str): The name of the environment variable.
+
+    Returns:
+        Optional[_ServerMode]: The read preference, None when the variable is not set,
+            the reads then use the read preference of the connection string.
+
+    Raises:
+        ValueError: If an option is unknown or its value is not valid.
+    """
+    value = os.getenv(name, "").strip()
+    if not value:
+        return None
+
+    mode = None
+    max_staleness = -1
+    for option in value.split(","):
+        key, _, setting = (part.strip() for part in option.partition("="))
+        if key == "readPreference" and setting in _MONGOS_MODES:
+            mode = read_pref_mode_from_name(setting)
+        elif key == "maxStalenessSeconds" and setting.isdigit():
+            max_staleness = int(setting)
+        else:
+            raise ValueError(f"Invalid read preference option {option!r} in {name}")
+    if mode is None:
+        raise ValueError(f"No readPreference in {name}")
+    try:
+        return make_read_preference(mode, None, max_staleness)
+    except ConfigurationError as e:
+        raise ValueError(f"Invalid read preference in {name}: {e}")
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Count the connection checkouts of the MongoDB clients and the time they wait.
+
+    The wait of a checkout is the time between its start and the connection being
+    checked out, or the checkout failing, on the thread running it.
+
+    Attributes:
+        checkouts (int): Number of connections checked out.
+        failures (Counter): Number of failed checkouts per reason, `timeout` when no
+            connection was available within `MONGO_WAIT_QUEUE_TIMEOUT_MS`.
+        checked_out (int): Number of connections currently checked out.
+        max_checked_out (int): Highest number of connections checked out at once.
+        connections (int): Number of connections open.
+        wait_total (float): Total wait of the checkouts, failed ones included, in seconds.
+        wait_max (float): Longest wait of a checkout, in seconds.
+    """
+
+    def __init__(self):
+        """Initialize the PoolMetrics with no checkout."""
+        self.checkouts = 0
+        self.failures: Counter = Counter()
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.connections = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._lock = threading.Lock()
+        self._started = threading.local()
+
+    def _waited(self) -> None:
+        waited = time.monotonic() - getattr(self._started, "time", time.monotonic())
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+
+    def connection_check_out_started(self, event):
+        """Record the start of a checkout."""
+        self._started.time = time.monotonic()
+
+    def connection_checked_out(self, event):
+        """Record a connection checked out."""
+        with self._lock:
+            self._waited()
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def connection_check_out_failed(self, event):
+        """Record a failed checkout."""
+        with self._lock:
+            self._waited()
+            self.failures[event.reason] += 1
+
+    def connection_checked_in(self, event):
+        """Record a connection checked in."""
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        """Record a connection opened."""
+        with self._lock:
+            self.connections += 1
+
+    def connection_closed(self, event):
+        """Record a connection closed."""
+        with self._lock:
+            self.connections -= 1
+
+    def pool_created(self, event):
+        """Ignore the creation of a pool."""
+
+    def pool_ready(self, event):
+        """Ignore a pool getting ready."""
+
+    def pool_cleared(self, event):
+        """Ignore the clearing of a pool."""
+
+    def pool_closed(self, event):
+        """Ignore the closing of a pool."""
+
+    def connection_ready(self, event):
+        """Ignore a connection getting ready."""
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Report the checkouts and their waits.
+
+        Returns:
+            Dict[str, Any]: The counts of checkouts, failed checkouts per reason and
+                connections, and the mean and longest waits in milliseconds.
+        """
+        with self._lock:
+            attempts = self.checkouts + sum(self.failures.values())
+            return {
+                "checkouts": self.checkouts,
+                "failures": dict(self.failures),
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "connections": self.connections,
+                "wait_mean_ms": 1000 * self.wait_total / max(attempts, 1),
+                "wait_max_ms": 1000 * self.wait_max,
+            }
+
+
+# The connection pool metrics of all the clients, see `MongoDBClientSettings`
+pool_metrics = PoolMetrics()
+
 _forbidden_fields: Set[str] = {"type"}
 
 
-class MongoDBSettings(ApiSettings):
+class MongoDBClientSettings(ApiSettings):
+    """
+    Connection pool and network settings of the MongoDB clients.
+
+    Read from the `MONGO_MAX_POOL_SIZE`, `MONGO_MIN_POOL_SIZE`, `MONGO_MAX_IDLE_TIME_MS`,
+    `MONGO_WAIT_QUEUE_TIMEOUT_MS`, `MONGO_COMPRESSORS`, `MONGO_SERVER_SELECTION_TIMEOUT_MS`
+    and `MONGO_APPNAME` environment variables. The compressors are a comma-separated list
+    of `zstd`, `snappy` and `zlib` in order of preference, `zstd` and `snappy` requiring the
+    `zstandard` and `python-snappy` packages.
+    """
+
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 0
+    mongo_max_idle_time_ms: Optional[int] = None
+    mongo_wait_queue_timeout_ms: Optional[int] = None
+    mongo_compressors: Optional[str] = None
+    mongo_server_selection_timeout_ms: int = 30000
+    mongo_appname: str = "stac-fastapi-mongo"
+
+    @property
+    def client_options(self) -> Dict[str, Any]:
+        """Get the keyword arguments of the clients."""
+        options = {
+            "maxPoolSize": self.mongo_max_pool_size,
+            "minPoolSize": self.mongo_min_pool_size,
+            "maxIdleTimeMS": self.mongo_max_idle_time_ms,
+            "waitQueueTimeoutMS": self.mongo_wait_queue_timeout_ms,
+            "compressors": self.mongo_compressors,
+            "serverSelectionTimeoutMS": self.mongo_server_selection_timeout_ms,
+            "appname": self.mongo_appname,
+            "event_listeners": [pool_metrics],
+        }
+        return {key: value for key, value in options.items() if value is not None}
+
+
+class MongoDBSettings(MongoDBClientSettings):
     """MongoDB specific API settings."""
 
     forbidden_fields: Set[str] = _forbidden_fields
@@ -58,10 +286,10 @@ class MongoDBSettings(ApiSettings):
     def create_client(self) -> MongoClient:
         """Create a synchronous MongoDB client."""
         config = _mongodb_config()
-        return MongoClient(config["uri"])
+        return MongoClient(config["uri"], **self.client_options)
 
 
-class AsyncMongoDBSettings(ApiSettings):
+class AsyncMongoDBSettings(MongoDBClientSettings):
     """Async MongoDB specific API settings."""
 
     forbidden_fields: Set[str] = _forbidden_fields
@@ -71,4 +299,62 @@ class AsyncMongoDBSettings(ApiSettings):
     def create_client(self) -> AsyncIOMotorClient:
         """Create an asynchronous MongoDB client."""
         config = _mongodb_config()
-        return AsyncIOMotorClient(config["uri"])
+        return AsyncIOMotorClient(config["uri"], **self.client_options)
+
+
+class MongoClients:
+    """
+    The MongoDB clients of the process, created on first use and shared.
+
+    No connection is opened on import: the clients are created by the first database
+    call, in the process making it. A process forked from one holding clients, such as a
+    worker of a pre-forking server, creates clients of its own, since those of its
+    parent cannot be used after a fork. `close` closes the clients when the application
+    shuts down, later calls creating new ones.
+    """
+
+    def __init__(self):
+        """Initialize the MongoClients with no client."""
+        self._async_client: Optional[AsyncIOMotorClient] = None
+        self._sync_client: Optional[MongoClient] = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def _check_fork(self) -> None:
+        if self._pid != os.getpid():
+            # The clients of the parent process share its sockets, they are left unclosed
+            self._async_client = None
+            self._sync_client = None
+            self._pid = os.getpid()
+
+    @property
+    def async_client(self) -> AsyncIOMotorClient:
+        """Get the asynchronous client, creating it if needed."""
+        with self._lock:
+            self._check_fork()
+            if self._async_client is None:
+                self._async_client = AsyncMongoDBSettings().create_client
+            return self._async_client
+
+    @property
+    def sync_client(self) -> MongoClient:
+        """Get the synchronous client, creating it if needed."""
+        with self._lock:
+            self._check_fork()
+            if self._sync_client is None:
+                self._sync_client = MongoDBSettings().create_client
+            return self._sync_client
+
+    def close(self) -> None:
+        """Close the clients of this process."""
+        with self._lock:
+            self._check_fork()
+            for client in (self._async_client, self._sync_client):
+                if client is not None:
+                    client.close()
+            self._async_client = None
+            self._sync_client = None
+
+
+# The clients shared by the database logic and the index helpers
+mongo_clients = MongoClients()
@@ -0,0 +1,215 @@
+"""Sessions of the reads of a request, for read-your-writes and cancellation."""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from bson import Timestamp
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from pymongo.errors import PyMongoError
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from stac_fastapi.mongo.config import mongo_clients
+
+logger = logging.getLogger(__name__)
+
+CAUSAL_CONSISTENCY = os.getenv("STAC_CAUSAL_CONSISTENCY", "false") == "true"
+OPERATION_TIME_HEADER = "X-Operation-Time"
+
+T = TypeVar("T")
+
+
+class _RequestState:
+    """The session of the reads of a request, and whether the request wrote."""
+
+    def __init__(self):
+        # Started by the first read of the request
+        self.session: Optional[AsyncIOMotorClientSession] = None
+        # The operation time of earlier writes the reads must follow
+        self.operation_time: Optional[Timestamp] = None
+        self.wrote = False
+
+
+_request_state: ContextVar[Optional[_RequestState]] = ContextVar(
+    "request_state", default=None
+)
+
+
+async def request_session() -> Optional[AsyncIOMotorClientSession]:
+    """Get the session of the reads of the current request, if any, see `session_scope`."""
+    state = _request_state.get()
+    if state is None:
+        return None
+    if state.session is None:
+        session = await mongo_clients.async_client.start_session(
+            causal_consistency=True
+        )
+        if state.session is not None:
+            # Started by a concurrent read of the request
+            await session.end_session()
+        else:
+            if state.operation_time is not None:
+                session.advance_operation_time(state.operation_time)
+            state.session = session
+    return state.session
+
+
+def reads_after_writes() -> bool:
+    """Check whether the reads of the current request must follow earlier writes."""
+    state = _request_state.get()
+    return state is not None and state.operation_time is not None
+
+
+def record_write() -> None:
+    """Record that the current request writes, see `CausalConsistencyMiddleware`."""
+    state = _request_state.get()
+    if state is not None:
+        state.wrote = True
+
+
+async def _kill_session(session: AsyncIOMotorClientSession) -> None:
+    """Kill the operations and cursors of a session running on the server."""
+    try:
+        await mongo_clients.async_client.admin.command(
+            "killSessions", [session.session_id]
+        )
+    except PyMongoError as e:
+        logger.warning(f"Could not kill the operations of a cancelled request: {e}")
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[_RequestState]:
+    """
+    Make the reads of a request in a session of its own.
+
+    The reads passing `await request_session()` run in the session, started by the
+    first of them. When the scope is cancelled, such as when the client disconnected,
+    the operations and cursors of the session are killed on the server. A scope entered
+    within another one shares its session.
+
+    Yields:
+        _RequestState: The session of the request.
+    """
+    state = _request_state.get()
+    if state is not None:
+        yield state
+        return
+
+    state = _RequestState()
+    token = _request_state.set(state)
+    try:
+        yield state
+    except asyncio.CancelledError:
+        if state.session is not None:
+            await _kill_session(state.session)
+        raise
+    finally:
+        _request_state.reset(token)
+        if state.session is not None:
+            await state.session.end_session()
+
+
+async def run_in_own_session(call: Callable[[], Awaitable[T]]) -> T:
+    """
+    Run a call shared by several requests in a session of its own.
+
+    The shared call is then not killed with the request that started it, see
+    `SingleFlight` and `BatchLoader`.
+
+    Args:
+        call (Callable[[], Awaitable[T]]): The call.
+
+    Returns:
+        T: The result of the call.
+    """
+    token = _request_state.set(None)
+    try:
+        async with session_scope():
+            return await call()
+    finally:
+        _request_state.reset(token)
+
+
+def parse_operation_time(value: str) -> Optional[Timestamp]:
+    """
+    Parse an operation time formatted by `format_operation_time`.
+
+    Args:
+        value (str): The seconds and increment of the operation time, dot-separated.
+
+    Returns:
+        Optional[Timestamp]: The operation time, None if the value is not valid.
+    """
+    seconds, _, increment = value.strip().partition(".")
+    if not (seconds.isdigit() and increment.isdigit()):
+        return None
+    return Timestamp(int(seconds), int(increment))
+
+
+def format_operation_time(operation_time: Timestamp) -> str:
+    """Format an operation time for the `X-Operation-Time` header."""
+    return f"{operation_time.time}.{operation_time.inc}"
+
+
+class CausalConsistencyMiddleware:
+    """
+    Let clients read their own writes when the reads go to secondaries.
+
+    A successful request that wrote, see `record_write`, is answered with the operation
+    time of the primary after its writes in the `X-Operation-Time` header. A request
+    sending this header back has its reads made in a causally consistent session
+    advanced to that time, see `request_session`, so that a secondary waits until it has
+    applied the writes before answering. Reads in such a session are not shared with
+    concurrent reads, see `DatabaseLogic.single_flight`. Requests without the header
+    read with the read preferences of their operations. The session is that of
+    `session_scope`.
+
+    Standalone servers report no operation time, the header is then not sent.
+
+    Attributes:
+        app (ASGIApp): The wrapped application.
+    """
+
+    def __init__(self, app: ASGIApp):
+        """Initialize the CausalConsistencyMiddleware."""
+        self.app = app
+
+    async def _operation_time(self) -> Optional[Timestamp]:
+        """Get the time of the last write applied by the primary."""
+        try:
+            reply = await mongo_clients.async_client.admin.command("ping")
+        except PyMongoError as e:
+            logger.warning(f"Could not read the operation time of a write: {e}")
+            return None
+        return reply.get("operationTime")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run a request, reading after the operation time it sends."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        operation_time = parse_operation_time(
+            Headers(scope=scope).get(OPERATION_TIME_HEADER, "")
+        )
+
+        async def send_operation_time(message: Message) -> None:
+            if (
+                message["type"] == "http.response.start"
+                and state.wrote
+                and message["status"] < 400
+            ):
+                written = await self._operation_time()
+                if written is not None:
+                    MutableHeaders(scope=message)[
+                        OPERATION_TIME_HEADER
+                    ] = format_operation_time(written)
+            await send(message)
+
+        async with session_scope() as state:
+            state.operation_time = operation_time
+            await self.app(scope, receive, send_operation_time)
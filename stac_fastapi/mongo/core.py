@@ -0,0 +1,567 @@
+"""Core client."""
+
+import asyncio
+import logging
+from enum import Enum
+from typing import Any, Dict, List, Optional, Set, Union
+from urllib.parse import unquote_plus, urljoin
+
+import orjson
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from pygeofilter.backends.cql2_json import to_cql2
+from pygeofilter.parsers.cql2_text import parse as parse_cql2_text
+from stac_pydantic.links import Relations
+from stac_pydantic.shared import BBox, MimeTypes
+
+from stac_fastapi.api.errors import ErrorResponse
+from stac_fastapi.core import core
+from stac_fastapi.core.datetime_utils import datetime_to_str
+from stac_fastapi.core.models.links import PagingLinks
+from stac_fastapi.core.utilities import filter_fields
+from stac_fastapi.mongo.database_logic import (
+    SEQUENCE_FIELD,
+    UPDATED_FIELD,
+    MongoSearchAdapter,
+)
+from stac_fastapi.mongo.ingest import IngestQueue, SpoolFull
+from stac_fastapi.mongo.utilities import ConcurrencyLimiter
+from stac_fastapi.types import stac as stac_types
+from stac_fastapi.types.search import BaseSearchPostRequest, str2list
+from stac_fastapi.types.stac import Item, ItemCollection
+
+logger = logging.getLogger(__name__)
+
+
+class CoreClient(core.CoreClient):
+    """Client for core endpoints defined by the STAC specification.
+
+    Extends the core client with the search features of the MongoDB backend, see
+    `stac_fastapi.mongo.extensions`.
+    """
+
+    async def all_collections(
+        self,
+        bbox: Optional[BBox] = None,
+        datetime: Optional[str] = None,
+        limit: Optional[int] = None,
+        q: Optional[List[str]] = None,
+        filter_expr: Optional[str] = None,
+        filter_lang: Optional[str] = None,
+        sortby: Optional[List[str]] = None,
+        fields: Optional[List[str]] = None,
+        **kwargs,
+    ) -> stac_types.Collections:
+        """Read all collections from the database, or search them.
+
+        Args:
+            bbox (Optional[BBox]): Bounding box the spatial extent of the collections must intersect.
+            datetime (Optional[str]): Interval the temporal extent of the collections must overlap.
+            limit (Optional[int]): Maximum number of collections to return.
+            q (Optional[List[str]]): Free-text terms to search the collections for.
+            filter_expr (Optional[str]): CQL2 filter on the fields of the collections.
+            filter_lang (Optional[str]): Language of the filter, `cql2-text` or `cql2-json`.
+            sortby (Optional[List[str]]): Fields to sort the collections by, prefixed by `-`
+                for a descending order.
+            fields (Optional[List[str]]): Fields to include in the collections, or to exclude
+                when prefixed by `-`.
+            **kwargs: Keyword arguments from the request.
+
+        Returns:
+            A Collections object containing all the collections in the database and links to various resources.
+
+        Raises:
+            HTTPException: If the filter cannot be parsed.
+        """
+        request = kwargs["request"]
+        base_url = str(request.base_url)
+        limit = limit or int(request.query_params.get("limit", 10))
+        token = request.query_params.get("token")
+
+        cql2_filter = None
+        if filter_expr:
+            try:
+                cql2_filter = orjson.loads(
+                    unquote_plus(filter_expr)
+                    if filter_lang == "cql2-json"
+                    else to_cql2(parse_cql2_text(filter_expr))
+                )
+            except Exception as e:
+                raise HTTPException(
+                    status_code=400, detail=f"Error with cql2 filter: {e}"
+                )
+
+        sort = [
+            (field[1:], -1) if field[0] == "-" else (field.lstrip("+ "), 1)
+            for field in sortby or []
+            if field
+        ]
+
+        collections, next_token = await self.database.get_all_collections(
+            token=token,
+            limit=limit,
+            request=request,
+            q=q,
+            bbox=bbox,
+            datetime_search=self._return_date(datetime) if datetime else None,
+            cql2_filter=cql2_filter,
+            sort=sort,
+        )
+
+        if fields:
+            include: Set[str] = set()
+            exclude: Set[str] = set()
+            for field in fields:
+                if field[0] == "-":
+                    exclude.add(field[1:])
+                else:
+                    include.add(field.lstrip("+ "))
+            if include:
+                # Keep the collections identifiable and navigable
+                include |= {"id", "links"}
+            collections = [
+                filter_fields(collection, include, exclude)  # type: ignore
+                for collection in collections
+            ]
+
+        links = [
+            {"rel": Relations.root.value, "type": MimeTypes.json, "href": base_url},
+            {"rel": Relations.parent.value, "type": MimeTypes.json, "href": base_url},
+            {
+                "rel": Relations.self.value,
+                "type": MimeTypes.json,
+                "href": urljoin(base_url, "collections"),
+            },
+        ]
+
+        if next_token:
+            next_link = PagingLinks(next=next_token, request=request).link_next()
+            links.append(next_link)
+
+        return stac_types.Collections(collections=collections, links=links)
+
+    def build_search(self, search_request: BaseSearchPostRequest) -> MongoSearchAdapter:
+        """
+        Translate the parameters of a search request into the filters of a search.
+
+        Args:
+            search_request (BaseSearchPostRequest): Request object that includes the parameters for the search.
+
+        Returns:
+            MongoSearchAdapter: The search matching the items of the request.
+
+        Raises:
+            HTTPException: If there is an error with the cql2_json filter or the free text query.
+        """
+        search = self.database.make_search()
+
+        if search_request.ids:
+            search = self.database.apply_ids_filter(
+                search=search, item_ids=search_request.ids
+            )
+
+        if search_request.collections:
+            search = self.database.apply_collections_filter(
+                search=search, collection_ids=search_request.collections
+            )
+
+        if search_request.datetime:
+            datetime_search = self._return_date(search_request.datetime)
+            search = self.database.apply_datetime_filter(
+                search=search, datetime_search=datetime_search
+            )
+
+        if search_request.bbox:
+            bbox = search_request.bbox
+            if len(bbox) == 6:
+                bbox = [bbox[0], bbox[1], bbox[3], bbox[4]]
+
+            search = self.database.apply_bbox_filter(search=search, bbox=bbox)
+
+        if search_request.intersects:
+            search = self.database.apply_intersects_filter(
+                search=search, intersects=search_request.intersects
+            )
+
+        if search_request.query:
+            for field_name, expr in search_request.query.items():
+                field = "properties__" + field_name
+                for op, value in expr.items():
+                    # Convert enum to string
+                    operator = op.value if isinstance(op, Enum) else op
+                    search = self.database.apply_stacql_filter(
+                        search=search, op=operator, field=field, value=value
+                    )
+
+        # only cql2_json is supported here
+        if hasattr(search_request, "filter_expr"):
+            cql2_filter = getattr(search_request, "filter_expr", None)
+            try:
+                search = self.database.apply_cql2_filter(search, cql2_filter)
+            except Exception as e:
+                raise HTTPException(
+                    status_code=400, detail=f"Error with cql2_json filter: {e}"
+                )
+
+        if hasattr(search_request, "q"):
+            free_text_queries = getattr(search_request, "q", None)
+            try:
+                search = self.database.apply_free_text_filter(search, free_text_queries)
+            except Exception as e:
+                raise HTTPException(
+                    status_code=400, detail=f"Error with free text query: {e}"
+                )
+
+        return search
+
+    async def post_search(
+        self, search_request: BaseSearchPostRequest, request: Request
+    ) -> stac_types.ItemCollection:
+        """
+        Perform a POST search on the catalog.
+
+        Args:
+            search_request (BaseSearchPostRequest): Request object that includes the parameters for the search.
+            request (Request): The incoming request.
+
+        Returns:
+            ItemCollection: A collection of items matching the search criteria, with the
+                counts of the requested facets under `facets`.
+
+        Raises:
+            HTTPException: If there is an error with the cql2_json filter.
+        """
+        base_url = str(request.base_url)
+
+        search = self.build_search(search_request)
+
+        # The GET parameters are converted to a POST request by the core client, which
+        # only knows about the parameters of the core extensions
+        get_params = request.query_params if request.method == "GET" else {}
+
+        if self.extension_is_enabled("FacetsExtension"):
+            facets = getattr(search_request, "facets", None)
+            if facets is None:
+                facets = str2list(get_params.get("facets"))
+            search = self.database.apply_facets(search, facets)
+
+        if self.extension_is_enabled("NearExtension"):
+            near = getattr(search_request, "near", None)
+            max_distance = getattr(search_request, "max_distance", None)
+            try:
+                if near is None and get_params.get("near"):
+                    near = [float(value) for value in get_params["near"].split(",")]
+                if max_distance is None and get_params.get("max_distance"):
+                    max_distance = float(get_params["max_distance"])
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=400, detail=f"Error with near search: {e}"
+                )
+            search = self.database.apply_near(search, near, max_distance)
+
+        sort = None
+        if search_request.sortby:
+            sort = self.database.populate_sort(search_request.sortby)
+
+        limit = 10
+        if search_request.limit:
+            limit = search_request.limit
+
+        items, maybe_count, next_token = await self.database.execute_search(
+            search=search,
+            limit=limit,
+            token=search_request.token,
+            sort=sort,
+            collection_ids=search_request.collections,
+        )
+
+        fields = (
+            getattr(search_request, "fields", None)
+            if self.extension_is_enabled("FieldsExtension")
+            else None
+        )
+        include: Set[str] = fields.include if fields and fields.include else set()
+        exclude: Set[str] = fields.exclude if fields and fields.exclude else set()
+
+        items = [
+            filter_fields(
+                self.item_serializer.db_to_stac(item, base_url=base_url),
+                include,
+                exclude,
+            )
+            for item in items
+        ]
+        links = await PagingLinks(request=request, next=next_token).get_links()
+
+        item_collection = stac_types.ItemCollection(
+            type="FeatureCollection",
+            features=items,
+            links=links,
+            numReturned=len(items),
+            numMatched=maybe_count,
+        )
+        if search.facet_counts is not None:
+            item_collection["facets"] = search.facet_counts  # type: ignore
+
+        return item_collection
+
+    async def get_items(
+        self, collection_id: str, ids: List[str], request: Request
+    ) -> stac_types.ItemCollection:
+        """
+        Get the items of a collection by id.
+
+        Args:
+            collection_id (str): The id of the collection of the items.
+            ids (List[str]): The ids of the items.
+            request (Request): The incoming request.
+
+        Returns:
+            ItemCollection: The items found, in the order of the ids.
+
+        Raises:
+            NotFoundError: If the collection does not exist.
+        """
+        base_url = str(request.base_url)
+
+        await self.database.check_collection_exists(collection_id)
+        items = [
+            self.item_serializer.db_to_stac(item, base_url=base_url)
+            for item in await self.database.get_items(collection_id, ids)
+        ]
+        links = await PagingLinks(request=request, next=None).get_links()
+
+        return stac_types.ItemCollection(
+            type="FeatureCollection",
+            features=items,
+            links=links,
+            numReturned=len(items),
+            numMatched=len(items),
+        )
+
+    async def diff_items(
+        self,
+        collection_id: str,
+        items: List[Dict[str, Optional[str]]],
+        request: Request,
+    ) -> Dict[str, List[str]]:
+        """
+        Compare items with the items stored in a collection.
+
+        Args:
+            collection_id (str): The id of the collection of the items.
+            items (List[Dict[str, Optional[str]]]): The `id` of the items, with their
+                `checksum` or `updated` time.
+            request (Request): The incoming request.
+
+        Returns:
+            Dict[str, List[str]]: The ids of the `missing`, `stale` and `current` items.
+
+        Raises:
+            NotFoundError: If the collection does not exist.
+        """
+        await self.database.check_collection_exists(collection_id)
+        return await self.database.diff_items(collection_id, items)
+
+    async def get_changes(
+        self,
+        collection_id: str,
+        request: Request,
+        since: Optional[str] = None,
+        limit: int = 100,
+        token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Page through the item writes and deletes of a collection.
+
+        Args:
+            collection_id (str): The id of the collection.
+            request (Request): The incoming request.
+            since (Optional[str]): Only return the changes made at or after this time.
+            limit (int): The maximum number of changes to return.
+            token (Optional[str]): The token of the page.
+
+        Returns:
+            Dict[str, Any]: The `changes`, in order, and the links, including the next page,
+                which the last page links to as well.
+                Each change holds the `sequence` number and the `updated` time of the
+                change, the `id` of the item, the `operation`, `upsert` or `delete`, and
+                the `item` for upserts.
+
+        Raises:
+            NotFoundError: If the collection does not exist.
+        """
+        base_url = str(request.base_url)
+
+        await self.database.check_collection_exists(collection_id)
+        documents, next_token = await self.database.get_changes(
+            collection_id, since=since, limit=limit, token=token
+        )
+
+        changes = []
+        for document in documents:
+            change = {
+                "sequence": document[SEQUENCE_FIELD],
+                "updated": datetime_to_str(document[UPDATED_FIELD]),
+                "id": document["id"],
+                "operation": "delete" if document.get("deleted") else "upsert",
+            }
+            if not document.get("deleted"):
+                change["item"] = self.item_serializer.db_to_stac(
+                    document, base_url=base_url
+                )
+            changes.append(change)
+
+        links = await PagingLinks(request=request, next=next_token).get_links()
+
+        return {"changes": changes, "links": links, "numReturned": len(changes)}
+
+    async def batch_search(
+        self,
+        search_requests: List[BaseSearchPostRequest],
+        request: Request,
+        concurrency: int = 8,
+        limiter: Optional[ConcurrencyLimiter] = None,
+    ) -> List[Union[stac_types.ItemCollection, ErrorResponse]]:
+        """
+        Perform many POST searches concurrently.
+
+        Identical searches are run once. Each search is given a request of its own for
+        `/search`, so that its links, including the next page, are those of the search.
+        A failed search does not fail the others, its entry is the error it failed with.
+
+        Args:
+            search_requests (List[BaseSearchPostRequest]): Request objects of the searches.
+            request (Request): The incoming request.
+            concurrency (int): Maximum number of searches run at the same time.
+            limiter (Optional[ConcurrencyLimiter]): The admission limiter each search
+                takes a turn of, so that a batch is charged as many searches.
+
+        Returns:
+            List[Union[ItemCollection, ErrorResponse]]: The item collections of the
+                searches, or their errors, in order.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        scope = {
+            **request.scope,
+            "path": request.scope["path"].rsplit("/batch", 1)[0],
+            "raw_path": request.scope.get("raw_path", b"").rsplit(b"/batch", 1)[0],
+        }
+
+        async def run(
+            search_request: BaseSearchPostRequest, body: bytes
+        ) -> stac_types.ItemCollection:
+            async def receive() -> Dict:
+                return {"type": "http.request", "body": body, "more_body": False}
+
+            async def search() -> stac_types.ItemCollection:
+                return await self.post_search(
+                    search_request, request=Request(scope, receive)
+                )
+
+            async with semaphore:
+                try:
+                    if limiter is None:
+                        return await search()
+                    async with limiter.slot():
+                        return await search()
+                except HTTPException as e:
+                    return ErrorResponse(
+                        code=e.__class__.__name__, description=str(e.detail)
+                    )
+                except Exception as e:
+                    logger.warning(f"Search of a batch failed: {e}")
+                    return ErrorResponse(code=e.__class__.__name__, description=str(e))
+
+        bodies = [
+            orjson.dumps(
+                search_request.model_dump(
+                    mode="json", by_alias=True, exclude_unset=True
+                ),
+                option=orjson.OPT_SORT_KEYS,
+            )
+            for search_request in search_requests
+        ]
+        searches: Dict[bytes, Any] = {}
+        for search_request, body in zip(search_requests, bodies):
+            if body not in searches:
+                searches[body] = run(search_request, body)
+
+        results = dict(zip(searches, await asyncio.gather(*searches.values())))
+        return [results[body] for body in bodies]
+
+
+class TransactionsClient(core.TransactionsClient):
+    """Transactions extension specific CRUD operations.
+
+    Extends the core client with the asynchronous ingest of items, see `IngestQueue`.
+    """
+
+    def __init__(self, *args, ingest: Optional[IngestQueue] = None, **kwargs):
+        """Initialize the client, with the ingest queue accepting the item POSTs if any."""
+        super().__init__(*args, **kwargs)
+        self.ingest = ingest
+
+    async def create_item(
+        self, collection_id: str, item: Union[Item, ItemCollection], **kwargs
+    ) -> Union[stac_types.Item, str, JSONResponse]:
+        """
+        Create an item or a feature collection of items in the specified collection.
+
+        With an ingest queue, the validated items are spooled and written in bulk later:
+        the response is then `202 Accepted`, with the id of the job writing them and a
+        link to its status at `/ingest/jobs/{job_id}`.
+
+        Args:
+            collection_id (str): The ID of the collection to add the item(s) to.
+            item (Union[Item, ItemCollection]): A single item or a collection of items to be added.
+            **kwargs: Additional keyword arguments, such as `request` and `refresh`.
+
+        Returns:
+            Union[stac_types.Item, str, JSONResponse]: The created item, a summary of the
+            items added, or the accepted job with an ingest queue.
+
+        Raises:
+            NotFoundError: If the specified collection is not found in the database.
+            ConflictError: If an item with the same ID already exists in the collection.
+            HTTPException: If an item belongs to another collection, or if the ingest queue
+                is full.
+        """
+        if self.ingest is None:
+            return await super().create_item(collection_id, item, **kwargs)
+
+        base_url = str(kwargs["request"].base_url)
+        item_dict = item.model_dump(mode="json")
+        if item_dict["type"] == "FeatureCollection":
+            items = item_dict["features"]
+        else:
+            items = [item_dict]
+        for feature in items:
+            if feature.get("collection", collection_id) != collection_id:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Item {feature['id']} does not belong to collection {collection_id}",
+                )
+            feature["collection"] = collection_id
+
+        await self.database.check_collection_exists(collection_id)
+        try:
+            job_id = await self.ingest.submit(collection_id, items, base_url)
+        except SpoolFull as e:
+            raise HTTPException(
+                status_code=503,
+                detail=f"The ingest queue is full: {e}",
+                headers={"Retry-After": str(int(self.ingest.retry_interval))},
+            )
+
+        href = urljoin(base_url, f"ingest/jobs/{job_id}")
+        return JSONResponse(
+            status_code=202,
+            content={
+                "id": job_id,
+                "status": "queued",
+                "accepted": len(items),
+                "links": [{"rel": "monitor", "type": MimeTypes.json, "href": href}],
+            },
+            headers={"Location": href},
+        )
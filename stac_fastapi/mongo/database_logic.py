@@ -1,28 +1,69 @@
 """Database logic."""
+import asyncio
 import base64
+import hashlib
+import json
 import logging
+import math
 import os
 import re
-from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple, Type, Union
+import time
+from copy import deepcopy
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    Type,
+    Union,
+)
 
 import attr
 from bson import ObjectId
-from pymongo.errors import BulkWriteError, PyMongoError
+from dateutil import parser  # type: ignore
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient, ReturnDocument, UpdateOne, WriteConcern
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+from pymongo.read_preferences import _ServerMode
 from starlette.requests import Request
 
 from stac_fastapi.core import serializers
+from stac_fastapi.core.datetime_utils import datetime_to_str
 from stac_fastapi.core.extensions import filter
 from stac_fastapi.core.utilities import bbox2polygon
 from stac_fastapi.extensions.core import SortExtension
-from stac_fastapi.mongo.config import AsyncMongoDBSettings as AsyncSearchSettings
-from stac_fastapi.mongo.config import MongoDBSettings as SyncSearchSettings
+from stac_fastapi.mongo.config import (
+    mongo_clients,
+    read_preference_from_env,
+    write_concern_from_env,
+)
+from stac_fastapi.mongo.consistency import (
+    reads_after_writes,
+    record_write,
+    request_session,
+    run_in_own_session,
+)
+from stac_fastapi.mongo.timeouts import TIMEOUT_ERRORS, within_budget
 from stac_fastapi.mongo.utilities import (
+    BatchLoader,
+    GroupCommitWriter,
+    SingleFlight,
     decode_token,
     encode_token,
     parse_datestring,
     serialize_doc,
 )
-from stac_fastapi.types.errors import ConflictError, NotFoundError
+from stac_fastapi.types.errors import (
+    ConflictError,
+    DatabaseError,
+    InvalidQueryParameter,
+    NotFoundError,
+)
 from stac_fastapi.types.stac import Collection, Item
 
 logger = logging.getLogger(__name__)
@@ -31,61 +72,1172 @@ NumType = Union[float, int]
 
 COLLECTIONS_INDEX = os.getenv("STAC_COLLECTIONS_INDEX", "collections")
 ITEMS_INDEX = os.getenv("STAC_ITEMS_INDEX", "items")
+QUERYABLES_INDEX = os.getenv("STAC_QUERYABLES_INDEX", "queryables")
+COLLECTION_STATS_INDEX = os.getenv("STAC_COLLECTION_STATS_INDEX", "collection_stats")
+SEQUENCES_INDEX = os.getenv("STAC_SEQUENCES_INDEX", "sequences")
+TOMBSTONES_INDEX = os.getenv("STAC_TOMBSTONES_INDEX", "tombstones")
 DATABASE = os.getenv("MONGO_DB", "admin")
+# Databases whose collections change streams cannot watch
+SYSTEM_DATABASES = {"admin", "local", "config"}
+QUERYABLES_CACHE_TTL = int(os.getenv("STAC_QUERYABLES_CACHE_TTL", "300"))
+QUERYABLES_SAMPLE_SIZE = int(os.getenv("STAC_QUERYABLES_SAMPLE_SIZE", "1000"))
+AGGREGATION_BUCKET_LIMIT = int(os.getenv("STAC_AGGREGATION_BUCKET_LIMIT", "10000"))
+FACET_BUCKET_LIMIT = int(os.getenv("STAC_FACET_BUCKET_LIMIT", "100"))
+COLLECTION_PRUNING = os.getenv("STAC_COLLECTION_PRUNING", "true") == "true"
+SINGLE_FLIGHT = os.getenv("STAC_SINGLE_FLIGHT", "true") == "true"
+ITEM_BATCHING = os.getenv("STAC_ITEM_BATCHING", "true") == "true"
+TOMBSTONES_TTL = int(os.getenv("STAC_TOMBSTONES_TTL", str(30 * 24 * 3600)))
+CHANGES_SETTLE_SECONDS = float(os.getenv("STAC_CHANGES_SETTLE_SECONDS", "2"))
+COLLECTION_CACHE_TTL = float(os.getenv("STAC_COLLECTION_CACHE_TTL", "0"))
+# Write concerns of the single-item writes, of the bulk inserts and of the collection
+# writes, those of the connection string when not set, see `write_concern_from_env`
+ITEM_WRITE_CONCERN = write_concern_from_env("MONGO_ITEM_WRITE_CONCERN")
+BULK_WRITE_CONCERN = write_concern_from_env("MONGO_BULK_WRITE_CONCERN")
+COLLECTION_WRITE_CONCERN = write_concern_from_env("MONGO_COLLECTION_WRITE_CONCERN")
+# Read preferences of the searches, of the counts of matched items, of the item reads and
+# of the collection listings, those of the connection string when not set, see
+# `read_preference_from_env`. Writes and the reads made for them use the primary.
+SEARCH_READ_PREFERENCE = read_preference_from_env("MONGO_SEARCH_READ_PREFERENCE")
+COUNT_READ_PREFERENCE = read_preference_from_env("MONGO_COUNT_READ_PREFERENCE")
+ITEM_READ_PREFERENCE = read_preference_from_env("MONGO_ITEM_READ_PREFERENCE")
+COLLECTIONS_READ_PREFERENCE = read_preference_from_env(
+    "MONGO_COLLECTIONS_READ_PREFERENCE"
+)
+GROUP_COMMIT = os.getenv("STAC_GROUP_COMMIT", "false") == "true"
+GROUP_COMMIT_WINDOW = float(os.getenv("STAC_GROUP_COMMIT_WINDOW", "0.005"))
+GROUP_COMMIT_MAX_SIZE = int(os.getenv("STAC_GROUP_COMMIT_MAX_SIZE", "500"))
+# Item properties whose distinct values are summarized in the collection statistics
+SUMMARY_PROPERTIES = [
+    name.strip()
+    for name in os.getenv(
+        "STAC_SUMMARY_PROPERTIES", "platform,constellation,instruments"
+    ).split(",")
+    if name.strip()
+]
+
+# The cached collections and queryables derive from these collections, keyed on the
+# collection id, see `DatabaseLogic.watch_cache_invalidations`
+CACHE_SOURCES_PIPELINE = [
+    {
+        "$match": {
+            "ns.coll": {
+                "$in": [COLLECTIONS_INDEX, COLLECTION_STATS_INDEX, QUERYABLES_INDEX]
+            }
+        }
+    },
+    {"$project": {"operationType": 1, "ns": 1, "documentKey": 1, "fullDocument.id": 1}},
+]
+
+# The queryables sampled over all items are cached under a null _id, which cannot
+# collide with the id of a collection.
+CATALOG_QUERYABLES_ID = None
+
+# JSON schema types of the BSON types reported by $type
+_BSON_TO_JSON_TYPE = {
+    "string": "string",
+    "double": "number",
+    "decimal": "number",
+    "int": "integer",
+    "long": "integer",
+    "bool": "boolean",
+    "date": "string",
+    "array": "array",
+    "object": "object",
+}
+
+_RFC3339_PATTERN = re.compile(
+    r"^\d{4}-\d{2}-\d{2}[Tt ]\d{2}:\d{2}:\d{2}(\.\d+)?([Zz]|[+-]\d{2}:\d{2})$"
+)
+
+# JSON schema types of the properties every collection is assumed to share. These
+# are used to coerce CQL2 literals when a collection does not declare them itself.
+DEFAULT_QUERYABLE_TYPES: Dict[str, Dict[str, Any]] = {
+    "id": {"type": "string"},
+    "collection": {"type": "string"},
+    "properties.datetime": {"type": "string", "format": "date-time"},
+    "properties.start_datetime": {"type": "string", "format": "date-time"},
+    "properties.end_datetime": {"type": "string", "format": "date-time"},
+    "properties.created": {"type": "string", "format": "date-time"},
+    "properties.updated": {"type": "string", "format": "date-time"},
+    "properties.eo:cloud_cover": {"type": "number"},
+    "properties.s2:cloud_shadow_percentage": {"type": "number"},
+    "properties.s2:nodata_pixel_percentage": {"type": "number"},
+}
+
+# Fields counted by the term frequency aggregations
+TERM_AGGREGATION_FIELDS = {
+    "collection_frequency": "collection",
+    "platform_frequency": "properties.platform",
+}
+
+# Bounds of the buckets of the numeric ranges, open ranges use None
+NumericRanges = List[Tuple[Optional[float], Optional[float]]]
+
+CLOUD_COVER_RANGES: NumericRanges = [(None, 5), (5, 15), (15, 40), (40, None)]
+
+RANGE_AGGREGATION_FIELDS: Dict[str, Tuple[str, NumericRanges]] = {
+    "cloud_cover_frequency": ("properties.eo:cloud_cover", CLOUD_COVER_RANGES),
+}
+
+# Fields counted in numeric ranges rather than per value by the search facets
+RANGE_FACET_FIELDS: Dict[str, NumericRanges] = {
+    "properties.eo:cloud_cover": CLOUD_COVER_RANGES,
+}
+
+# Weights of the fields of the text indexes, matches in titles rank first
+TEXT_INDEX_WEIGHTS = {"title": 10, "keywords": 5, "description": 1}
+
+# Sort order of the relevance of the documents matched by a $text filter
+TEXT_SCORE = {"$meta": "textScore"}
+
+# Item property holding the distance to the point of a near search, in meters
+NEAR_DISTANCE_FIELD = "properties.near:distance"
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Web Mercator cannot represent the poles, tiles stop at this latitude
+_MAX_MERCATOR_LATITUDE = 85.0511287798066
+
+# Field of the collection documents holding the geometry and dates derived from their extent
+EXTENT_FIELD = "_extent"
+
+# Derived item field holding the checksum of its content, see `item_checksum`
+CHECKSUM_FIELD = "_checksum"
+
+# Server-maintained fields of the item writes and deletes, ordering the changes feed
+UPDATED_FIELD = "_updated"
+SEQUENCE_FIELD = "_seq"
+_CHANGES_SEQUENCE = "changes"
+# Items written before the changes feed, and moved to a renamed collection, are
+# numbered in batches
+_SEQUENCE_BACKFILL_BATCH = 1000
+
+# Bounds of the derived dates of the open ends of temporal extents
+_MIN_EXTENT_DATETIME = datetime.min.replace(tzinfo=timezone.utc)
+_MAX_EXTENT_DATETIME = datetime.max.replace(tzinfo=timezone.utc)
+
+# The edges of GeoJSON polygons are geodesics, short edges keep the derived extent polygons
+# close to the parallels of the bounding boxes
+_EXTENT_EDGE_DEGREES = 10
+# Wider extents are split, so that no polygon covers a hemisphere or wraps around the globe
+_EXTENT_PART_DEGREES = 90
 
 
 async def create_collection_index():
     """
-    Ensure indexes for the collections collection in MongoDB using the asynchronous client.
+    Ensure indexes for the collections collection in MongoDB using the shared asynchronous client.
 
     Returns:
         None
     """
-    client = AsyncSearchSettings().create_client
-    if client:
-        try:
-            db = client[DATABASE]
-            await db[COLLECTIONS_INDEX].create_index([("id", 1)], unique=True)
-            logger.info(
-                f"Index created successfully for collection: {COLLECTIONS_INDEX}"
-            )
-        except Exception as e:
-            # Handle exceptions, which could be due to existing index conflicts, etc.
-            logger.error(
-                f"Error creating index for collection {COLLECTIONS_INDEX}: {e}"
+    db = mongo_clients.async_client[DATABASE]
+    try:
+        await db[COLLECTIONS_INDEX].create_index([("id", 1)], unique=True)
+        await db[COLLECTIONS_INDEX].create_index(
+            [(field, "text") for field in TEXT_INDEX_WEIGHTS],
+            weights=TEXT_INDEX_WEIGHTS,
+            name="collections_text",
+        )
+        await db[COLLECTIONS_INDEX].create_index(
+            [(f"{EXTENT_FIELD}.geometry", "2dsphere")]
+        )
+        await db[COLLECTIONS_INDEX].create_index(
+            [(f"{EXTENT_FIELD}.start", 1), (f"{EXTENT_FIELD}.end", 1)]
+        )
+        # Derive the extent fields of the collections created before they existed
+        async for collection in db[COLLECTIONS_INDEX].find(
+            {EXTENT_FIELD: {"$exists": False}}
+        ):
+            await db[COLLECTIONS_INDEX].update_one(
+                {"_id": collection["_id"]},
+                {"$set": {EXTENT_FIELD: collection_extent(collection)}},
             )
-        finally:
-            logger.debug(f"Closing MongoDB client: {client}")
-            client.close()
-    else:
-        logger.error("Failed to create MongoDB client")
+        logger.info(f"Index created successfully for collection: {COLLECTIONS_INDEX}")
+    except Exception as e:
+        # Handle exceptions, which could be due to existing index conflicts, etc.
+        logger.error(f"Error creating index for collection {COLLECTIONS_INDEX}: {e}")
 
 
 async def create_item_index():
     """
-    Ensure indexes for the items collection in MongoDB using the asynchronous client.
+    Ensure indexes for the items collection in MongoDB using the shared asynchronous client.
 
     Returns:
         None
     """
-    client = AsyncSearchSettings().create_client
-    if client:
-        try:
-            db = client[DATABASE]
-            # Create indexes for the items collection
-            await db[ITEMS_INDEX].create_index(
-                [("id", 1), ("collection", 1)], unique=True
+    db = mongo_clients.async_client[DATABASE]
+    try:
+        # Create indexes for the items collection
+        await db[ITEMS_INDEX].create_index([("id", 1), ("collection", 1)], unique=True)
+        await db[ITEMS_INDEX].create_index([("geometry", "2dsphere")])
+        await db[ITEMS_INDEX].create_index([("properties.datetime", 1)])
+        # Covers the lookups of `diff_items`
+        await db[ITEMS_INDEX].create_index(
+            [
+                ("collection", 1),
+                ("id", 1),
+                (CHECKSUM_FIELD, 1),
+                ("properties.updated", 1),
+            ]
+        )
+        await db[ITEMS_INDEX].create_index(
+            [(f"properties.{field}", "text") for field in TEXT_INDEX_WEIGHTS],
+            weights={
+                f"properties.{field}": weight
+                for field, weight in TEXT_INDEX_WEIGHTS.items()
+            },
+            name="items_text",
+        )
+        for index in (ITEMS_INDEX, TOMBSTONES_INDEX):
+            await db[index].create_index([("collection", 1), (SEQUENCE_FIELD, 1)])
+            await db[index].create_index([("collection", 1), (UPDATED_FIELD, 1)])
+        await db[TOMBSTONES_INDEX].create_index(
+            [(UPDATED_FIELD, 1)], expireAfterSeconds=TOMBSTONES_TTL
+        )
+        # Number the items written before the changes feed existed
+        unnumbered = db[ITEMS_INDEX].find(
+            {SEQUENCE_FIELD: {"$exists": False}},
+            {"_id": True},
+            batch_size=_SEQUENCE_BACKFILL_BATCH,
+        )
+        async for batch in _in_batches(unnumbered, _SEQUENCE_BACKFILL_BATCH):
+            first, now = await next_sequence(db, len(batch))
+            await db[ITEMS_INDEX].bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": item["_id"]},
+                        {"$set": {UPDATED_FIELD: now, SEQUENCE_FIELD: first + j}},
+                    )
+                    for j, item in enumerate(batch)
+                ],
+                ordered=False,
             )
-            await db[ITEMS_INDEX].create_index([("geometry", "2dsphere")])
-            await db[ITEMS_INDEX].create_index([("properties.datetime", 1)])
-            logger.info(f"Indexes created successfully for collection: {ITEMS_INDEX}")
-        except Exception as e:
-            # Handle exceptions, which could be due to existing index conflicts, etc.
-            logger.error(f"Error creating indexes for collection {ITEMS_INDEX}: {e}")
-        finally:
-            client.close()
+        logger.info(f"Indexes created successfully for collection: {ITEMS_INDEX}")
+    except Exception as e:
+        # Handle exceptions, which could be due to existing index conflicts, etc.
+        logger.error(f"Error creating indexes for collection {ITEMS_INDEX}: {e}")
+
+
+def _reserve_sequence(count: int) -> List[Dict[str, Any]]:
+    """Build the update pipeline reserving numbers of the changes sequence."""
+    return [
+        {
+            "$set": {
+                "value": {"$add": [{"$ifNull": ["$value", 0]}, count]},
+                "time": "$$NOW",
+            }
+        }
+    ]
+
+
+def _reserved_sequence(sequence: Dict[str, Any], count: int) -> Tuple[int, datetime]:
+    """Get the first reserved number and the time of the reservation."""
+    return sequence["value"] - count + 1, sequence["time"].replace(tzinfo=timezone.utc)
+
+
+async def next_sequence(db: Any, count: int = 1) -> Tuple[int, datetime]:
+    """
+    Reserve numbers of the changes sequence.
+
+    The numbers and the time of the reservation, by the clock of the server, are taken
+    in one round trip to the sequence document, so that every process numbers and
+    times its writes in the same order. Every item write makes this round trip.
+
+    Args:
+        db: The asynchronous database.
+        count (int): The number of sequence numbers to reserve.
+
+    Returns:
+        Tuple[int, datetime]: The first of the `count` reserved numbers, they follow
+            each other, and the time they were reserved.
+    """
+    sequence = await db[SEQUENCES_INDEX].find_one_and_update(
+        {"_id": _CHANGES_SEQUENCE},
+        _reserve_sequence(count),
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return _reserved_sequence(sequence, count)
+
+
+def sync_next_sequence(db: Any, count: int = 1) -> Tuple[int, datetime]:
+    """Reserve numbers of the changes sequence with the synchronous client, see `next_sequence`."""
+    sequence = db[SEQUENCES_INDEX].find_one_and_update(
+        {"_id": _CHANGES_SEQUENCE},
+        _reserve_sequence(count),
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return _reserved_sequence(sequence, count)
+
+
+def _stamp_changes(
+    documents: List[Dict[str, Any]], first_sequence: int, updated: datetime
+) -> None:
+    """Set the update time and the sequence numbers of written item documents."""
+    for i, document in enumerate(documents):
+        document[UPDATED_FIELD] = updated
+        document[SEQUENCE_FIELD] = first_sequence + i
+
+
+async def _in_batches(cursor: Any, size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Read the documents of a cursor in lists of up to `size` documents."""
+    batch: List[Dict[str, Any]] = []
+    async for document in cursor:
+        batch.append(document)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _move_items(
+    db: Any, items: List[Dict[str, Any]], collection_id: str, new_collection_id: str
+) -> None:
+    """
+    Move items to another collection, recording the move for the changes feed.
+
+    The moved items are numbered as written to the new collection, and tombstones
+    record their delete from the old one.
+    """
+    first, now = await next_sequence(db, 2 * len(items))
+    await db[ITEMS_INDEX].bulk_write(
+        [
+            UpdateOne(
+                {"_id": item["_id"]},
+                {
+                    "$set": {
+                        "collection": new_collection_id,
+                        UPDATED_FIELD: now,
+                        SEQUENCE_FIELD: first + i,
+                    }
+                },
+            )
+            for i, item in enumerate(items)
+        ],
+        ordered=False,
+    )
+    tombstones = [{"collection": collection_id, "id": item["id"]} for item in items]
+    _stamp_changes(tombstones, first + len(items), now)
+    await db[TOMBSTONES_INDEX].insert_many(tombstones, ordered=False)
+
+
+def check_change_streams(database: str) -> None:
+    """
+    Check that change streams can watch the collections of a database.
+
+    Args:
+        database (str): The name of the database.
+
+    Raises:
+        ValueError: If the database is a system database, such as the default `admin`.
+    """
+    if database in SYSTEM_DATABASES:
+        raise ValueError(
+            f"Change streams cannot watch the {database} database, set MONGO_DB "
+            "to the database of the catalog"
+        )
+
+
+def _json_type(value: Any) -> Optional[str]:
+    """Return the JSON schema type of a scalar value, or None for other values."""
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    return None
+
+
+def _schema_from_types(
+    json_types: Iterable[Optional[str]], example: Any = None
+) -> Dict[str, Any]:
+    """
+    Build the JSON schema of a property from the types of its sampled values.
+
+    Args:
+        json_types (Iterable[Optional[str]]): The JSON schema types of the values. None
+            stands for null values, which are ignored.
+        example (Any): A sampled value, used to detect datetime strings.
+
+    Returns:
+        Dict[str, Any]: The schema, without a type if the values do not share one.
+    """
+    types = {json_type for json_type in json_types if json_type is not None}
+    if types == {"integer", "number"}:
+        types = {"number"}
+    if len(types) != 1:
+        return {}
+
+    schema = {"type": types.pop()}
+    if schema["type"] == "string" and (
+        isinstance(example, datetime) or _RFC3339_PATTERN.match(str(example))
+    ):
+        schema["format"] = "date-time"
+    return schema
+
+
+def item_property_schemas(items: Iterable[Item]) -> Dict[str, Dict[str, Any]]:
+    """
+    Infer the JSON schemas of the properties of items.
+
+    Args:
+        items (Iterable[Item]): The items to inspect.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: A mapping of property names to JSON schemas.
+    """
+    schemas: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        for name, value in item.get("properties", {}).items():
+            if name in schemas or "." in name or name.startswith("$"):
+                continue
+            if isinstance(value, list):
+                json_type: Optional[str] = "array"
+            elif isinstance(value, dict):
+                json_type = "object"
+            else:
+                json_type = _json_type(value)
+            schema = _schema_from_types([json_type], value)
+            if schema:
+                schemas[name] = schema
+    return schemas
+
+
+def queryables_from_summaries(
+    summaries: Optional[Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Derive the queryable types of item properties from STAC collection summaries.
+
+    Summaries can be a list of values, a range object (`minimum`/`maximum`) or a JSON
+    schema. Properties whose summarized values do not share a single type are skipped.
+
+    Args:
+        summaries (Optional[Dict[str, Any]]): The `summaries` of a STAC collection.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: A mapping of property paths to JSON schemas.
+    """
+    queryables: Dict[str, Dict[str, Any]] = {}
+    for name, summary in (summaries or {}).items():
+        if isinstance(summary, dict) and "type" in summary:
+            schema = {k: summary[k] for k in ("type", "format") if k in summary}
+            queryables[f"properties.{name}"] = schema
+            continue
+
+        if isinstance(summary, dict):
+            values = [summary.get("minimum"), summary.get("maximum")]
+        elif isinstance(summary, list):
+            values = summary
+        else:
+            continue
+
+        types = {_json_type(value) for value in values if value is not None}
+        if types == {"integer", "number"}:
+            types = {"number"}
+        if len(types) == 1 and None not in types:
+            queryables[f"properties.{name}"] = {"type": types.pop()}
+
+    return queryables
+
+
+def _guess_literal(value: Any) -> Any:
+    """Convert a numeric string to a float or an integer, keeping other values as is."""
+    try:
+        if "." in value:
+            return float(value)
+        return int(value)
+    except (ValueError, TypeError):
+        return value
+
+
+def _coerce_literal(value: Any, schema: Optional[Dict[str, Any]]) -> Any:
+    """
+    Coerce a CQL2 literal to the type declared for the property it is compared with.
+
+    Args:
+        value (Any): The CQL2 literal. Timestamp and date literals are unwrapped.
+        schema (Optional[Dict[str, Any]]): The JSON schema of the property, if known.
+
+    Returns:
+        Any: The coerced literal. Without a schema, numeric strings are still converted.
+
+    Raises:
+        ValueError: If the literal cannot be represented as the declared type.
+    """
+    if isinstance(value, dict):
+        if "timestamp" in value:
+            value = value["timestamp"]
+        elif "date" in value:
+            value = value["date"]
+        else:
+            return value
+
+    if not schema:
+        return value if isinstance(value, list) else _guess_literal(value)
+
+    if isinstance(value, list):
+        return [_coerce_literal(v, schema) for v in value]
+
+    if value is None:
+        return value
+
+    json_type = schema.get("type")
+    try:
+        if json_type == "string" and schema.get("format") in ("date-time", "date"):
+            # Items store datetimes as RFC 3339 strings, normalized on query.
+            return parse_datestring(str(value))
+        if json_type == "string":
+            return value if isinstance(value, str) else str(value)
+        if json_type == "integer" and isinstance(value, str):
+            return int(value)
+        if json_type == "number" and isinstance(value, str):
+            return float(value)
+        if json_type == "boolean" and isinstance(value, str):
+            if value.lower() not in ("true", "false"):
+                raise ValueError(value)
+            return value.lower() == "true"
+    except ValueError:
+        raise ValueError(f"Literal {value!r} is not a valid {json_type}")
+    return value
+
+
+def _text_search(terms: List[str]) -> str:
+    """
+    Build the $text search string matching any of the free-text terms.
+
+    Quotes are dropped, $text would otherwise require every quoted phrase to match.
+
+    Args:
+        terms (List[str]): The free-text terms.
+
+    Returns:
+        str: The $search string.
+    """
+    return " ".join(term.replace('"', " ") for term in terms)
+
+
+def _property_path(property_name: str) -> str:
+    """Map a CQL2 property name to the path of the field in the item document."""
+    # Use the special mapping directly if available, or construct the path appropriately
+    if property_name in filter.queryables_mapping:
+        return filter.queryables_mapping[property_name]
+    if property_name not in [
+        "id",
+        "collection",
+    ] and not property_name.startswith("properties."):
+        return f"properties.{property_name}"
+    return property_name
+
+
+def _prefix_range(prefix: str) -> Dict[str, Any]:
+    """
+    Build the range of strings starting with a prefix.
+
+    Unlike an anchored regular expression, the range gives the query planner tight
+    bounds on an index of the field.
+
+    Args:
+        prefix (str): The prefix the strings must start with.
+
+    Returns:
+        Dict[str, Any]: A MongoDB condition matching the strings that start with the prefix.
+    """
+    # Strip characters that cannot be incremented, the range is then open-ended
+    upper = prefix.rstrip(chr(0x10FFFF))
+    if not upper:
+        return {"$gte": prefix, "$type": "string"}
+
+    next_char = ord(upper[-1]) + 1
+    if 0xD800 <= next_char <= 0xDFFF:
+        # Surrogates cannot be encoded, skip to the first character after them
+        next_char = 0xE000
+    return {"$gte": prefix, "$lt": upper[:-1] + chr(next_char)}
+
+
+def _collection_property_path(property_name: str) -> str:
+    """Map a CQL2 property name to the path of the field in the collection document."""
+    if property_name.startswith("properties."):
+        return property_name[len("properties.") :]
+    return property_name
+
+
+def _degree_steps(lower: float, upper: float) -> List[float]:
+    """Split a range of degrees in steps no longer than the edges of the extent polygons."""
+    count = max(1, math.ceil((upper - lower) / _EXTENT_EDGE_DEGREES))
+    return [lower + (upper - lower) * i / count for i in range(count + 1)]
+
+
+def _longitude(x: float) -> float:
+    """Wrap a longitude past the antimeridian back into [-180, 180]."""
+    return x if -180 <= x <= 180 else (x + 180) % 360 - 180
+
+
+def _extent_ring(
+    west: float, south: float, east: float, north: float
+) -> List[List[float]]:
+    """
+    Build the counterclockwise ring of a bounding box at most one part wide.
+
+    The poles are single vertices, the meridians meet there.
+    """
+    longitudes = _degree_steps(west, east)
+    latitudes = _degree_steps(south, north)[1:-1]
+
+    ring = [[west, -90.0]] if south <= -90 else [[x, south] for x in longitudes]
+    ring += [[east, y] for y in latitudes]
+    ring += [[east, 90.0]] if north >= 90 else [[x, north] for x in longitudes[::-1]]
+    ring += [[west, y] for y in latitudes[::-1]]
+    ring.append(ring[0])
+    return [[_longitude(x), y] for x, y in ring]
+
+
+def _extent_geometry(bbox: List[NumType]) -> Optional[Dict[str, Any]]:
+    """
+    Derive a GeoJSON geometry covering a bounding box, for the 2dsphere index.
+
+    Bounding boxes crossing the antimeridian, wider than a hemisphere or reaching the poles
+    cannot be written as a single polygon, they are split along meridians.
+
+    Args:
+        bbox (List[NumType]): The 2D or 3D bounding box.
+
+    Returns:
+        Optional[Dict[str, Any]]: The geometry, None if the bounding box is not valid.
+    """
+    if len(bbox) == 6:
+        west, south, _, east, north, _ = bbox
+    elif len(bbox) == 4:
+        west, south, east, north = bbox
     else:
-        logger.error("Failed to create MongoDB client")
+        return None
+
+    south, north = max(south, -90), min(north, 90)
+    if south > north or not -180 <= west <= 180 or not -180 <= east <= 180:
+        return None
+    if west > east:
+        east += 360
+
+    if south == north and abs(south) == 90:
+        return {"type": "Point", "coordinates": [west, south]}
+    if west == east and south == north:
+        return {"type": "Point", "coordinates": [west, south]}
+    if west == east:
+        line = [[west, y] for y in _degree_steps(south, north)]
+        return {"type": "LineString", "coordinates": line}
+    if south == north:
+        line = [[_longitude(x), south] for x in _degree_steps(west, east)]
+        return {"type": "LineString", "coordinates": line}
+
+    parts = []
+    lower = west
+    while lower < east:
+        upper = min(lower + _EXTENT_PART_DEGREES, east)
+        parts.append([_extent_ring(lower, south, upper, north)])
+        lower = upper
+
+    if len(parts) == 1:
+        return {"type": "Polygon", "coordinates": parts[0]}
+    return {"type": "MultiPolygon", "coordinates": parts}
+
+
+def _extent_datetime(value: Optional[str], default: datetime) -> datetime:
+    """Parse a date of a temporal extent, open or invalid dates take the default."""
+    if not value:
+        return default
+    try:
+        parsed = parser.isoparse(value)
+    except (TypeError, ValueError):
+        return default
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def collection_extent(collection: Collection) -> Dict[str, Any]:
+    """
+    Derive the indexed extent fields of a collection document.
+
+    Only the first bounding box and interval of the extent are used, the STAC
+    specification makes them cover the whole collection.
+
+    Args:
+        collection (Collection): The collection.
+
+    Returns:
+        Dict[str, Any]: The geometry of the spatial extent, if valid, and the start and end
+        dates of the temporal extent, open ends taking the earliest and latest dates.
+    """
+    extent = collection.get("extent") or {}
+    bboxes = (extent.get("spatial") or {}).get("bbox") or []
+    intervals = (extent.get("temporal") or {}).get("interval") or []
+
+    derived: Dict[str, Any] = {
+        "start": _MIN_EXTENT_DATETIME,
+        "end": _MAX_EXTENT_DATETIME,
+    }
+    if bboxes:
+        try:
+            geometry = _extent_geometry(bboxes[0])
+        except TypeError:
+            geometry = None
+        if geometry:
+            derived["geometry"] = geometry
+    if intervals and len(intervals[0]) == 2:
+        start, end = intervals[0]
+        derived["start"] = _extent_datetime(start, _MIN_EXTENT_DATETIME)
+        derived["end"] = _extent_datetime(end, _MAX_EXTENT_DATETIME)
+    return derived
+
+
+def _extent_intersects(geometry: Dict[str, Any]) -> Dict[str, Any]:
+    """Match the collections whose derived extent geometry, if any, intersects a geometry."""
+    return {
+        "$or": [
+            {f"{EXTENT_FIELD}.geometry": {"$exists": False}},
+            {f"{EXTENT_FIELD}.geometry": {"$geoIntersects": {"$geometry": geometry}}},
+        ]
+    }
+
+
+def _canonical(value: Any) -> Any:
+    """Write integral numbers as integers, validation may turn them into floats."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def item_checksum(item: Item) -> str:
+    """
+    Compute the checksum of the content of an item.
+
+    The checksum is the SHA-256 of the item serialized to JSON with sorted keys, no
+    whitespace and integral numbers written as integers, leaving out the `created` and
+    `updated` properties which are set by the API. The `collection` is left out too,
+    items are compared within their collection and keep their checksum when it is
+    renamed, see `DatabaseLogic.update_collection`.
+
+    Args:
+        item (Item): The item, as sent to the API.
+
+    Returns:
+        str: The hexadecimal checksum.
+    """
+    properties = {
+        k: v
+        for k, v in item.get("properties", {}).items()
+        if k not in ("created", "updated")
+    }
+    content = {
+        k: v
+        for k, v in {**item, "properties": properties}.items()
+        if k not in ("_id", "collection", CHECKSUM_FIELD)
+    }
+    return hashlib.sha256(
+        json.dumps(
+            _canonical(content),
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+        ).encode()
+    ).hexdigest()
+
+
+def collection_document(collection: Collection) -> Dict[str, Any]:
+    """
+    Build the document stored for a collection.
+
+    The statistics served with the collections are computed, they are not stored, and
+    the fields indexing the extent are derived.
+
+    Args:
+        collection (Collection): The collection.
+
+    Returns:
+        Dict[str, Any]: The collection document, without `_id`.
+    """
+    document = {k: v for k, v in collection.items() if k not in ("_id", "stats")}
+    document[EXTENT_FIELD] = collection_extent(collection)
+    return document
+
+
+def _item_bbox(item: Dict[str, Any]) -> Optional[List[NumType]]:
+    """Get the 2D bounding box of an item, None if it has no valid one."""
+    bbox = item.get("bbox")
+    if not isinstance(bbox, list) or len(bbox) not in (4, 6):
+        return None
+    half = len(bbox) // 2
+    return [bbox[0], bbox[1], bbox[half], bbox[half + 1]]
+
+
+def _summary_values(value: Any) -> List[Any]:
+    """Flatten the value of a summarized item property, arrays count per element."""
+    if value is None:
+        return []
+    return list(value) if isinstance(value, list) else [value]
+
+
+def collection_stats(stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Shape the statistics document of a collection for the collection responses.
+
+    Args:
+        stats (Optional[Dict[str, Any]]): The statistics document, if any.
+
+    Returns:
+        Dict[str, Any]: The number of items of the collection, the extent covering them and
+        the distinct values of the summarized properties.
+    """
+    stats = stats or {}
+    result: Dict[str, Any] = {
+        "count": stats.get("count", 0),
+        "summaries": stats.get("summaries", {}),
+    }
+    bbox = [stats.get(bound) for bound in ("west", "south", "east", "north")]
+    if None not in bbox or stats.get("datetime_min"):
+        result["extent"] = {
+            "spatial": {"bbox": [bbox] if None not in bbox else []},
+            "temporal": {
+                "interval": [[stats.get("datetime_min"), stats.get("datetime_max")]]
+            },
+        }
+    return result
+
+
+def _inserted_documents(
+    documents: List[Dict[str, Any]], error: BulkWriteError
+) -> List[Dict[str, Any]]:
+    """Get the documents an unordered `insert_many` inserted despite write errors."""
+    failed = {write_error["index"] for write_error in error.details["writeErrors"]}
+    return [document for i, document in enumerate(documents) if i not in failed]
+
+
+def _collection_only_ids(query: Dict[str, Any]) -> Optional[List[str]]:
+    """
+    Get the collections an items query is restricted to, if it has no other condition.
+
+    Args:
+        query (Dict[str, Any]): The items query.
+
+    Returns:
+        Optional[List[str]]: The ids of the collections, None if the query is not restricted
+        to collections only.
+    """
+    conditions = list(query.get("$and", []))
+    conditions += [{key: value} for key, value in query.items() if key != "$and"]
+
+    collection_ids: Optional[List[str]] = None
+    for condition in conditions:
+        if list(condition) != ["collection"]:
+            return None
+        values = condition["collection"]
+        if not isinstance(values, dict) or list(values) != ["$in"]:
+            return None
+        collection_ids = [
+            collection_id
+            for collection_id in dict.fromkeys(values["$in"])
+            if collection_ids is None or collection_id in collection_ids
+        ]
+    return collection_ids
+
+
+def _match_stage(search: "MongoSearchAdapter", query: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the first stage of an aggregation over the items matched by a search.
+
+    Near searches start with a $geoNear stage, which must come first and filters the
+    items with the query.
+
+    Args:
+        search (MongoSearchAdapter): The search.
+        query (Dict[str, Any]): The query matching the items of the search.
+
+    Returns:
+        Dict[str, Any]: The $match or $geoNear stage.
+    """
+    if not search.near:
+        return {"$match": query}
+    return {
+        "$geoNear": {
+            **search.near,
+            "key": "geometry",
+            "distanceField": NEAR_DISTANCE_FIELD,
+            "spherical": True,
+            "query": query,
+        }
+    }
+
+
+def _item_datetime() -> Dict[str, Any]:
+    """Build the expression parsing the datetime of an item, null if it has none."""
+    return {
+        "$dateFromString": {
+            "dateString": "$properties.datetime",
+            "onError": None,
+            "onNull": None,
+        }
+    }
+
+
+def _item_centroid() -> Dict[str, Any]:
+    """
+    Build the projection of the centre of the bbox of an item.
+
+    The centre of the bbox stands in for the centroid of the footprint, it is stored
+    with every item and cheap to compute in the pipeline.
+
+    Returns:
+        Dict[str, Any]: A $project stage setting `lon` and `lat`.
+    """
+    # 3D bboxes hold the upper corner at index 3 and 4
+    is_3d = {"$eq": [{"$size": "$bbox"}, 6]}
+    upper_x = {"$arrayElemAt": ["$bbox", {"$cond": [is_3d, 3, 2]}]}
+    upper_y = {"$arrayElemAt": ["$bbox", {"$cond": [is_3d, 4, 3]}]}
+    return {
+        "$project": {
+            "lon": {
+                "$divide": [{"$add": [{"$arrayElemAt": ["$bbox", 0]}, upper_x]}, 2]
+            },
+            "lat": {
+                "$divide": [{"$add": [{"$arrayElemAt": ["$bbox", 1]}, upper_y]}, 2]
+            },
+        }
+    }
+
+
+def _grid_cell(value: Any, lower: float, upper: float, cells: int) -> Dict[str, Any]:
+    """Build the expression of the index of the cell of a regular grid holding a value."""
+    index = {
+        "$floor": {
+            "$multiply": [
+                {"$divide": [{"$subtract": [value, lower]}, upper - lower]},
+                cells,
+            ]
+        }
+    }
+    # Values on the upper edge belong to the last cell
+    return {"$max": [0, {"$min": [index, cells - 1]}]}
+
+
+def _geohash_bits(precision: int) -> Tuple[int, int]:
+    """Get the number of longitude and latitude bits of a geohash of a given precision."""
+    bits = 5 * precision
+    return (bits + 1) // 2, bits // 2
+
+
+def _geohash_grid_cell(precision: int) -> Dict[str, Any]:
+    """Build the expression of the geohash cell of the centroid of an item."""
+    lon_bits, lat_bits = _geohash_bits(precision)
+    return {
+        "x": _grid_cell("$lon", -180, 180, 2**lon_bits),
+        "y": _grid_cell("$lat", -90, 90, 2**lat_bits),
+    }
+
+
+def _geohash(x: int, y: int, precision: int) -> str:
+    """
+    Encode the geohash of a cell of the geohash grid.
+
+    Args:
+        x (int): The index of the cell along the longitude axis.
+        y (int): The index of the cell along the latitude axis.
+        precision (int): The number of characters of the geohash.
+
+    Returns:
+        str: The geohash of the cell.
+    """
+    lon_bits, lat_bits = _geohash_bits(precision)
+    bits = 0
+    # Geohashes interleave the bits of the cell indices, starting with longitude
+    for i in range(5 * precision):
+        if i % 2 == 0:
+            lon_bits -= 1
+            bit = (x >> lon_bits) & 1
+        else:
+            lat_bits -= 1
+            bit = (y >> lat_bits) & 1
+        bits = (bits << 1) | bit
+    return "".join(
+        _GEOHASH_BASE32[(bits >> 5 * (precision - 1 - i)) & 31]
+        for i in range(precision)
+    )
+
+
+def _geotile_grid_cell(zoom: int) -> Dict[str, Any]:
+    """Build the expression of the Web Mercator tile of the centroid of an item."""
+    tiles = 2**zoom
+    lat = {
+        "$degreesToRadians": {
+            "$max": [
+                -_MAX_MERCATOR_LATITUDE,
+                {"$min": ["$lat", _MAX_MERCATOR_LATITUDE]},
+            ]
+        }
+    }
+    # y = (1 - ln(tan(lat) + sec(lat)) / pi) / 2, flipped so that tiles count from the north
+    mercator_y = {
+        "$divide": [
+            {"$ln": {"$add": [{"$tan": lat}, {"$divide": [1, {"$cos": lat}]}]}},
+            math.pi,
+        ]
+    }
+    return {
+        "x": _grid_cell("$lon", -180, 180, tiles),
+        "y": _grid_cell({"$multiply": [mercator_y, -1]}, -1, 1, tiles),
+    }
+
+
+def _range_key(lower: Optional[float], upper: Optional[float]) -> str:
+    """Format the key of a numeric range bucket, using * for open bounds."""
+    return "-".join(
+        "*" if bound is None else str(float(bound)) for bound in (lower, upper)
+    )
+
+
+def _term_buckets(
+    key: Any, limit: int = AGGREGATION_BUCKET_LIMIT
+) -> List[Dict[str, Any]]:
+    """Build the pipeline counting the documents per value of an expression."""
+    return [
+        {"$group": {"_id": key, "doc_count": {"$sum": 1}}},
+        {"$match": {"_id": {"$ne": None}}},
+        {"$sort": {"doc_count": -1, "_id": 1}},
+        {"$limit": limit},
+    ]
+
+
+def _range_buckets(field: str, ranges: NumericRanges) -> List[Dict[str, Any]]:
+    """Build the pipeline counting the documents per numeric range of a field."""
+    boundaries = [
+        float("-inf") if lower is None else float(lower) for lower, _ in ranges
+    ]
+    upper = ranges[-1][1]
+    boundaries.append(float("inf") if upper is None else float(upper))
+    return [
+        {
+            "$bucket": {
+                "groupBy": f"${field}",
+                "boundaries": boundaries,
+                # Values out of the ranges, or not numbers, are not counted
+                "default": "other",
+                "output": {"doc_count": {"$sum": 1}},
+            }
+        }
+    ]
+
+
+def _range_counts(
+    rows: List[Dict[str, Any]], ranges: NumericRanges
+) -> List[Dict[str, Any]]:
+    """Format the counts of a range bucket pipeline, including the empty ranges."""
+    counts = {row["_id"]: row["doc_count"] for row in rows}
+    return [
+        {
+            "key": _range_key(lower, upper),
+            "from": None if lower is None else float(lower),
+            "to": None if upper is None else float(upper),
+            "doc_count": counts.get(
+                float("-inf") if lower is None else float(lower), 0
+            ),
+        }
+        for lower, upper in ranges
+    ]
+
+
+def _facet_counts(facets: List[str], result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Shape the rows of the facets of a $facet aggregation like Aggregation frequencies.
+
+    Args:
+        facets (List[str]): The names of the counted properties.
+        result (Dict[str, Any]): The result of the aggregation, facets missing from it
+            have no matched items.
+
+    Returns:
+        List[Dict[str, Any]]: The frequency distributions of the facets.
+    """
+
+    def _count(facet: str) -> int:
+        rows = result.get(facet, [])
+        return rows[0]["value"] if rows else 0
+
+    facet_counts = []
+    for i, name in enumerate(facets):
+        path = _property_path(name)
+        if path in RANGE_FACET_FIELDS:
+            buckets = _range_counts(
+                result.get(f"facet{i}", []), RANGE_FACET_FIELDS[path]
+            )
+            overflow = 0
+        else:
+            buckets = [
+                {"key": row["_id"], "doc_count": row["doc_count"]}
+                for row in result.get(f"facet{i}", [])
+            ]
+            overflow = _count(f"facet{i}_total") - sum(
+                bucket["doc_count"] for bucket in buckets
+            )
+        facet_counts.append(
+            {
+                "name": name,
+                "data_type": "frequency_distribution",
+                "buckets": [
+                    {
+                        "key": bucket["key"],
+                        "data_type": "string"
+                        if isinstance(bucket["key"], str)
+                        and path not in RANGE_FACET_FIELDS
+                        else "numeric",
+                        "frequency": bucket["doc_count"],
+                        **{
+                            bound: bucket[bound]
+                            for bound in ("from", "to")
+                            if bucket.get(bound) is not None
+                        },
+                    }
+                    for bucket in buckets
+                ],
+                "overflow": overflow,
+            }
+        )
+
+    return facet_counts
+
+
+def _search_key(
+    search: "MongoSearchAdapter",
+    limit: int,
+    token: Optional[str],
+    sort: Any,
+    collection_ids: Optional[List[str]],
+) -> str:
+    """Normalize a search, identical searches have the same key."""
+    return json.dumps(
+        [
+            search.filters,
+            search.cql2_filters,
+            search.collection_ids,
+            search.text_search,
+            search.facets,
+            search.extent_filters,
+            search.near,
+            limit,
+            token,
+            sort,
+            collection_ids,
+        ],
+        sort_keys=True,
+        default=str,
+    )
 
 
 class Geometry(Protocol):  # noqa
@@ -101,9 +1253,21 @@ class MongoSearchAdapter:
         filters (list): A list of filter conditions to be applied to the MongoDB query.
         sort (list): A list of tuples specifying field names and their corresponding sort directions
                      for MongoDB sorting.
+        collection_ids (list): The collection ids the search is restricted to, if any.
+        cql2_filters (list): CQL2 filters waiting to be translated once the queryables of the
+                             searched collections are known.
+        text_search (bool): Whether the search has a free-text filter, the items are then
+                            sorted by relevance unless another sort is requested.
+        facets (list): The properties to count the matched items of, per value or range.
+        facet_counts (list): The counts of the facets, set once the search is executed.
+        extent_filters (list): Conditions on the derived extent of the collections, a
+                               collection not matching them cannot hold matching items.
+        near (dict): The point the items are sorted by distance to, and the maximum
+                     distance, if any.
 
     Methods:
         add_filter(filter_condition): Adds a new filter condition to the filters list.
+        add_extent_filter(extent_condition): Adds a new condition to the extent filters list.
         set_sort(sort_conditions): Sets the sorting criteria based on a dictionary of field names
                                    and sort directions.
     """
@@ -117,6 +1281,13 @@ class MongoSearchAdapter:
         are retrieved first.
         """
         self.filters = []
+        self.collection_ids: Optional[List[str]] = None
+        self.cql2_filters: List[Dict[str, Any]] = []
+        self.text_search = False
+        self.facets: List[str] = []
+        self.facet_counts: Optional[List[Dict[str, Any]]] = None
+        self.extent_filters: List[Dict[str, Any]] = []
+        self.near: Optional[Dict[str, Any]] = None
         # self.sort = [("properties.datetime", -1), ("id", -1), ("collection", -1)]
 
     def add_filter(self, filter_condition):
@@ -131,13 +1302,31 @@ class MongoSearchAdapter:
         """
         self.filters.append(filter_condition)
 
+    def add_extent_filter(self, extent_condition):
+        """
+        Add a condition on the derived extent of the searched collections.
+
+        Collections missing the derived extent fields always match, their items are searched.
+
+        Args:
+            extent_condition (dict): A MongoDB condition on the fields of `EXTENT_FIELD`.
+        """
+        self.extent_filters.append(extent_condition)
+
 
 @attr.s
 class DatabaseLogic:
     """Database logic."""
 
-    client = AsyncSearchSettings().create_client
-    sync_client = SyncSearchSettings().create_client
+    @property
+    def client(self) -> AsyncIOMotorClient:
+        """Get the asynchronous client, shared by the process, see `MongoClients`."""
+        return mongo_clients.async_client
+
+    @property
+    def sync_client(self) -> MongoClient:
+        """Get the synchronous client, shared by the process, see `MongoClients`."""
+        return mongo_clients.sync_client
 
     item_serializer: Type[serializers.ItemSerializer] = attr.ib(
         default=serializers.ItemSerializer
@@ -148,78 +1337,441 @@ class DatabaseLogic:
 
     extensions: List[str] = attr.ib(default=attr.Factory(list))
 
+    queryables_cache: Dict[str, Tuple[float, Dict[str, Dict[str, Any]]]] = attr.ib(
+        default=attr.Factory(dict)
+    )
+
+    # Collections read in the last `COLLECTION_CACHE_TTL` seconds
+    collection_cache: Dict[str, Tuple[float, Dict[str, Any]]] = attr.ib(
+        default=attr.Factory(dict)
+    )
+
+    # Incremented by invalidations, reads started before one are not cached
+    cache_generation: int = attr.ib(default=0, init=False)
+
+    # Identical concurrent reads share one round trip, see `SINGLE_FLIGHT`
+    single_flight: SingleFlight = attr.ib(default=attr.Factory(SingleFlight))
+
+    # Concurrent item reads are merged into one query, see `ITEM_BATCHING`
+    item_loader: BatchLoader = attr.ib(init=False)
+
+    @item_loader.default
+    def _item_loader(self) -> BatchLoader:
+        return BatchLoader(
+            lambda keys: run_in_own_session(lambda: self._load_items(keys))
+        )
+
+    # Concurrent item inserts are written together, see `GROUP_COMMIT`
+    item_writer: GroupCommitWriter = attr.ib(init=False)
+
+    @item_writer.default
+    def _item_writer(self) -> GroupCommitWriter:
+        return GroupCommitWriter(
+            self._insert_items, GROUP_COMMIT_WINDOW, GROUP_COMMIT_MAX_SIZE
+        )
+
+    def get_database(self, write_concern: Optional[WriteConcern] = None):
+        """
+        Get the database, for the writes of a class of operations.
+
+        Args:
+            write_concern (Optional[WriteConcern]): The write concern of the writes, that
+                of the connection string if None.
+
+        Returns:
+            The database, writing with the write concern.
+        """
+        return self.client.get_database(DATABASE, write_concern=write_concern)
+
+    def read_database(self, read_preference: Optional[_ServerMode] = None):
+        """
+        Get the database, for the reads of a class of operations.
+
+        The reads should be made in the session of the request, see `request_session`,
+        which follows the writes the request depends on and is killed with it.
+
+        Args:
+            read_preference (Optional[_ServerMode]): The read preference of the reads,
+                that of the connection string if None.
+
+        Returns:
+            The database, reading with the read preference.
+        """
+        return self.client.get_database(DATABASE, read_preference=read_preference)
+
     """CORE LOGIC"""
 
     async def get_all_collections(
-        self, token: Optional[str], limit: int, request: Request
+        self,
+        token: Optional[str],
+        limit: int,
+        request: Request,
+        q: Optional[List[str]] = None,
+        bbox: Optional[List[NumType]] = None,
+        datetime_search: Optional[Dict[str, Optional[str]]] = None,
+        cql2_filter: Optional[Dict[str, Any]] = None,
+        sort: Optional[List[Tuple[str, int]]] = None,
     ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
         """
         Retrieve a list of all collections from the MongoDB database, supporting pagination.
 
+        The collections can be searched by their extent, using the geometry and dates derived
+        from it when they are written, see `collection_extent`, and by their fields.
+
         Args:
-            token (Optional[str]): The pagination token, which is the ID of the last collection seen.
+            token (Optional[str]): The pagination token, which is the ID of the last collection seen,
+                or the number of collections seen when they are not sorted by ID.
             limit (int): The maximum number of collections to return.
             request (Request): The request object, used to construct links.
+            q (Optional[List[str]]): Free-text terms, only the collections whose title,
+                description or keywords contain any of them are returned, most relevant first.
+            bbox (Optional[List[NumType]]): Only the collections whose spatial extent intersects
+                the bounding box are returned.
+            datetime_search (Optional[Dict[str, Optional[str]]]): The `gte` and `lte` bounds of
+                the interval the temporal extent of the returned collections must overlap.
+            cql2_filter (Optional[Dict[str, Any]]): A CQL2 JSON filter on the fields of the collections.
+            sort (Optional[List[Tuple[str, int]]]): The fields and directions to sort the
+                collections by. Defaults to the relevance of a free-text search, then the ID.
 
         Returns:
             Tuple[List[Dict[str, Any]], Optional[str]]: A tuple containing a list of collections
             and an optional next token for pagination.
+
+        Raises:
+            InvalidQueryParameter: If the token, the bounding box, the filter or the sort is not valid.
         """
-        db = self.client[DATABASE]
+        db = self.read_database(COLLECTIONS_READ_PREFERENCE)
         collections_collection = db[COLLECTIONS_INDEX]
 
-        query: Dict[str, Any] = {}
-        if token:
-            last_seen_id = decode_token(token)
-            query = {"id": {"$gt": last_seen_id}}
+        filters: List[Dict[str, Any]] = []
+        if q:
+            filters.append({"$text": {"$search": _text_search(q)}})
+
+        if bbox:
+            geometry = _extent_geometry(bbox)
+            if geometry is None:
+                raise InvalidQueryParameter(f"Invalid bbox: {bbox}")
+            filters.append(
+                {
+                    f"{EXTENT_FIELD}.geometry": {
+                        "$geoIntersects": {"$geometry": geometry}
+                    }
+                }
+            )
 
-        cursor = collections_collection.find(query).sort("id", 1).limit(limit)
+        if datetime_search:
+            # The intervals overlap when each one starts before the other ends
+            if datetime_search.get("lte"):
+                end = _extent_datetime(datetime_search["lte"], _MAX_EXTENT_DATETIME)
+                filters.append({f"{EXTENT_FIELD}.start": {"$lte": end}})
+            if datetime_search.get("gte"):
+                start = _extent_datetime(datetime_search["gte"], _MIN_EXTENT_DATETIME)
+                filters.append({f"{EXTENT_FIELD}.end": {"$gte": start}})
+
+        if cql2_filter:
+            try:
+                filters.append(
+                    self.translate_cql2_to_mongo(cql2_filter, collections=True)
+                )
+            except ValueError as e:
+                raise InvalidQueryParameter(f"Error with cql2_json filter: {e}")
+
+        sort_criteria: List[Tuple[str, Any]] = []
+        for field, direction in sort or []:
+            if not field or "$" in field:
+                raise InvalidQueryParameter(f"Invalid sort field: {field!r}")
+            sort_criteria.append((field, direction))
+        if not sort_criteria and q:
+            sort_criteria.append(("score", TEXT_SCORE))
+        if not any(field == "id" for field, _ in sort_criteria):
+            sort_criteria.append(("id", 1))
+
+        # Collections sorted by id are paged by id, others by offset
+        paged_by_id = sort_criteria == [("id", 1)]
+        skip_count = 0
+        if token and paged_by_id:
+            filters.append({"id": {"$gt": decode_token(token)}})
+        elif token:
+            try:
+                skip_count = int(decode_token(token))
+            except ValueError:
+                raise InvalidQueryParameter(f"Invalid token: {token}")
+
+        query = {"$and": filters} if filters else {}
+        cursor = (
+            collections_collection.find(
+                query, {EXTENT_FIELD: False}, session=await request_session()
+            )
+            .sort(sort_criteria)
+            .skip(skip_count)
+            .limit(limit)
+        )
         collections = await cursor.to_list(length=limit)
 
         next_token = None
         if len(collections) == limit:
-            # Assumes collections are sorted by 'id' in ascending order.
-            next_token = encode_token(collections[-1]["id"])
+            if paged_by_id:
+                next_token = encode_token(collections[-1]["id"])
+            else:
+                next_token = encode_token(str(skip_count + limit))
             logger.debug(f"Next token (for next page): {next_token}")
 
+        stats = await self.get_collection_stats([c["id"] for c in collections])
         serialized_collections = [
             self.collection_serializer.db_to_stac(
-                collection=serialize_doc(collection),
+                collection=serialize_doc(
+                    {**collection, "stats": stats[collection["id"]]}
+                ),
                 request=request,
                 extensions=self.extensions,
             )
             for collection in collections
         ]
 
-        return serialized_collections, next_token
+        return serialized_collections, next_token
+
+    async def get_one_item(self, collection_id: str, item_id: str) -> Dict:
+        """Retrieve a single item from the database.
+
+        Args:
+            collection_id (str): The id of the Collection that the Item belongs to.
+            item_id (str): The id of the Item.
+
+        Returns:
+            item (Dict): A dictionary containing the source data for the Item.
+
+        Raises:
+            NotFoundError: If the specified Item does not exist in the Collection.
+        """
+        # Reads in a causal session cannot share the reads of other requests
+        if SINGLE_FLIGHT and not reads_after_writes():
+            return await within_budget(
+                self.single_flight.do(
+                    "get_one_item",
+                    (collection_id, item_id),
+                    lambda: run_in_own_session(
+                        lambda: self._get_one_item(collection_id, item_id)
+                    ),
+                )
+            )
+        return await self._get_one_item(collection_id, item_id)
+
+    async def _get_one_item(self, collection_id: str, item_id: str) -> Dict:
+        """Retrieve a single item from the database, see `get_one_item`."""
+        if ITEM_BATCHING and not reads_after_writes():
+            item = await within_budget(self.item_loader.load((collection_id, item_id)))
+        else:
+            db = self.read_database(ITEM_READ_PREFERENCE)
+            collection = db[ITEMS_INDEX]
+
+            # Adjusted to include collection_id in the query to fetch items within a specific collection
+            item = await collection.find_one(
+                {"id": item_id, "collection": collection_id},
+                session=await request_session(),
+            )
+        if not item:
+            # If the item is not found, raise NotFoundError
+            raise NotFoundError(
+                f"Item {item_id} in collection {collection_id} does not exist."
+            )
+
+        # Serialize the MongoDB document to make it JSON serializable
+        serialized_item = serialize_doc(item)
+        return serialized_item
+
+    async def _load_items(
+        self, keys: List[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        Load a batch of items with one query on the (collection, id) index.
+
+        Args:
+            keys (List[Tuple[str, str]]): The collection and item ids of the items.
+
+        Returns:
+            Dict[Tuple[str, str], Dict[str, Any]]: The items found, per collection and item id.
+        """
+        item_ids: Dict[str, List[str]] = {}
+        for collection_id, item_id in keys:
+            item_ids.setdefault(collection_id, []).append(item_id)
+
+        query = {
+            "$or": [
+                {"collection": collection_id, "id": {"$in": ids}}
+                for collection_id, ids in item_ids.items()
+            ]
+        }
+        items = (
+            await self.read_database(ITEM_READ_PREFERENCE)[ITEMS_INDEX]
+            .find(query, session=await request_session())
+            .to_list(length=len(keys))
+        )
+        return {(item["collection"], item["id"]): item for item in items}
+
+    async def get_items(
+        self, collection_id: str, item_ids: List[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve the items of a collection by id with one query.
+
+        Args:
+            collection_id (str): The id of the collection of the items.
+            item_ids (List[str]): The ids of the items.
+
+        Returns:
+            List[Dict[str, Any]]: The items found, in the order of `item_ids`.
+        """
+        items = await self._load_items(
+            [(collection_id, item_id) for item_id in dict.fromkeys(item_ids)]
+        )
+        return [
+            serialize_doc(items[(collection_id, item_id)])
+            for item_id in dict.fromkeys(item_ids)
+            if (collection_id, item_id) in items
+        ]
+
+    async def diff_items(
+        self, collection_id: str, items: List[Dict[str, Optional[str]]]
+    ) -> Dict[str, List[str]]:
+        """
+        Compare a list of items with the items stored in a collection.
+
+        The stored ids, checksums and update times are read by one query covered by the
+        (collection, id, checksum, updated) index. An item given with a `checksum` is
+        current if the stored checksum is equal, see `item_checksum`. An item given with
+        an `updated` time is current if it was stored after that time. An item given with
+        neither is current if it exists.
+
+        Args:
+            collection_id (str): The id of the collection of the items.
+            items (List[Dict[str, Optional[str]]]): The `id` of the items, with their
+                `checksum` or `updated` time.
 
-    async def get_one_item(self, collection_id: str, item_id: str) -> Dict:
-        """Retrieve a single item from the database.
+        Returns:
+            Dict[str, List[str]]: The ids of the `missing`, `stale` and `current` items,
+                in the order of `items`.
+
+        Raises:
+            InvalidQueryParameter: If an `updated` time is not a valid datetime.
+        """
+        ids = list(dict.fromkeys(item["id"] for item in items))
+        cursor = self.read_database(SEARCH_READ_PREFERENCE)[ITEMS_INDEX].find(
+            {"collection": collection_id, "id": {"$in": ids}},
+            {
+                "_id": False,
+                "id": True,
+                CHECKSUM_FIELD: True,
+                "properties.updated": True,
+            },
+            session=await request_session(),
+        )
+        stored = {doc["id"]: doc for doc in await cursor.to_list(length=len(ids))}
+
+        diff: Dict[str, List[str]] = {"missing": [], "stale": [], "current": []}
+        for item in items:
+            doc = stored.get(item["id"])
+            if doc is None:
+                diff["missing"].append(item["id"])
+                continue
+
+            current = True
+            if item.get("checksum"):
+                current = doc.get(CHECKSUM_FIELD) == item["checksum"]
+            elif item.get("updated"):
+                try:
+                    parser.isoparse(item["updated"])
+                except ValueError as e:
+                    raise InvalidQueryParameter(
+                        f"Invalid updated time of item {item['id']}: {e}"
+                    )
+                stored_updated = doc.get("properties", {}).get("updated")
+                current = _extent_datetime(
+                    stored_updated, _MIN_EXTENT_DATETIME
+                ) >= _extent_datetime(item["updated"], _MAX_EXTENT_DATETIME)
+            diff["current" if current else "stale"].append(item["id"])
+
+        return diff
+
+    async def get_changes(
+        self,
+        collection_id: str,
+        since: Optional[str],
+        limit: int,
+        token: Optional[str],
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Page through the item writes and deletes of a collection, in sequence order.
+
+        The written items and the tombstones of the deleted items are read from the
+        (collection, sequence) indexes after the sequence number of the token. The changes
+        numbered in the last `CHANGES_SETTLE_SECONDS`, by the clock of the server, are
+        left for the next pages, so that a write numbered before another one but completed
+        after it is not skipped. A write must complete within that time of reserving its
+        number, see `next_sequence`.
 
         Args:
-            collection_id (str): The id of the Collection that the Item belongs to.
-            item_id (str): The id of the Item.
+            collection_id (str): The id of the collection.
+            since (Optional[str]): Only return the changes made at or after this time.
+            limit (int): The maximum number of changes to return.
+            token (Optional[str]): The token of the page, the sequence number of the last
+                change of the previous page.
 
         Returns:
-            item (Dict): A dictionary containing the source data for the Item.
+            Tuple[List[Dict[str, Any]], Optional[str]]: The item documents and tombstones,
+                tombstones holding a `deleted` flag, and the token of the next page. The
+                token is returned even once the changes are exhausted, it then resumes
+                after the last change returned so far.
 
         Raises:
-            NotFoundError: If the specified Item does not exist in the Collection.
+            InvalidQueryParameter: If the time or the token is not valid.
         """
+        try:
+            after = int(decode_token(token)) if token else 0
+        except ValueError:
+            raise InvalidQueryParameter(f"Invalid token: {token}")
+
+        updated: Dict[str, datetime] = {}
+        if since:
+            try:
+                parser.isoparse(since)
+            except ValueError as e:
+                raise InvalidQueryParameter(f"Invalid since time: {e}")
+            updated["$gte"] = _extent_datetime(since, _MIN_EXTENT_DATETIME)
+
+        query: Dict[str, Any] = {
+            "collection": collection_id,
+            SEQUENCE_FIELD: {"$gt": after},
+            "$expr": {
+                "$lte": [
+                    f"${UPDATED_FIELD}",
+                    {"$subtract": ["$$NOW", int(CHANGES_SETTLE_SECONDS * 1000)]},
+                ]
+            },
+        }
+        if updated:
+            query[UPDATED_FIELD] = updated
         db = self.client[DATABASE]
-        collection = db[ITEMS_INDEX]
+        # A session runs one operation at a time
+        session = await request_session()
+        items, tombstones = [
+            await db[index]
+            .find(query, session=session)
+            .sort(SEQUENCE_FIELD, 1)
+            .limit(limit + 1)
+            .to_list(length=limit + 1)
+            for index in (ITEMS_INDEX, TOMBSTONES_INDEX)
+        ]
+        for tombstone in tombstones:
+            tombstone["deleted"] = True
 
-        # Adjusted to include collection_id in the query to fetch items within a specific collection
-        item = await collection.find_one({"id": item_id, "collection": collection_id})
-        if not item:
-            # If the item is not found, raise NotFoundError
-            raise NotFoundError(
-                f"Item {item_id} in collection {collection_id} does not exist."
-            )
+        changes = sorted(items + tombstones, key=lambda change: change[SEQUENCE_FIELD])
+        changes = changes[:limit]
+        # Clients resume from the last change, the next writes follow it
+        if changes:
+            after = changes[-1][SEQUENCE_FIELD]
+        next_token = encode_token(str(after))
 
-        # Serialize the MongoDB document to make it JSON serializable
-        serialized_item = serialize_doc(item)
-        return serialized_item
+        return [serialize_doc(change) for change in changes], next_token
 
     @staticmethod
     def make_search():
@@ -236,6 +1788,7 @@ class DatabaseLogic:
     def apply_collections_filter(search: MongoSearchAdapter, collection_ids: List[str]):
         """Database logic to search a list of STAC collection ids."""
         search.add_filter({"collection": {"$in": collection_ids}})
+        search.collection_ids = collection_ids
         return search
 
     @staticmethod
@@ -249,6 +1802,20 @@ class DatabaseLogic:
         Returns:
             Search: The filtered search object.
         """
+        start = datetime_search.get("eq") or datetime_search.get("gte")
+        end = datetime_search.get("eq") or datetime_search.get("lte")
+        # $not also matches the collections missing the derived dates
+        if start:
+            start_date = _extent_datetime(start, _MIN_EXTENT_DATETIME)
+            search.add_extent_filter(
+                {f"{EXTENT_FIELD}.end": {"$not": {"$lt": start_date}}}
+            )
+        if end:
+            end_date = _extent_datetime(end, _MAX_EXTENT_DATETIME)
+            search.add_extent_filter(
+                {f"{EXTENT_FIELD}.start": {"$not": {"$gt": end_date}}}
+            )
+
         if "eq" in datetime_search:
             search.add_filter(
                 {"properties.datetime": parse_datestring(datetime_search["eq"])}
@@ -297,6 +1864,7 @@ class DatabaseLogic:
                 }
             }
         )
+        search.add_extent_filter(_extent_intersects(geojson_polygon))
         return search
 
     @staticmethod
@@ -320,49 +1888,73 @@ class DatabaseLogic:
         search.add_filter(
             {"geometry": {"$geoIntersects": {"$geometry": geometry_dict}}}
         )
+        search.add_extent_filter(_extent_intersects(geometry_dict))
         return search
 
     @staticmethod
     def apply_stacql_filter(
-        search: MongoSearchAdapter, op: str, field: str, value: float
+        search: MongoSearchAdapter, op: str, field: str, value: Any
     ):
         """Filter search results based on a comparison between a field and a value.
 
         Args:
             search (Search): The search object to apply the filter to.
-            op (str): The comparison operator to use. Can be 'eq' (equal), 'gt' (greater than), 'gte' (greater than or equal),
-                'lt' (less than), or 'lte' (less than or equal).
+            op (str): The comparison operator to use. Can be 'eq' (equal), 'ne' or 'neq' (not equal),
+                'gt' (greater than), 'gte' (greater than or equal), 'lt' (less than), 'lte' (less than
+                or equal), 'in' (one of a list of values), 'startsWith', 'endsWith' or 'contains'.
             field (str): The field to perform the comparison on.
-            value (float): The value to compare the field against.
+            value (Any): The value to compare the field against.
 
         Returns:
             search (Search): The search object with the specified filter applied.
+
+        Raises:
+            InvalidQueryParameter: If the operation is not supported or 'in' is not given a list.
+
+        Notes:
+            'startsWith' is translated to a range on the prefix so that it can use an index on
+            the field. 'endsWith' and 'contains' require a regular expression scan.
         """
         # MongoDB comparison operators mapping
         op_mapping = {
             "eq": "$eq",
+            "ne": "$ne",
+            "neq": "$ne",
             "gt": "$gt",
             "gte": "$gte",
             "lt": "$lt",
             "lte": "$lte",
+            "in": "$in",
         }
 
         # Replace double underscores with dots for nested field queries
         field = field.replace("__", ".")
 
         # Construct the MongoDB filter
-        if op in op_mapping:
+        if op == "in" and not isinstance(value, list):
+            raise InvalidQueryParameter(f"Arg {value} is not a list")
+        elif op in op_mapping:
             mongo_op = op_mapping[op]
             filter_condition = {field: {mongo_op: value}}
+        elif op == "startsWith":
+            filter_condition = {field: _prefix_range(str(value))}
+        elif op == "endsWith":
+            filter_condition = {field: {"$regex": f"{re.escape(str(value))}$"}}
+        elif op == "contains":
+            filter_condition = {field: {"$regex": re.escape(str(value))}}
         else:
-            raise ValueError(f"Unsupported operation '{op}'")
+            raise InvalidQueryParameter(f"Unsupported operation '{op}'")
 
         # Add the constructed filter to the search adapter's filters
         search.add_filter(filter_condition)
         return search
 
     @staticmethod
-    def translate_cql2_to_mongo(cql2_filter: Dict[str, Any]) -> Dict[str, Any]:
+    def translate_cql2_to_mongo(
+        cql2_filter: Dict[str, Any],
+        queryables: Optional[Dict[str, Dict[str, Any]]] = None,
+        collections: bool = False,
+    ) -> Dict[str, Any]:
         """
         Translate a CQL2 filter dictionary to a MongoDB query.
 
@@ -370,8 +1962,16 @@ class DatabaseLogic:
         various comparison operators, logical operators, and a special handling for spatial
         intersections and the 'in' operator.
 
+        Literals are coerced to the type the queryables declare for the compared property,
+        so that predicates match the stored values and can use typed indexes. Literals of
+        undeclared properties fall back to converting numeric strings.
+
         Args:
             cql2_filter: A dictionary representing the CQL2 filter.
+            queryables: A mapping of property paths to JSON schemas, if known.
+            collections: Whether the filter applies to collections rather than items. The
+                properties are then fields of the collection documents, and the geometry
+                is the derived geometry of their spatial extent.
 
         Returns:
             A MongoDB query as a dictionary.
@@ -387,117 +1987,687 @@ class DatabaseLogic:
             "in": "$in",
         }
 
+        property_paths = _collection_property_path if collections else _property_path
+
         if cql2_filter["op"] in ["and", "or"]:
             mongo_op = f"${cql2_filter['op']}"
             return {
                 mongo_op: [
-                    DatabaseLogic.translate_cql2_to_mongo(arg)
+                    DatabaseLogic.translate_cql2_to_mongo(arg, queryables, collections)
                     for arg in cql2_filter["args"]
                 ]
             }
 
         elif cql2_filter["op"] == "not":
             translated_condition = DatabaseLogic.translate_cql2_to_mongo(
-                cql2_filter["args"][0]
+                cql2_filter["args"][0], queryables, collections
             )
             return {"$nor": [translated_condition]}
 
         elif cql2_filter["op"] == "s_intersects":
             geometry = cql2_filter["args"][1]
-            return {"geometry": {"$geoIntersects": {"$geometry": geometry}}}
+            geometry_path = f"{EXTENT_FIELD}.geometry" if collections else "geometry"
+            return {geometry_path: {"$geoIntersects": {"$geometry": geometry}}}
+
+        elif cql2_filter["op"] == "between":
+            property_path = property_paths(cql2_filter["args"][0]["property"])
+            schema = (queryables or {}).get(property_path)
+
+            lower_bound = _coerce_literal(cql2_filter["args"][1], schema)
+            upper_bound = _coerce_literal(cql2_filter["args"][2], schema)
+            return {property_path: {"$gte": lower_bound, "$lte": upper_bound}}
+
+        else:
+            property_path = property_paths(cql2_filter["args"][0]["property"])
+
+            value = cql2_filter["args"][1]
+            if cql2_filter["op"] != "like":
+                value = _coerce_literal(value, (queryables or {}).get(property_path))
+            mongo_op = op_mapping.get(cql2_filter["op"])
+
+            if mongo_op is None:
+                raise ValueError(
+                    f"Unsupported operation '{cql2_filter['op']}' in CQL2 filter."
+                )
+
+            if mongo_op == "$regex":
+                # Replace SQL LIKE wildcards with regex equivalents, handling escaped characters
+                regex_pattern = re.sub(
+                    r"(?<!\\)%", ".*", value
+                )  # Replace '%' with '.*', ignoring escaped '\%'
+                regex_pattern = re.sub(
+                    r"(?<!\\)_", ".", regex_pattern
+                )  # Replace '_' with '.', ignoring escaped '\_'
+
+                # Handle escaped wildcards by reverting them to their literal form
+                regex_pattern = regex_pattern.replace("\\%", "%").replace("\\_", "_")
+
+                # Ensure backslashes are properly escaped for MongoDB regex
+                regex_pattern = regex_pattern.replace("\\", "\\\\")
+
+                return {property_path: {"$regex": regex_pattern, "$options": "i"}}
+
+            elif mongo_op == "$in":
+                if not isinstance(value, list):
+                    raise ValueError(f"Arg {value} is not a list")
+                return {property_path: {mongo_op: value}}
+            else:
+                return {property_path: {mongo_op: value}}
+
+    @staticmethod
+    def apply_cql2_filter(
+        search_adapter: "MongoSearchAdapter", _filter: Optional[Dict[str, Any]]
+    ):
+        """
+        Apply a CQL2 JSON filter to the MongoDB search adapter.
+
+        This method translates a CQL2 JSON filter into MongoDB's query syntax and adds it to the adapter's filters.
+
+        The filter is only validated here. It is translated by `resolve_cql2_filters` once the
+        queryables of the searched collections are loaded, so that literals get their declared types.
+
+        Args:
+            search_adapter (MongoSearchAdapter): The MongoDB search adapter to which the filter will be applied.
+            _filter (Optional[Dict[str, Any]]): The CQL2 filter as a dictionary. If None, no action is taken.
+
+        Returns:
+            MongoSearchAdapter: The search adapter with the CQL2 filter applied.
+        """
+        if _filter is not None:
+            # Raises for unsupported operations while the core client can still map it to a 400
+            DatabaseLogic.translate_cql2_to_mongo(_filter)
+            search_adapter.cql2_filters.append(_filter)
+
+        return search_adapter
+
+    async def get_collection_queryables(
+        self, collection_id: str
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the queryable types of a collection, using the cached schema while it is fresh.
+
+        The schema combines the default queryables, the types derived from the collection
+        summaries and the types sampled from the items of the collection, if any.
+
+        Args:
+            collection_id (str): The id of the collection.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: A mapping of property paths to JSON schemas.
+        """
+        now = time.monotonic()
+        cached = self.queryables_cache.get(collection_id)
+        if cached and now - cached[0] < QUERYABLES_CACHE_TTL:
+            return cached[1]
+
+        db = self.client[DATABASE]
+        collection, sampled = await asyncio.gather(
+            db[COLLECTIONS_INDEX].find_one({"id": collection_id}, {"summaries": 1}),
+            db[QUERYABLES_INDEX].find_one({"_id": collection_id}),
+        )
+
+        queryables = dict(DEFAULT_QUERYABLE_TYPES)
+        if collection:
+            queryables.update(queryables_from_summaries(collection.get("summaries")))
+        if sampled:
+            # The sampled types are those of the stored values, so they take precedence
+            queryables.update(
+                {
+                    f"properties.{name}": {
+                        k: v for k, v in schema.items() if k in ("type", "format")
+                    }
+                    for name, schema in sampled.get("properties", {}).items()
+                    if "type" in schema
+                }
+            )
+
+        self.queryables_cache[collection_id] = (now, queryables)
+        return queryables
+
+    async def get_indexed_fields(self) -> List[str]:
+        """
+        Get the fields of the items collection that lead an index.
+
+        Only the first key of a compound index is returned, as it is the only one that
+        can be used without filtering on the other keys.
+
+        Returns:
+            List[str]: The paths of the indexed fields.
+        """
+        db = self.client[DATABASE]
+        indexes = await db[ITEMS_INDEX].index_information()
+        return [index["key"][0][0] for index in indexes.values()]
+
+    async def sample_queryables(
+        self, collection_id: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Infer the schemas of item properties from a random sample of items and cache them.
+
+        The schemas are stored in the queryables collection, where item writes keep them up
+        to date. Properties leading an index are flagged with `x-indexed`.
+
+        Args:
+            collection_id (Optional[str]): The collection to sample. If None, items of all
+                collections are sampled.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: A mapping of property names to JSON schemas.
+        """
+        db = self.client[DATABASE]
+
+        pipeline: List[Dict[str, Any]] = []
+        if collection_id is not None:
+            pipeline.append({"$match": {"collection": collection_id}})
+        pipeline.extend(
+            [
+                {"$sample": {"size": QUERYABLES_SAMPLE_SIZE}},
+                {"$project": {"fields": {"$objectToArray": "$properties"}}},
+                {"$unwind": "$fields"},
+                {
+                    "$group": {
+                        "_id": "$fields.k",
+                        "types": {"$addToSet": {"$type": "$fields.v"}},
+                        "example": {"$first": "$fields.v"},
+                    }
+                },
+            ]
+        )
+
+        results, indexed_fields = await asyncio.gather(
+            db[ITEMS_INDEX].aggregate(pipeline).to_list(length=None),
+            self.get_indexed_fields(),
+        )
+
+        properties = {}
+        for result in results:
+            schema = _schema_from_types(
+                [_BSON_TO_JSON_TYPE.get(t) for t in result["types"]], result["example"]
+            )
+            if f"properties.{result['_id']}" in indexed_fields:
+                schema["x-indexed"] = True
+            properties[result["_id"]] = schema
+
+        try:
+            await db[QUERYABLES_INDEX].replace_one(
+                {"_id": collection_id},
+                {"_id": collection_id, "properties": properties},
+                upsert=True,
+            )
+        except PyMongoError as e:
+            # Read-only deployments still serve the sampled queryables, uncached
+            logger.warning(f"Failed to cache queryables of {collection_id}: {e}")
+
+        self.queryables_cache.pop(collection_id, None)
+        return properties
+
+    async def get_sampled_queryables(
+        self, collection_id: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the cached schemas of item properties, sampling them on a cache miss.
+
+        Args:
+            collection_id (Optional[str]): The collection, or None for all collections.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: A mapping of property names to JSON schemas.
+        """
+        db = self.client[DATABASE]
+        cached = await db[QUERYABLES_INDEX].find_one({"_id": collection_id})
+        if cached is not None:
+            return cached["properties"]
+        return await self.sample_queryables(collection_id)
+
+    async def refresh_queryables(self) -> None:
+        """Sample the queryables of every collection, and of the whole catalog, again."""
+        db = self.client[DATABASE]
+        collection_ids = await db[COLLECTIONS_INDEX].distinct("id")
+        for collection_id in [CATALOG_QUERYABLES_ID, *collection_ids]:
+            await self.sample_queryables(collection_id)
+
+    @staticmethod
+    def _queryables_merge(
+        items: List[Item],
+    ) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """Build the filter and update pipeline adding item properties to cached queryables."""
+        properties = item_property_schemas(items)
+        if not properties:
+            return None
+
+        collection_ids = list({item["collection"] for item in items})
+        return (
+            {"_id": {"$in": [*collection_ids, CATALOG_QUERYABLES_ID]}},
+            [
+                {
+                    "$set": {
+                        "properties": {
+                            "$mergeObjects": [{"$literal": properties}, "$properties"]
+                        }
+                    }
+                }
+            ],
+        )
+
+    async def merge_item_queryables(self, items: List[Item]) -> None:
+        """
+        Add the properties of written items to the cached queryables.
+
+        Properties already known keep their schema, so that a single item cannot change the
+        type sampled from many. Queryables that were never sampled are left to be sampled
+        on their first request.
+
+        Args:
+            items (List[Item]): The written items.
+        """
+        merge = self._queryables_merge(items)
+        if merge is None:
+            return
+
+        db = self.client[DATABASE]
+        try:
+            await db[QUERYABLES_INDEX].update_many(*merge)
+        except PyMongoError as e:
+            logger.warning(f"Failed to update cached queryables: {e}")
+
+    @staticmethod
+    def _stats_updates(items: List[Item], replaced: bool = False) -> List[UpdateOne]:
+        """Build the updates adding written items to the statistics of their collections."""
+        updates: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for item in items:
+            update = updates.setdefault(
+                item["collection"],
+                {
+                    "$inc": {"count": 0, "version": 1},
+                    "$min": {},
+                    "$max": {},
+                    "$addToSet": {},
+                },
+            )
+            if not replaced:
+                update["$inc"]["count"] += 1
+
+            properties = item.get("properties") or {}
+            bbox = _item_bbox(item) or [None] * 4
+            for operator, bounds in (
+                ("$min", {"datetime_min": properties.get("datetime")}),
+                ("$max", {"datetime_max": properties.get("datetime")}),
+                ("$min", {"west": bbox[0], "south": bbox[1]}),
+                ("$max", {"east": bbox[2], "north": bbox[3]}),
+            ):
+                for field, value in bounds.items():
+                    if value is None:
+                        continue
+                    current = update[operator].get(field, value)
+                    pick = min if operator == "$min" else max
+                    update[operator][field] = pick(current, value)
+
+            for name in SUMMARY_PROPERTIES:
+                values = update["$addToSet"].setdefault(f"summaries.{name}", [])
+                for value in _summary_values(properties.get(name)):
+                    if value not in values:
+                        values.append(value)
+
+        operations = []
+        for collection_id, update in updates.items():
+            update["$addToSet"] = {
+                field: {"$each": values}
+                for field, values in update["$addToSet"].items()
+                if values
+            }
+            # The replaced values may be gone, the bounds are only narrowed by reconciling
+            if replaced:
+                update["$set"] = {"stale": True}
+            # The items written before the statistics existed are unknown until reconciled
+            update["$setOnInsert"] = {"counted": False}
+            if not replaced:
+                update["$setOnInsert"]["stale"] = True
+            operations.append(
+                UpdateOne(
+                    {"_id": collection_id},
+                    {operator: fields for operator, fields in update.items() if fields},
+                    upsert=True,
+                )
+            )
+        return operations
+
+    async def update_collection_stats(
+        self, items: List[Item], replaced: bool = False
+    ) -> None:
+        """
+        Add written items to the statistics of their collections.
+
+        The item counts are incremented and the bounds of the datetimes and bounding boxes
+        and the summaries are widened with `$min`, `$max` and `$addToSet`, so that concurrent
+        writes never read the statistics. Every update bumps the `version` of the
+        statistics, which guards `reconcile_collection_stats` against lost updates.
+
+        Args:
+            items (List[Item]): The written items, which must all have been inserted or
+                replaced for the counts to stay exact.
+            replaced (bool): Whether the items replaced existing ones. The counts are then
+                kept, and the bounds marked stale since the replaced values may be gone.
+        """
+        operations = self._stats_updates(items, replaced)
+        if not operations:
+            return
+
+        db = self.client[DATABASE]
+        try:
+            await db[COLLECTION_STATS_INDEX].bulk_write(operations, ordered=False)
+        except PyMongoError as e:
+            logger.warning(f"Failed to update collection statistics: {e}")
+
+        for collection_id in {item["collection"] for item in items}:
+            # The cached collections hold their statistics
+            self.invalidate_collection(collection_id, [self.collection_cache])
+
+    async def uncount_collection_stats(self, collection_ids: List[str]) -> None:
+        """
+        Stop answering the item counts of collections from their statistics.
+
+        Used after writes whose outcome is unknown, until the collections are reconciled.
+
+        Args:
+            collection_ids (List[str]): The ids of the collections.
+        """
+        db = self.client[DATABASE]
+        try:
+            await db[COLLECTION_STATS_INDEX].update_many(
+                {"_id": {"$in": collection_ids}},
+                {"$set": {"counted": False}, "$inc": {"version": 1}},
+            )
+        except PyMongoError as e:
+            logger.warning(f"Failed to update collection statistics: {e}")
+
+    async def get_collection_stats(
+        self, collection_ids: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the statistics of collections, shaped for the collection responses.
+
+        Args:
+            collection_ids (List[str]): The ids of the collections.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: The statistics of each collection, see `collection_stats`.
+        """
+        db = self.client[DATABASE]
+        stats = (
+            await db[COLLECTION_STATS_INDEX]
+            .find({"_id": {"$in": collection_ids}})
+            .to_list(length=None)
+        )
+        by_id = {doc["_id"]: doc for doc in stats}
+        return {
+            collection_id: collection_stats(by_id.get(collection_id))
+            for collection_id in collection_ids
+        }
+
+    async def reconcile_collection_stats(
+        self, collection_ids: Optional[List[str]] = None
+    ) -> None:
+        """
+        Compute the statistics of collections from their items again.
+
+        Incremental updates cannot narrow the statistics when items are deleted or
+        replaced, and miss the items written before the statistics existed. This fixes
+        such drift with one aggregation over the items of the collections.
+
+        The statistics are only replaced if their `version` did not change during the
+        aggregation, so that the increments of concurrent writes are never overwritten.
+        Statistics that changed are left to the next reconciliation.
+
+        Args:
+            collection_ids (Optional[List[str]]): The collections to reconcile, all if None.
+        """
+        db = self.client[DATABASE]
+        if collection_ids is None:
+            collection_ids = await db[COLLECTIONS_INDEX].distinct("id")
+
+        versions = {
+            doc["_id"]: doc.get("version")
+            async for doc in db[COLLECTION_STATS_INDEX].find(
+                {"_id": {"$in": collection_ids}}, {"version": 1}
+            )
+        }
+
+        bbox_size = {"$size": {"$ifNull": ["$bbox", []]}}
+        upper = {"$cond": [{"$eq": [bbox_size, 6]}, 3, 2]}
+        group: Dict[str, Any] = {
+            "_id": "$collection",
+            "count": {"$sum": 1},
+            "datetime_min": {"$min": "$properties.datetime"},
+            "datetime_max": {"$max": "$properties.datetime"},
+            "west": {"$min": {"$arrayElemAt": ["$bbox", 0]}},
+            "south": {"$min": {"$arrayElemAt": ["$bbox", 1]}},
+            "east": {"$max": {"$arrayElemAt": ["$bbox", upper]}},
+            "north": {"$max": {"$arrayElemAt": ["$bbox", {"$add": [upper, 1]}]}},
+        }
+        for i, name in enumerate(SUMMARY_PROPERTIES):
+            group[f"summary{i}"] = {"$addToSet": f"$properties.{name}"}
+
+        pipeline = [
+            {"$match": {"collection": {"$in": collection_ids}}},
+            {"$group": group},
+        ]
+        rows = await (
+            db[ITEMS_INDEX].aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+        )
+        by_id = {row["_id"]: row for row in rows}
+
+        for collection_id in collection_ids:
+            row = by_id.get(collection_id, {"count": 0})
+            summaries: Dict[str, List[Any]] = {}
+            for i, name in enumerate(SUMMARY_PROPERTIES):
+                values: List[Any] = []
+                for value in row.pop(f"summary{i}", []):
+                    values += [v for v in _summary_values(value) if v not in values]
+                if values:
+                    summaries[name] = values
+            row.pop("_id", None)
+
+            version = versions.get(collection_id)
+            try:
+                # Missing statistics, or ones without a version, match a null version
+                await db[COLLECTION_STATS_INDEX].replace_one(
+                    {"_id": collection_id, "version": version},
+                    {
+                        **{
+                            key: value
+                            for key, value in row.items()
+                            if value is not None
+                        },
+                        "summaries": summaries,
+                        "stale": False,
+                        "counted": True,
+                        "version": (version or 0) + 1,
+                    },
+                    upsert=True,
+                )
+            except DuplicateKeyError:
+                logger.info(
+                    f"Statistics of collection {collection_id} changed while reconciling"
+                )
+
+    async def count_items(self, query: Dict[str, Any]) -> int:
+        """
+        Count the items matching a query.
+
+        When the query only restricts the collections, the counts are read from the
+        statistics of the collections, provided they counted every item.
+
+        Args:
+            query (Dict[str, Any]): The items query.
+
+        Returns:
+            int: The number of matching items.
+        """
+        db = self.read_database(COUNT_READ_PREFERENCE)
+        session = await request_session()
+        collection_ids = _collection_only_ids(query)
+        if collection_ids:
+            stats = (
+                await db[COLLECTION_STATS_INDEX]
+                .find(
+                    {"_id": {"$in": collection_ids}, "counted": True},
+                    {"count": 1},
+                    session=session,
+                )
+                .to_list(length=None)
+            )
+            if len(stats) == len(collection_ids):
+                return sum(doc["count"] for doc in stats)
+
+        return await db[ITEMS_INDEX].count_documents(query, session=session)
+
+    async def get_queryable_types(
+        self, collection_ids: Optional[List[str]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Merge the queryable types of the searched collections.
+
+        Properties that collections declare with different types are left out, so their
+        literals are not coerced to a type that only matches some of the collections.
+
+        Args:
+            collection_ids (Optional[List[str]]): The searched collections. If empty, only the
+                default queryables are used.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: A mapping of property paths to JSON schemas.
+        """
+        if not collection_ids:
+            return DEFAULT_QUERYABLE_TYPES
+
+        schemas = await asyncio.gather(
+            *(self.get_collection_queryables(cid) for cid in set(collection_ids))
+        )
+
+        merged: Dict[str, Dict[str, Any]] = {}
+        conflicting = set()
+        for schema in schemas:
+            for path, property_schema in schema.items():
+                if merged.setdefault(path, property_schema) != property_schema:
+                    conflicting.add(path)
 
-        elif cql2_filter["op"] == "between":
-            property_name = cql2_filter["args"][0]["property"]
-
-            # Use the special mapping directly if available, or construct the path appropriately
-            if property_name in filter.queryables_mapping:
-                property_path = filter.queryables_mapping[property_name]
-            elif property_name not in [
-                "id",
-                "collection",
-            ] and not property_name.startswith("properties."):
-                property_path = f"properties.{property_name}"
-            else:
-                property_path = property_name
+        for path in conflicting:
+            del merged[path]
+        return merged
 
-            lower_bound = cql2_filter["args"][1]
-            upper_bound = cql2_filter["args"][2]
-            return {property_path: {"$gte": lower_bound, "$lte": upper_bound}}
+    async def resolve_cql2_filters(
+        self, search: MongoSearchAdapter, collection_ids: Optional[List[str]] = None
+    ) -> MongoSearchAdapter:
+        """
+        Translate the pending CQL2 filters of a search using the queryables of its collections.
 
-        else:
-            property_name = cql2_filter["args"][0]["property"]
-            # Check if the property name is in the special mapping
-            if property_name in filter.queryables_mapping:
-                property_path = filter.queryables_mapping[property_name]
-            elif property_name not in [
-                "id",
-                "collection",
-            ] and not property_name.startswith("properties."):
-                property_path = f"properties.{property_name}"
-            else:
-                property_path = property_name
+        Args:
+            search (MongoSearchAdapter): The search holding the pending CQL2 filters.
+            collection_ids (Optional[List[str]]): The searched collections. Defaults to the
+                collections filter of the search.
 
-            value = cql2_filter["args"][1]
-            # Attempt to convert numeric string to float or integer
-            try:
-                if "." in value:
-                    value = float(value)
-                else:
-                    value = int(value)
-            except (ValueError, TypeError):
-                pass  # Keep value as is if conversion is not possible
-            mongo_op = op_mapping.get(cql2_filter["op"])
+        Returns:
+            MongoSearchAdapter: The search with the translated filters added.
 
-            if mongo_op is None:
-                raise ValueError(
-                    f"Unsupported operation '{cql2_filter['op']}' in CQL2 filter."
-                )
+        Raises:
+            InvalidQueryParameter: If a literal cannot be coerced to the declared type.
+        """
+        if not search.cql2_filters:
+            return search
 
-            if mongo_op == "$regex":
-                # Replace SQL LIKE wildcards with regex equivalents, handling escaped characters
-                regex_pattern = re.sub(
-                    r"(?<!\\)%", ".*", value
-                )  # Replace '%' with '.*', ignoring escaped '\%'
-                regex_pattern = re.sub(
-                    r"(?<!\\)_", ".", regex_pattern
-                )  # Replace '_' with '.', ignoring escaped '\_'
+        queryables = await self.get_queryable_types(
+            collection_ids or search.collection_ids
+        )
+        try:
+            for cql2_filter in search.cql2_filters:
+                search.add_filter(self.translate_cql2_to_mongo(cql2_filter, queryables))
+        except ValueError as e:
+            raise InvalidQueryParameter(f"Error with cql2_json filter: {e}")
 
-                # Handle escaped wildcards by reverting them to their literal form
-                regex_pattern = regex_pattern.replace("\\%", "%").replace("\\_", "_")
+        search.cql2_filters = []
+        return search
 
-                # Ensure backslashes are properly escaped for MongoDB regex
-                regex_pattern = regex_pattern.replace("\\", "\\\\")
+    @staticmethod
+    def apply_free_text_filter(
+        search: MongoSearchAdapter, free_text_queries: Optional[List[str]]
+    ):
+        """
+        Filter the items whose title, description or keywords contain any of the terms.
 
-                return {property_path: {"$regex": regex_pattern, "$options": "i"}}
+        The filter uses the text index of the items, it matches the stemmed words of the
+        terms and ranks the items by relevance.
 
-            elif mongo_op == "$in":
-                if not isinstance(value, list):
-                    raise ValueError(f"Arg {value} is not a list")
-                return {property_path: {mongo_op: value}}
-            else:
-                return {property_path: {mongo_op: value}}
+        Args:
+            search (MongoSearchAdapter): The search to filter.
+            free_text_queries (Optional[List[str]]): The terms to search for.
+
+        Returns:
+            MongoSearchAdapter: The search with the free-text filter added.
+        """
+        if free_text_queries:
+            search.add_filter({"$text": {"$search": _text_search(free_text_queries)}})
+            search.text_search = True
+        return search
 
     @staticmethod
-    def apply_cql2_filter(
-        search_adapter: "MongoSearchAdapter", _filter: Optional[Dict[str, Any]]
+    def apply_near(
+        search: MongoSearchAdapter,
+        point: Optional[List[float]],
+        max_distance: Optional[float] = None,
     ):
         """
-        Apply a CQL2 JSON filter to the MongoDB search adapter.
+        Sort the items by the distance of their geometry to a point, closest first.
 
-        This method translates a CQL2 JSON filter into MongoDB's query syntax and adds it to the adapter's filters.
+        The search is then run by a $geoNear stage on the 2dsphere index of the geometries,
+        which sets the distance in meters of each item in its `near:distance` property.
 
         Args:
-            search_adapter (MongoSearchAdapter): The MongoDB search adapter to which the filter will be applied.
-            _filter (Optional[Dict[str, Any]]): The CQL2 filter as a dictionary. If None, no action is taken.
+            search (MongoSearchAdapter): The search to sort.
+            point (Optional[List[float]]): The longitude and latitude of the point.
+            max_distance (Optional[float]): The maximum distance to the point, in meters.
 
         Returns:
-            MongoSearchAdapter: The search adapter with the CQL2 filter applied.
+            MongoSearchAdapter: The search sorted by distance.
+
+        Raises:
+            InvalidQueryParameter: If the point or the maximum distance is not valid.
         """
-        if _filter is not None:
-            mongo_query = DatabaseLogic.translate_cql2_to_mongo(_filter)
-            search_adapter.add_filter(mongo_query)
+        if not point:
+            return search
+        if len(point) != 2 or not (-180 <= point[0] <= 180 and -90 <= point[1] <= 90):
+            raise InvalidQueryParameter(f"Invalid near point: {point}")
+        if max_distance is not None and max_distance < 0:
+            raise InvalidQueryParameter(f"Invalid max_distance: {max_distance}")
+
+        search.near = {"near": {"type": "Point", "coordinates": list(point)}}
+        if max_distance is not None:
+            search.near["maxDistance"] = max_distance
+        return search
 
-        return search_adapter
+    @staticmethod
+    def apply_facets(search: MongoSearchAdapter, facets: Optional[List[str]]):
+        """
+        Request the counts of the matched items per value of properties.
+
+        Numeric properties with known ranges, such as the cloud cover, are counted per
+        range instead.
+
+        Args:
+            search (MongoSearchAdapter): The search to count the facets of.
+            facets (Optional[List[str]]): The names of the properties to count.
+
+        Returns:
+            MongoSearchAdapter: The search with the facets requested.
+
+        Raises:
+            InvalidQueryParameter: If a name is not a valid property name.
+        """
+        for name in facets or []:
+            if not name or "$" in name:
+                raise InvalidQueryParameter(f"Invalid facet: {name!r}")
+            if name not in search.facets:
+                search.facets.append(name)
+        return search
 
     @staticmethod
     def populate_sort(sortby: List[SortExtension]) -> List[Tuple[str, int]]:
@@ -525,6 +2695,62 @@ class DatabaseLogic:
 
         return mongo_sort
 
+    async def prune_collections(
+        self, search: MongoSearchAdapter, collection_ids: Optional[List[str]]
+    ) -> Optional[List[str]]:
+        """
+        Narrow the searched collections to those whose extent can hold matching items.
+
+        The derived extent of the candidate collections is checked against the bbox,
+        intersects and datetime filters of the search with one indexed query on the
+        collections collection, so that the items query only spans the collections that
+        overlap the search.
+
+        Args:
+            search (MongoSearchAdapter): The search holding the extent filters.
+            collection_ids (Optional[List[str]]): The collection ids to search, all if empty.
+
+        Returns:
+            Optional[List[str]]: The ids of the overlapping collections, empty if none
+                overlaps, or None if the search is not restricted.
+        """
+        collection_ids = collection_ids or None
+        if not COLLECTION_PRUNING or not search or not search.extent_filters:
+            return collection_ids
+
+        filters = list(search.extent_filters)
+        if collection_ids:
+            filters.append({"id": {"$in": collection_ids}})
+
+        overlapping = await self.read_database(SEARCH_READ_PREFERENCE)[
+            COLLECTIONS_INDEX
+        ].distinct("id", {"$and": filters}, session=await request_session())
+        logger.debug(f"Collections overlapping the search: {overlapping}")
+        return overlapping
+
+    async def build_query(
+        self, search: MongoSearchAdapter, collection_ids: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        """
+        Build the MongoDB query of the filters of a search.
+
+        Args:
+            search (MongoSearchAdapter): The search holding the filters.
+            collection_ids (Optional[List[str]]): The collection ids to search.
+
+        Returns:
+            Dict[str, Any]: The query matching the items of the search.
+        """
+        if search:
+            await self.resolve_cql2_filters(search, collection_ids)
+
+        query = {"$and": search.filters} if search and search.filters else {}
+
+        if collection_ids:
+            query["collection"] = {"$in": collection_ids}
+
+        return query
+
     async def execute_search(
         self,
         search: MongoSearchAdapter,
@@ -555,15 +2781,58 @@ class DatabaseLogic:
         Raises:
             NotFoundError: If the collections specified in `collection_ids` do not exist.
         """
-        db = self.client[DATABASE]
-        collection = db[ITEMS_INDEX]
+        if not SINGLE_FLIGHT or not search or reads_after_writes():
+            return await self._execute_search(
+                search, limit, token, sort, collection_ids
+            )
 
-        query = {"$and": search.filters} if search and search.filters else {}
+        async def execute() -> Tuple[Any, ...]:
+            result = await self._execute_search(
+                search, limit, token, sort, collection_ids
+            )
+            return (*result, search.facet_counts)
 
-        if collection_ids:
-            query["collection"] = {"$in": collection_ids}
+        (items, maybe_count, next_token, search.facet_counts,) = await within_budget(
+            self.single_flight.do(
+                "execute_search",
+                _search_key(search, limit, token, sort, collection_ids),
+                lambda: run_in_own_session(execute),
+            )
+        )
+        return items, maybe_count, next_token
 
-        sort_criteria = sort if sort else [("id", 1)]  # Default sort
+    async def _execute_search(
+        self,
+        search: MongoSearchAdapter,
+        limit: int,
+        token: Optional[str],
+        sort: Optional[Dict[str, Dict[str, str]]],
+        collection_ids: Optional[List[str]],
+    ) -> Tuple[Iterable[Dict[str, Any]], Optional[int], Optional[str]]:
+        """Execute a search query, see `execute_search`."""
+        collection = self.read_database(SEARCH_READ_PREFERENCE)[ITEMS_INDEX]
+        session = await request_session()
+
+        collection_ids = await self.prune_collections(search, collection_ids)
+        if collection_ids == []:
+            # No collection overlaps the search, there is no item to query
+            if search and search.facets:
+                search.facet_counts = _facet_counts(search.facets, {})
+            return [], None if token else 0, None
+
+        query = await self.build_query(search, collection_ids)
+
+        sort_criteria: Any = sort if sort else [("id", 1)]  # Default sort
+        if search and search.text_search and not sort:
+            sort_criteria = [("score", TEXT_SCORE), ("id", 1)]
+        if search and search.near:
+            if search.text_search:
+                raise InvalidQueryParameter(
+                    "A near search cannot be combined with a free-text search"
+                )
+            if not sort:
+                # Items at the same distance, such as scenes of a tile, are paged by id
+                sort_criteria = [(NEAR_DISTANCE_FIELD, 1), ("id", 1)]
 
         try:
             if token:
@@ -572,13 +2841,44 @@ class DatabaseLogic:
             else:
                 skip_count = 0
 
-            cursor = (
-                collection.find(query)
-                .sort(sort_criteria)
-                .skip(skip_count)
-                .limit(limit + 1)
-            )
-            items = await cursor.to_list(length=limit + 1)
+            maybe_count = None
+            if search and search.facets:
+                items, maybe_count = await self.execute_faceted_search(
+                    search, query, sort_criteria, skip_count, limit + 1, not token
+                )
+            elif search and search.near:
+                pipeline = [
+                    _match_stage(search, query),
+                    {"$sort": dict(sort_criteria)},
+                    {"$skip": skip_count},
+                    {"$limit": limit + 1},
+                ]
+                cursor = collection.aggregate(
+                    pipeline, allowDiskUse=True, session=session
+                )
+                items = await cursor.to_list(length=limit + 1)
+
+                if not token:
+                    counts = (
+                        await self.read_database(COUNT_READ_PREFERENCE)[ITEMS_INDEX]
+                        .aggregate(
+                            [_match_stage(search, query), {"$count": "value"}],
+                            session=session,
+                        )
+                        .to_list(length=1)
+                    )
+                    maybe_count = counts[0]["value"] if counts else 0
+            else:
+                cursor = (
+                    collection.find(query, session=session)
+                    .sort(sort_criteria)
+                    .skip(skip_count)
+                    .limit(limit + 1)
+                )
+                items = await cursor.to_list(length=limit + 1)
+
+                if not token:
+                    maybe_count = await self.count_items(query)
 
             next_token = None
             if len(items) > limit:
@@ -586,15 +2886,249 @@ class DatabaseLogic:
                 next_token = base64.urlsafe_b64encode(str(next_skip).encode()).decode()
                 items = items[:-1]
 
-            maybe_count = None
-            if not token:
-                maybe_count = await collection.count_documents(query)
-
             return items, maybe_count, next_token
         except PyMongoError as e:
             logger.error(f"Database operation failed: {e}")
             raise
 
+    async def execute_faceted_search(
+        self,
+        search: MongoSearchAdapter,
+        query: Dict[str, Any],
+        sort: Any,
+        skip: int,
+        limit: int,
+        count: bool,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Fetch a page of items together with the facets of a search.
+
+        The page, the number of matched items and the counts of every facet are computed
+        by a single $facet aggregation, in one round trip. The counts are stored in the
+        `facet_counts` of the search.
+
+        Args:
+            search (MongoSearchAdapter): The search holding the requested facets.
+            query (Dict[str, Any]): The query matching the items of the search.
+            sort (List[Tuple[str, int]]): The sort order of the items.
+            skip (int): The number of items to skip.
+            limit (int): The maximum number of items to return.
+            count (bool): Whether to count the matched items.
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[int]]: The page of items and the number of
+                matched items, None if they were not counted.
+        """
+        facets: Dict[str, List[Dict[str, Any]]] = {
+            "items": [{"$skip": skip}, {"$limit": limit}],
+        }
+        if count:
+            facets["numberMatched"] = [{"$count": "value"}]
+
+        # Property names are not valid $facet field names, the facets are numbered
+        for i, name in enumerate(search.facets):
+            path = _property_path(name)
+            if path in RANGE_FACET_FIELDS:
+                facets[f"facet{i}"] = _range_buckets(path, RANGE_FACET_FIELDS[path])
+            else:
+                facets[f"facet{i}"] = _term_buckets(f"${path}", FACET_BUCKET_LIMIT)
+                facets[f"facet{i}_total"] = [
+                    {"$match": {path: {"$ne": None}}},
+                    {"$count": "value"},
+                ]
+
+        # Sorting before the $facet stage lets the sort use an index
+        pipeline = [
+            _match_stage(search, query),
+            {"$sort": dict(sort)},
+            {"$facet": facets},
+        ]
+        results = await (
+            self.read_database(SEARCH_READ_PREFERENCE)[ITEMS_INDEX]
+            .aggregate(pipeline, allowDiskUse=True, session=await request_session())
+            .to_list(length=1)
+        )
+        result = results[0]
+
+        search.facet_counts = _facet_counts(search.facets, result)
+        numbers = result.get("numberMatched")
+        number_matched = numbers[0]["value"] if numbers else 0
+
+        return result["items"], number_matched if count else None
+
+    async def aggregate(
+        self,
+        collection_ids: Optional[List[str]],
+        aggregations: List[str],
+        search: MongoSearchAdapter,
+        centroid_geohash_grid_precision: int,
+        centroid_geohex_grid_precision: int,
+        centroid_geotile_grid_precision: int,
+        geometry_geohash_grid_precision: int,
+        geometry_geotile_grid_precision: int,
+        datetime_frequency_interval: str,
+        ignore_unavailable: Optional[bool] = True,
+    ) -> Dict[str, Any]:
+        """
+        Compute aggregations over the items matching a search.
+
+        All the requested aggregations are computed by a single aggregation pipeline,
+        one $facet per aggregation, so the items are only read once. The result is shaped
+        like an Elasticsearch response, which the aggregation client formats.
+
+        Hexagonal grids and the grids of whole geometries are not supported, the related
+        precisions are accepted for compatibility with the aggregation client only.
+
+        Args:
+            collection_ids (Optional[List[str]]): The collection ids to search.
+            aggregations (List[str]): The names of the aggregations to compute.
+            search (MongoSearchAdapter): The search holding the filters of the items.
+            centroid_geohash_grid_precision (int): The number of characters of the geohashes.
+            centroid_geohex_grid_precision (int): Unused.
+            centroid_geotile_grid_precision (int): The zoom level of the tiles.
+            geometry_geohash_grid_precision (int): Unused.
+            geometry_geotile_grid_precision (int): Unused.
+            datetime_frequency_interval (str): The interval of the datetime histogram, one
+                of day, month or year.
+            ignore_unavailable (bool, optional): Unused.
+
+        Returns:
+            Dict[str, Any]: The aggregations, keyed by name under "aggregations".
+        """
+        facets: Dict[str, List[Dict[str, Any]]] = {}
+        has_bbox = {"$match": {"bbox": {"$type": "array"}}}
+
+        for name in aggregations:
+            if name == "total_count":
+                facets[name] = [{"$count": "value"}]
+            elif name in ("datetime_min", "datetime_max"):
+                facets["datetime_range"] = [
+                    {
+                        "$group": {
+                            "_id": None,
+                            "datetime_min": {"$min": _item_datetime()},
+                            "datetime_max": {"$max": _item_datetime()},
+                        }
+                    }
+                ]
+            elif name == "datetime_frequency":
+                facets[name] = [
+                    {
+                        "$group": {
+                            "_id": {
+                                "$dateTrunc": {
+                                    "date": _item_datetime(),
+                                    "unit": datetime_frequency_interval,
+                                }
+                            },
+                            "doc_count": {"$sum": 1},
+                        }
+                    },
+                    {"$match": {"_id": {"$ne": None}}},
+                    {"$sort": {"_id": 1}},
+                ]
+            elif name in TERM_AGGREGATION_FIELDS:
+                field = TERM_AGGREGATION_FIELDS[name]
+                facets[name] = _term_buckets(f"${field}")
+                facets[f"{name}_total"] = [
+                    {"$match": {field: {"$ne": None}}},
+                    {"$count": "value"},
+                ]
+            elif name in RANGE_AGGREGATION_FIELDS:
+                field, ranges = RANGE_AGGREGATION_FIELDS[name]
+                facets[name] = _range_buckets(field, ranges)
+            elif name == "centroid_geohash_grid_frequency":
+                facets[name] = [
+                    has_bbox,
+                    _item_centroid(),
+                    *_term_buckets(_geohash_grid_cell(centroid_geohash_grid_precision)),
+                ]
+                facets[f"{name}_total"] = [has_bbox, {"$count": "value"}]
+            elif name == "centroid_geotile_grid_frequency":
+                facets[name] = [
+                    has_bbox,
+                    _item_centroid(),
+                    *_term_buckets(_geotile_grid_cell(centroid_geotile_grid_precision)),
+                ]
+                facets[f"{name}_total"] = [has_bbox, {"$count": "value"}]
+
+        if not facets:
+            return {"aggregations": {}}
+
+        db = self.client[DATABASE]
+        query = await self.build_query(search, collection_ids)
+        pipeline = [{"$match": query}, {"$facet": facets}]
+
+        try:
+            results = (
+                await db[ITEMS_INDEX]
+                .aggregate(pipeline, allowDiskUse=True, session=await request_session())
+                .to_list(length=1)
+            )
+        except PyMongoError as e:
+            logger.error(f"Database operation failed: {e}")
+            raise
+        result = results[0]
+
+        def _count(facet: str) -> int:
+            rows = result.get(facet, [])
+            return rows[0]["value"] if rows else 0
+
+        def _date(value: Optional[datetime]) -> Optional[str]:
+            if value is None:
+                return None
+            return datetime_to_str(value.replace(tzinfo=timezone.utc), "milliseconds")
+
+        response: Dict[str, Any] = {}
+        for name in aggregations:
+            if name not in facets and name not in ("datetime_min", "datetime_max"):
+                continue
+
+            if name == "total_count":
+                response[name] = {"value": _count(name)}
+            elif name in ("datetime_min", "datetime_max"):
+                rows = result["datetime_range"]
+                response[name] = {
+                    "value_as_string": _date(rows[0][name] if rows else None)
+                }
+            elif name == "datetime_frequency":
+                response[name] = {
+                    "buckets": [
+                        {
+                            "key": int(
+                                row["_id"].replace(tzinfo=timezone.utc).timestamp()
+                                * 1000
+                            ),
+                            "key_as_string": _date(row["_id"]),
+                            "doc_count": row["doc_count"],
+                        }
+                        for row in result[name]
+                    ]
+                }
+            elif name in RANGE_AGGREGATION_FIELDS:
+                _, ranges = RANGE_AGGREGATION_FIELDS[name]
+                response[name] = {"buckets": _range_counts(result[name], ranges)}
+            else:
+                buckets = []
+                for row in result[name]:
+                    key = row["_id"]
+                    if name == "centroid_geohash_grid_frequency":
+                        key = _geohash(
+                            int(key["x"]),
+                            int(key["y"]),
+                            centroid_geohash_grid_precision,
+                        )
+                    elif name == "centroid_geotile_grid_frequency":
+                        key = f"{centroid_geotile_grid_precision}/{int(key['x'])}/{int(key['y'])}"
+                    buckets.append({"key": key, "doc_count": row["doc_count"]})
+                response[name] = {
+                    "buckets": buckets,
+                    "sum_other_doc_count": _count(f"{name}_total")
+                    - sum(bucket["doc_count"] for bucket in buckets),
+                }
+
+        return {"aggregations": response}
+
     """ TRANSACTION LOGIC """
 
     async def check_collection_exists(self, collection_id: str):
@@ -611,11 +3145,17 @@ class DatabaseLogic:
             NotFoundError: If the STAC collection specified by `collection_id` does not exist
                         within the MongoDB collection defined by COLLECTIONS_INDEX.
         """
+        cached = self.collection_cache.get(collection_id)
+        if cached and time.monotonic() - cached[0] < COLLECTION_CACHE_TTL:
+            return
+
         db = self.client[DATABASE]
         collections_collection = db[COLLECTIONS_INDEX]
 
         # Query the collections collection to see if a document with the specified collection_id exists
-        collection_exists = await collections_collection.find_one({"id": collection_id})
+        collection_exists = await collections_collection.find_one(
+            {"id": collection_id}, session=await request_session()
+        )
         if not collection_exists:
             raise NotFoundError(f"Collection {collection_id} does not exist")
 
@@ -639,7 +3179,10 @@ class DatabaseLogic:
         """
         await self.check_collection_exists(collection_id=item["collection"])
 
-        return self.item_serializer.stac_to_db(item, base_url)
+        checksum = item_checksum(item)
+        mongo_item = self.item_serializer.stac_to_db(item, base_url)
+        mongo_item[CHECKSUM_FIELD] = checksum  # type: ignore
+        return mongo_item
 
     async def create_item(
         self,
@@ -667,7 +3210,7 @@ class DatabaseLogic:
         Returns:
             dict: The created or updated item.
         """
-        db = self.client[DATABASE]
+        db = self.get_database(ITEM_WRITE_CONCERN)
         items_collection = db[ITEMS_INDEX]
 
         new_item = item.copy()
@@ -683,6 +3226,12 @@ class DatabaseLogic:
                 item=new_item, base_url=base_url, exist_ok=exist_ok
             )
 
+            if GROUP_COMMIT and not exist_ok:
+                # Conflicts are reported by the unique (id, collection) index
+                await self.item_writer.write(new_item)
+                record_write()
+                return serialize_doc(item)
+
             # Check if an item with the same id and collection already exists
             existing_item = await items_collection.find_one(
                 {"id": item["id"], "collection": item["collection"]}
@@ -696,6 +3245,9 @@ class DatabaseLogic:
                     f"Item with id {item['id']} already exists in collection {item['collection']}"
                 )
 
+            _stamp_changes([new_item], *await next_sequence(db))
+            record_write()
+
             # Set _id if not already present or preserve existing _id if updating
             if existing_item and exist_ok:
                 # Preserve the MongoDB _id field when updating
@@ -717,9 +3269,13 @@ class DatabaseLogic:
                 )
                 await items_collection.insert_one(new_item)
 
+            await self.merge_item_queryables([new_item])
+            await self.update_collection_stats(
+                [new_item], replaced=bool(existing_item and exist_ok)
+            )
             return serialize_doc(item)
-        except (ConflictError, NotFoundError):
-            # Re-raise these errors
+        except (ConflictError, NotFoundError, *TIMEOUT_ERRORS):
+            # Re-raise these errors, the timeouts are answered 503 or 504
             raise
         except PyMongoError as e:
             # Handle any MongoDB errors
@@ -730,6 +3286,84 @@ class DatabaseLogic:
                 f"Error creating item {item['id']} in collection {item['collection']}: {e}"
             )
 
+    async def _insert_items(
+        self, documents: List[Dict[str, Any]]
+    ) -> List[Optional[BaseException]]:
+        """
+        Insert a batch of items, see `insert_items` and `GroupCommitWriter`.
+
+        The items failing on their own are reported by `insert_items`. When the whole
+        batch fails, the timeouts are reported as they are, answered 503 or 504, and the
+        other database errors as a `DatabaseError`.
+        """
+        try:
+            return await self.insert_items(documents)
+        except TIMEOUT_ERRORS as e:
+            logger.error(f"Timeout creating a batch of {len(documents)} items: {e}")
+            return [e] * len(documents)
+        except PyMongoError as e:
+            logger.error(f"Error creating a batch of {len(documents)} items: {e}")
+            error = DatabaseError(f"Error creating items: {e}")
+            return [error] * len(documents)
+
+    async def insert_items(
+        self, documents: List[Dict[str, Any]], bulk: bool = False
+    ) -> List[Optional[BaseException]]:
+        """
+        Insert a batch of items with one unordered write.
+
+        Args:
+            documents (List[Dict[str, Any]]): The prepped items.
+            bulk (bool): Whether the items are a bulk load, written with the
+                `BULK_WRITE_CONCERN` rather than the `ITEM_WRITE_CONCERN`.
+
+        Returns:
+            List[Optional[BaseException]]: For each item, None if it was inserted or the
+                error it failed with, a `ConflictError` if it already exists and an
+                `InvalidQueryParameter` if the database refused it, for instance for a
+                geometry it cannot index.
+
+        Raises:
+            DatabaseError: If the inserts were not acknowledged by the write concern,
+                they may then be rolled back.
+            PyMongoError: If the batch could not be written, the items may then be
+                partly inserted.
+        """
+        db = self.get_database(BULK_WRITE_CONCERN if bulk else ITEM_WRITE_CONCERN)
+        errors: List[Optional[BaseException]] = [None] * len(documents)
+        _stamp_changes(documents, *await next_sequence(db, len(documents)))
+        try:
+            await db[ITEMS_INDEX].insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            if e.details.get("writeConcernErrors"):
+                # The counts cannot follow inserts that may be rolled back
+                await self.uncount_collection_stats(
+                    list({document["collection"] for document in documents})
+                )
+                raise DatabaseError(
+                    f"Items not acknowledged: {e.details['writeConcernErrors']}"
+                )
+            for write_error in e.details.get("writeErrors", []):
+                document = documents[write_error["index"]]
+                if write_error.get("code") == 11000:
+                    errors[write_error["index"]] = ConflictError(
+                        f"Item with id {document['id']} already exists in "
+                        f"collection {document['collection']}"
+                    )
+                else:
+                    errors[write_error["index"]] = InvalidQueryParameter(
+                        f"Error creating item {document['id']} in collection "
+                        f"{document['collection']}: {write_error.get('errmsg')}"
+                    )
+
+        inserted = [
+            document for document, error in zip(documents, errors) if error is None
+        ]
+        if inserted:
+            await self.merge_item_queryables(inserted)
+            await self.update_collection_stats(inserted)
+        return errors
+
     async def prep_create_item(
         self, item: Item, base_url: str, exist_ok: bool = False
     ) -> Item:
@@ -760,7 +3394,9 @@ class DatabaseLogic:
             raise NotFoundError(f"Collection {item['collection']} does not exist")
 
         # Transform item using item_serializer for MongoDB compatibility
+        checksum = item_checksum(item)
         mongo_item = self.item_serializer.stac_to_db(item, base_url)
+        mongo_item[CHECKSUM_FIELD] = checksum  # type: ignore
 
         if not exist_ok:
             existing_item = await items_collection.find_one(
@@ -804,7 +3440,9 @@ class DatabaseLogic:
             raise NotFoundError(f"Collection {item['collection']} does not exist")
 
         # Transform item using item_serializer for MongoDB compatibility
+        checksum = item_checksum(item)
         mongo_item = self.item_serializer.stac_to_db(item, base_url)
+        mongo_item[CHECKSUM_FIELD] = checksum  # type: ignore
 
         if not exist_ok:
             existing_item = items_collection.find_one(
@@ -834,7 +3472,7 @@ class DatabaseLogic:
             NotFoundError: If the Collection does not exist in the database.
             ConflictError: If there is an error deleting the item.
         """
-        db = self.client[DATABASE]
+        db = self.get_database(ITEM_WRITE_CONCERN)
         items_collection = db[ITEMS_INDEX]
 
         try:
@@ -842,8 +3480,10 @@ class DatabaseLogic:
             await self.check_collection_exists(collection_id)
 
             # Attempt to delete the item from the collection
-            result = await items_collection.delete_one({"id": item_id})
-            if result.deleted_count == 0:
+            deleted = await items_collection.find_one_and_delete(
+                {"id": item_id, "collection": collection_id}, {"collection": 1}
+            )
+            if deleted is None:
                 # If no items were deleted, it means the item did not exist
                 logger.warning(
                     f"Item {item_id} in collection {collection_id} not found"
@@ -852,6 +3492,18 @@ class DatabaseLogic:
                     f"Item {item_id} in collection {collection_id} not found"
                 )
             logger.info(f"Deleted item {item_id} from collection {collection_id}")
+            record_write()
+
+            # Record the delete for the changes feed
+            tombstone = {"collection": collection_id, "id": item_id}
+            _stamp_changes([tombstone], *await next_sequence(db))
+            await db[TOMBSTONES_INDEX].insert_one(tombstone)
+
+            # The bounds and summaries cannot be narrowed incrementally
+            await db[COLLECTION_STATS_INDEX].update_one(
+                {"_id": deleted["collection"]},
+                {"$inc": {"count": -1, "version": 1}, "$set": {"stale": True}},
+            )
         except NotFoundError:
             # Re-raise not found errors
             raise
@@ -874,7 +3526,7 @@ class DatabaseLogic:
         Raises:
             ConflictError: If a Collection with the same id already exists in the database.
         """
-        db = self.client[DATABASE]
+        db = self.get_database(COLLECTION_WRITE_CONCERN)
         collections_collection = db[COLLECTIONS_INDEX]
 
         # Check if the collection already exists
@@ -884,14 +3536,28 @@ class DatabaseLogic:
         if existing_collection:
             raise ConflictError(f"Collection {collection['id']} already exists")
 
+        record_write()
         try:
             # Insert the new collection document into the collections collection
-            await collections_collection.insert_one(collection)
+            await collections_collection.insert_one(collection_document(collection))
+            # A new collection has no items, its statistics are known
+            await db[COLLECTION_STATS_INDEX].replace_one(
+                {"_id": collection["id"]},
+                {
+                    "count": 0,
+                    "summaries": {},
+                    "stale": False,
+                    "counted": True,
+                    "version": 0,
+                },
+                upsert=True,
+            )
         except PyMongoError as e:
             # Catch any MongoDB error and raise an appropriate error
             logger.error(f"Failed to create collection {collection['id']}: {e}")
             raise ConflictError(f"Failed to create collection {collection['id']}: {e}")
 
+        self.invalidate_collection(collection["id"])
         collection = serialize_doc(collection)
 
     async def find_collection(self, collection_id: str) -> dict:
@@ -908,13 +3574,45 @@ class DatabaseLogic:
         Raises:
             NotFoundError: If the collection with the given `collection_id` is not found in the database.
         """
+        if COLLECTION_CACHE_TTL > 0:
+            cached = self.collection_cache.get(collection_id)
+            if cached and time.monotonic() - cached[0] < COLLECTION_CACHE_TTL:
+                return deepcopy(cached[1])
+        generation = self.cache_generation
+
+        if SINGLE_FLIGHT:
+            collection = await within_budget(
+                self.single_flight.do(
+                    "find_collection",
+                    collection_id,
+                    lambda: run_in_own_session(
+                        lambda: self._find_collection(collection_id)
+                    ),
+                )
+            )
+        else:
+            collection = await self._find_collection(collection_id)
+
+        if COLLECTION_CACHE_TTL > 0 and generation == self.cache_generation:
+            self.collection_cache[collection_id] = (
+                time.monotonic(),
+                deepcopy(collection),
+            )
+        return collection
+
+    async def _find_collection(self, collection_id: str) -> dict:
+        """Find and return a collection from the database, see `find_collection`."""
         db = self.client[DATABASE]
         collections_collection = db[COLLECTIONS_INDEX]
 
         try:
-            collection = await collections_collection.find_one({"id": collection_id})
+            collection = await collections_collection.find_one(
+                {"id": collection_id}, {EXTENT_FIELD: False}
+            )
             if not collection:
                 raise NotFoundError(f"Collection {collection_id} not found")
+            stats = await self.get_collection_stats([collection_id])
+            collection["stats"] = stats[collection_id]
             serialized_collection = serialize_doc(collection)
             return serialized_collection
         except PyMongoError as e:
@@ -922,6 +3620,80 @@ class DatabaseLogic:
             logger.error(f"Failed to find collection {collection_id}: {e}")
             raise NotFoundError(f"Collection {collection_id} not found")
 
+    def invalidate_collection(
+        self,
+        collection_id: Optional[str] = None,
+        caches: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        Drop the cached entries of a collection, or of all collections.
+
+        Args:
+            collection_id (Optional[str]): The id of the collection, all collections if None.
+            caches (Optional[List[Dict[str, Any]]]): The caches to drop the entries from.
+                Defaults to the collection and the queryables caches.
+        """
+        self.cache_generation += 1
+        for cache in caches or [self.collection_cache, self.queryables_cache]:
+            if collection_id is None:
+                cache.clear()
+            else:
+                cache.pop(collection_id, None)
+
+    async def watch_cache_invalidations(
+        self, ready: Optional[asyncio.Event] = None, retry_interval: float = 5
+    ) -> None:
+        """
+        Invalidate the cached collections and queryables on the writes of all replicas.
+
+        A change stream on the collections, the collection statistics and the queryables
+        invalidates the entries of the changed collections within milliseconds, so that
+        `STAC_COLLECTION_CACHE_TTL` and `STAC_QUERYABLES_CACHE_TTL` can be long when the
+        API runs on several replicas. Item writes reach the caches through the statistics
+        and queryables they update. The caches are cleared whenever the stream is
+        (re)opened, since writes may have been missed, and the stream is reopened every
+        `retry_interval` seconds after a failure. Change streams require a replica set.
+
+        Args:
+            ready (Optional[asyncio.Event]): Set once the change stream is open.
+            retry_interval (float): Seconds to wait before reopening a failed stream.
+
+        Raises:
+            ValueError: If `DATABASE` cannot be watched, see `check_change_streams`.
+        """
+        check_change_streams(DATABASE)
+        db = self.client[DATABASE]
+        while True:
+            try:
+                async with db.watch(CACHE_SOURCES_PIPELINE) as stream:
+                    self.invalidate_collection()
+                    if ready is not None:
+                        ready.set()
+                    async for change in stream:
+                        self._invalidate_change(change)
+                # The stream was invalidated, by a dropped database for instance
+                self.invalidate_collection()
+            except PyMongoError as e:
+                logger.error(f"Cache invalidation stream failed: {e}")
+                self.invalidate_collection()
+                await asyncio.sleep(retry_interval)
+
+    def _invalidate_change(self, change: Dict[str, Any]) -> None:
+        """Invalidate the cached entries of the collection changed by a change event."""
+        namespace = change.get("ns", {}).get("coll")
+        key = change.get("documentKey", {}).get("_id")
+        if namespace == COLLECTION_STATS_INDEX:
+            self.invalidate_collection(key, [self.collection_cache])
+        elif namespace == QUERYABLES_INDEX:
+            if key != CATALOG_QUERYABLES_ID:
+                # The queryables of the catalog are not cached in process
+                self.invalidate_collection(key, [self.queryables_cache])
+        elif namespace == COLLECTIONS_INDEX and change["operationType"] == "insert":
+            self.invalidate_collection(change["fullDocument"]["id"])
+        else:
+            # The ids of updated and deleted collections are not in their events
+            self.invalidate_collection()
+
     async def update_collection(
         self, collection_id: str, collection: Collection, refresh: bool = False
     ):
@@ -942,13 +3714,14 @@ class DatabaseLogic:
             It does not directly modify the `_id` field, which is immutable in MongoDB.
             When changing a collection's ID, it creates a new document with the new ID and deletes the old document.
         """
-        db = self.client[DATABASE]
+        db = self.get_database(COLLECTION_WRITE_CONCERN)
         collections_collection = db[COLLECTIONS_INDEX]
 
         # Ensure the existing collection exists
         existing_collection = await self.find_collection(collection_id)
         if not existing_collection:
             raise NotFoundError(f"Collection {collection_id} not found")
+        record_write()
 
         # Handle changing collection ID
         if collection_id != collection["id"]:
@@ -960,23 +3733,39 @@ class DatabaseLogic:
                     f"Collection with ID {collection['id']} already exists"
                 )
 
-            items_collection = db[ITEMS_INDEX]
-            # Update only items related to the old collection ID to the new collection ID
-            await items_collection.update_many(
+            # Move the items of the old collection ID to the new collection ID, the
+            # feed of the old ID ends with their deletes
+            items = db[ITEMS_INDEX].find(
                 {"collection": collection_id},
-                {"$set": {"collection": collection["id"]}},
+                {"_id": True, "id": True},
+                batch_size=_SEQUENCE_BACKFILL_BATCH,
             )
+            async for batch in _in_batches(items, _SEQUENCE_BACKFILL_BATCH):
+                await _move_items(db, batch, collection_id, collection["id"])
 
             # Insert the new collection and delete the old one
-            await collections_collection.insert_one(collection)
+            await collections_collection.insert_one(collection_document(collection))
             await collections_collection.delete_one({"id": collection_id})
+            await db[QUERYABLES_INDEX].delete_one({"_id": collection_id})
+
+            stats = await db[COLLECTION_STATS_INDEX].find_one_and_delete(
+                {"_id": collection_id}
+            )
+            if stats:
+                stats["_id"] = collection["id"]
+                await db[COLLECTION_STATS_INDEX].replace_one(
+                    {"_id": collection["id"]}, stats, upsert=True
+                )
         else:
             # Update the existing collection with new data, ensuring not to attempt to update `_id`
             await collections_collection.update_one(
                 {"id": collection_id},
-                {"$set": {k: v for k, v in collection.items() if k != "_id"}},
+                {"$set": collection_document(collection)},
             )
 
+        self.invalidate_collection(collection_id)
+        self.invalidate_collection(collection["id"])
+
     async def delete_collection(self, collection_id: str):
         """
         Delete a collection from the MongoDB database and all items associated with it.
@@ -995,7 +3784,7 @@ class DatabaseLogic:
         This ensures that when a collection is deleted, all of its items are also cleaned up from the database,
         maintaining data integrity and avoiding orphaned items without a parent collection.
         """
-        db = self.client[DATABASE]
+        db = self.get_database(COLLECTION_WRITE_CONCERN)
         collections_collection = db[COLLECTIONS_INDEX]
         items_collection = db[ITEMS_INDEX]
 
@@ -1006,9 +3795,14 @@ class DatabaseLogic:
         if collection_result.deleted_count == 0:
             # Collection not found, raise an error
             raise NotFoundError(f"Collection {collection_id} not found")
+        record_write()
 
         # Successfully found and deleted the collection, now delete its items
         await items_collection.delete_many({"collection": collection_id})
+        await db[TOMBSTONES_INDEX].delete_many({"collection": collection_id})
+        await db[QUERYABLES_INDEX].delete_one({"_id": collection_id})
+        await db[COLLECTION_STATS_INDEX].delete_one({"_id": collection_id})
+        self.invalidate_collection(collection_id)
 
     async def bulk_async(
         self, collection_id: str, processed_items: List[Item], refresh: bool = False
@@ -1027,18 +3821,27 @@ class DatabaseLogic:
             `mk_actions` function is called to generate a list of actions for the bulk insert. If `refresh` is set to True, the
             index is refreshed after the bulk insert. The function does not return any value.
         """
-        db = self.client[DATABASE]
+        db = self.get_database(BULK_WRITE_CONCERN)
         items_collection = db[ITEMS_INDEX]
 
         # Prepare the documents for insertion
         documents = [item.model_dump(by_alias=True) for item in processed_items]
+        if documents:
+            _stamp_changes(documents, *await next_sequence(db, len(documents)))
 
+        record_write()
         try:
             await items_collection.insert_many(documents, ordered=False)
         except BulkWriteError as e:
+            inserted = _inserted_documents(documents, e)
+            await self.merge_item_queryables(inserted)
+            await self.update_collection_stats(inserted)
             # Handle bulk write errors, e.g., due to duplicate keys
             raise ConflictError(f"Bulk insert operation failed: {e.details}")
 
+        await self.merge_item_queryables(documents)
+        await self.update_collection_stats(documents)
+
     def bulk_sync(
         self, collection_id: str, processed_items: List[Item], refresh: bool = False
     ) -> None:
@@ -1056,18 +3859,40 @@ class DatabaseLogic:
             completed. The `mk_actions` function is called to generate a list of actions for the bulk insert. If `refresh` is set to
             True, the index is refreshed after the bulk insert. The function does not return any value.
         """
-        db = self.sync_client[DATABASE]
+        db = self.sync_client.get_database(DATABASE, write_concern=BULK_WRITE_CONCERN)
         items_collection = db[ITEMS_INDEX]
 
         # Prepare the documents for insertion
         documents = [item.model_dump(by_alias=True) for item in processed_items]
+        if documents:
+            _stamp_changes(documents, *sync_next_sequence(db, len(documents)))
 
+        record_write()
         try:
             items_collection.insert_many(documents, ordered=False)
         except BulkWriteError as e:
+            self._sync_add_inserted(db, _inserted_documents(documents, e))
             # Handle bulk write errors, e.g., due to duplicate keys
             raise ConflictError(f"Bulk insert operation failed: {e.details}")
 
+        self._sync_add_inserted(db, documents)
+
+    def _sync_add_inserted(self, db: Any, documents: List[Dict[str, Any]]) -> None:
+        """Merge the queryables and update the statistics of inserted items, see `bulk_sync`."""
+        merge = self._queryables_merge(documents)
+        if merge is not None:
+            try:
+                db[QUERYABLES_INDEX].update_many(*merge)
+            except PyMongoError as e:
+                logger.warning(f"Failed to update cached queryables: {e}")
+
+        stats_updates = self._stats_updates(documents)
+        if stats_updates:
+            try:
+                db[COLLECTION_STATS_INDEX].bulk_write(stats_updates, ordered=False)
+            except PyMongoError as e:
+                logger.warning(f"Failed to update collection statistics: {e}")
+
     async def delete_items(self) -> None:
         """
         Danger. this is only for tests.
@@ -1079,6 +3904,8 @@ class DatabaseLogic:
 
         try:
             await items_collection.delete_many({})
+            await db[COLLECTION_STATS_INDEX].delete_many({})
+            await db[TOMBSTONES_INDEX].delete_many({})
             logger.info("All items have been deleted.")
         except Exception as e:
             logger.error(f"Error deleting items: {e}")
@@ -1094,6 +3921,7 @@ class DatabaseLogic:
 
         try:
             await collections_collection.delete_many({})
+            await db[COLLECTION_STATS_INDEX].delete_many({})
             logger.info("All collections have been deleted.")
         except Exception as e:
             logger.error(f"Error deleting collections: {e}")
@@ -0,0 +1,28 @@
+"""mongodb extensions modifications."""
+
+from .aggregation import MongoAsyncAggregationClient
+from .batch import BatchSearchExtension
+from .changes import ChangesExtension
+from .facets import FacetsExtension
+from .filter import MongoAsyncBaseFiltersClient
+from .ingest import IngestExtension
+from .items_diff import ItemsDiffExtension
+from .items_get import ItemsGetExtension
+from .near import NearExtension
+from .query import Operator, QueryExtension
+from .subscribe import SubscriptionExtension
+
+__all__ = [
+    "BatchSearchExtension",
+    "ChangesExtension",
+    "FacetsExtension",
+    "IngestExtension",
+    "ItemsDiffExtension",
+    "ItemsGetExtension",
+    "MongoAsyncAggregationClient",
+    "MongoAsyncBaseFiltersClient",
+    "NearExtension",
+    "Operator",
+    "QueryExtension",
+    "SubscriptionExtension",
+]
@@ -0,0 +1,61 @@
+"""Aggregation extension client computing aggregations with the aggregation pipeline."""
+
+from stac_fastapi.core.extensions.aggregation import EsAsyncAggregationClient
+
+
+class MongoAsyncAggregationClient(EsAsyncAggregationClient):
+    """Defines a pattern for implementing the STAC aggregation extension.
+
+    Requests are parsed and validated by the Elasticsearch client, the aggregations
+    themselves are computed by `DatabaseLogic.aggregate`. Hexagonal grids and the grids
+    of whole geometries are not available.
+    """
+
+    DEFAULT_AGGREGATIONS = [
+        {"name": "total_count", "data_type": "integer"},
+        {"name": "datetime_max", "data_type": "datetime"},
+        {"name": "datetime_min", "data_type": "datetime"},
+        {
+            "name": "datetime_frequency",
+            "data_type": "frequency_distribution",
+            "frequency_distribution_data_type": "datetime",
+        },
+        {
+            "name": "collection_frequency",
+            "data_type": "frequency_distribution",
+            "frequency_distribution_data_type": "string",
+        },
+        {
+            "name": "platform_frequency",
+            "data_type": "frequency_distribution",
+            "frequency_distribution_data_type": "string",
+        },
+        {
+            "name": "cloud_cover_frequency",
+            "data_type": "frequency_distribution",
+            "frequency_distribution_data_type": "numeric",
+        },
+        {
+            "name": "centroid_geohash_grid_frequency",
+            "data_type": "frequency_distribution",
+            "frequency_distribution_data_type": "string",
+        },
+        {
+            "name": "centroid_geotile_grid_frequency",
+            "data_type": "frequency_distribution",
+            "frequency_distribution_data_type": "string",
+        },
+    ]
+
+    GEO_POINT_AGGREGATIONS = [
+        {
+            "name": "centroid_geohash_grid_frequency",
+            "data_type": "frequency_distribution",
+            "frequency_distribution_data_type": "string",
+        },
+        {
+            "name": "centroid_geotile_grid_frequency",
+            "data_type": "frequency_distribution",
+            "frequency_distribution_data_type": "string",
+        },
+    ]
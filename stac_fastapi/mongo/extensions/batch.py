@@ -0,0 +1,93 @@
+"""Batch search extension."""
+
+import os
+from typing import Any, List, Optional, Type
+
+import attr
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+from pydantic import BaseModel
+
+from stac_fastapi.mongo.admission import admission_limiters
+from stac_fastapi.mongo.utilities import ConcurrencyLimiter
+from stac_fastapi.types.extension import ApiExtension
+from stac_fastapi.types.search import BaseSearchPostRequest
+
+
+@attr.s
+class BatchSearchExtension(ApiExtension):
+    """Batch Search Extension.
+
+    The Batch Search extension adds a `POST /search/batch` endpoint taking an array of
+    `/search` request bodies. The searches are run concurrently, at most `concurrency`
+    at a time, identical searches only once, and the response is the array of their
+    item collections, in the order of the request. The links of each item collection
+    point to `/search`, so that their next pages are fetched one search at a time.
+
+    A search that fails is answered with its error, the others are still returned. Each
+    search takes a turn of the admission `limiter` of the searches, so that a batch is
+    charged as many searches as it holds rather than as one request.
+
+    Attributes:
+        client: Core client running the searches, see `CoreClient.batch_search`.
+        search_post_request_model: Model of the `/search` request bodies.
+        max_searches (int): Maximum number of searches of a batch,
+            `STAC_BATCH_SEARCH_MAX_SIZE`.
+        concurrency (int): Maximum number of searches run at the same time,
+            `STAC_BATCH_SEARCH_CONCURRENCY`.
+        limiter (Optional[ConcurrencyLimiter]): The admission limiter of the searches,
+            that of `STAC_SEARCH_CONCURRENCY` if any.
+        conformance_classes (list): Defines the list of conformance classes for
+            the extension
+    """
+
+    client: Any = attr.ib()
+    search_post_request_model: Type[BaseModel] = attr.ib(default=BaseSearchPostRequest)
+    max_searches: int = attr.ib(
+        factory=lambda: int(os.getenv("STAC_BATCH_SEARCH_MAX_SIZE", "100"))
+    )
+    concurrency: int = attr.ib(
+        factory=lambda: int(os.getenv("STAC_BATCH_SEARCH_CONCURRENCY", "8"))
+    )
+    limiter: Optional[ConcurrencyLimiter] = attr.ib(
+        factory=lambda: admission_limiters.get("search")
+    )
+    conformance_classes: List[str] = attr.ib(factory=list)
+    schema_href: Optional[str] = attr.ib(default=None)
+    router: APIRouter = attr.ib(factory=APIRouter)
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app (fastapi.FastAPI): target FastAPI application.
+
+        Returns:
+            None
+        """
+        search_post_request_model = self.search_post_request_model
+
+        async def batch_search(
+            request: Request,
+            search_requests: List[search_post_request_model],  # type: ignore
+        ):
+            """Run an array of searches."""
+            if len(search_requests) > self.max_searches:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"A batch holds at most {self.max_searches} searches",
+                )
+            return await self.client.batch_search(
+                search_requests,
+                request=request,
+                concurrency=self.concurrency,
+                limiter=self.limiter,
+            )
+
+        self.router.prefix = app.state.router_prefix
+        self.router.add_api_route(
+            name="Batch Search",
+            path="/search/batch",
+            methods=["POST"],
+            endpoint=batch_search,
+        )
+        app.include_router(self.router, tags=["Batch Search Extension"])
@@ -0,0 +1,70 @@
+"""Changes extension."""
+
+from typing import Any, List, Optional
+
+import attr
+from fastapi import APIRouter, FastAPI, Path, Query, Request
+from typing_extensions import Annotated
+
+from stac_fastapi.types.extension import ApiExtension
+
+
+@attr.s
+class ChangesExtension(ApiExtension):
+    """Changes Extension.
+
+    The Changes extension adds a `GET /collections/{collection_id}/changes` endpoint
+    listing the item writes and deletes of a collection in the order they were made,
+    paged by token, so that mirrors of the catalog only fetch what changed since their
+    last synchronization. Every page links to the next one, the last page included, so
+    that a mirror resumes from its last link. Deletes are kept for
+    `STAC_TOMBSTONES_TTL` seconds.
+
+    Attributes:
+        client: Core client listing the changes, see `CoreClient.get_changes`.
+        conformance_classes (list): Defines the list of conformance classes for
+            the extension
+    """
+
+    client: Any = attr.ib()
+    conformance_classes: List[str] = attr.ib(factory=list)
+    schema_href: Optional[str] = attr.ib(default=None)
+    router: APIRouter = attr.ib(factory=APIRouter)
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app (fastapi.FastAPI): target FastAPI application.
+
+        Returns:
+            None
+        """
+
+        async def get_changes(
+            request: Request,
+            collection_id: Annotated[str, Path(description="Collection ID")],
+            since: Annotated[
+                Optional[str],
+                Query(description="Only list the changes made at or after this time."),
+            ] = None,
+            limit: Annotated[
+                int, Query(ge=1, le=10000, description="Maximum number of changes.")
+            ] = 100,
+            token: Annotated[
+                Optional[str], Query(description="Token of the page.")
+            ] = None,
+        ):
+            """List the changes of the items of a collection."""
+            return await self.client.get_changes(
+                collection_id, request=request, since=since, limit=limit, token=token
+            )
+
+        self.router.prefix = app.state.router_prefix
+        self.router.add_api_route(
+            name="Changes",
+            path="/collections/{collection_id}/changes",
+            methods=["GET"],
+            endpoint=get_changes,
+        )
+        app.include_router(self.router, tags=["Changes Extension"])
@@ -0,0 +1,76 @@
+"""Facets extension."""
+
+from typing import List, Optional
+
+import attr
+from fastapi import FastAPI, Query
+from pydantic import BaseModel, Field
+from typing_extensions import Annotated
+
+from stac_fastapi.types.extension import ApiExtension
+from stac_fastapi.types.search import APIRequest, str2list
+
+
+def _facets_converter(
+    val: Annotated[
+        Optional[str],
+        Query(
+            description="Properties to count the matched items of, per value or range.",
+            openapi_examples={
+                "user-provided": {"value": None},
+                "platform": {"value": "platform,eo:cloud_cover"},
+            },
+        ),
+    ] = None,
+) -> Optional[List[str]]:
+    return str2list(val)
+
+
+@attr.s
+class FacetsExtensionGetRequest(APIRequest):
+    """Additional fields for the GET request."""
+
+    facets: Optional[List[str]] = attr.ib(default=None, converter=_facets_converter)
+
+
+class FacetsExtensionPostRequest(BaseModel):
+    """Additional fields and schema for the POST request."""
+
+    facets: Optional[List[str]] = Field(
+        None,
+        description="Properties to count the matched items of, per value or range.",
+        json_schema_extra={"example": ["platform", "eo:cloud_cover"]},
+    )
+
+
+@attr.s
+class FacetsExtension(ApiExtension):
+    """Facets Extension.
+
+    The Facets extension adds an opt-in `facets` parameter to the `/search` endpoint.
+    The response then holds, next to the page of items, the number of matched items
+    per value of each requested property, or per range for numeric properties such
+    as the cloud cover. The counts are shaped like the frequency distributions of the
+    Aggregation extension.
+
+    Attributes:
+        conformance_classes (list): Defines the list of conformance classes for
+            the extension
+    """
+
+    GET = FacetsExtensionGetRequest
+    POST = FacetsExtensionPostRequest
+
+    conformance_classes: List[str] = attr.ib(factory=list)
+    schema_href: Optional[str] = attr.ib(default=None)
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app (fastapi.FastAPI): target FastAPI application.
+
+        Returns:
+            None
+        """
+        pass
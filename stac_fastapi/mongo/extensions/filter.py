@@ -0,0 +1,70 @@
+"""Filter extension client generating queryables from sampled items."""
+
+from copy import deepcopy
+from typing import Any, Dict, Optional
+from urllib.parse import urljoin
+
+import attr
+
+from stac_fastapi.core.base_database_logic import BaseDatabaseLogic
+from stac_fastapi.core.core import _DEFAULT_QUERYABLES
+from stac_fastapi.extensions.core.filter.client import AsyncBaseFiltersClient
+
+
+@attr.s
+class MongoAsyncBaseFiltersClient(AsyncBaseFiltersClient):
+    """Defines a pattern for implementing the STAC filter extension."""
+
+    database: BaseDatabaseLogic = attr.ib()
+
+    async def get_queryables(
+        self, collection_id: Optional[str] = None, **kwargs
+    ) -> Dict[str, Any]:
+        """Get the queryables available for the given collection_id.
+
+        If collection_id is None, returns the queryables sampled over all collections.
+
+        The item properties are inferred from a sample of items and cached by the database,
+        which keeps them up to date as items are written. Properties backed by an index are
+        flagged with `x-indexed`, so clients can prefer them in filters.
+
+        Args:
+            collection_id (str, optional): The id of the collection to get queryables for.
+            **kwargs: additional keyword arguments
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the queryables for the given collection.
+
+        Raises:
+            NotFoundError: If the collection does not exist.
+        """
+        request = kwargs.get("request")
+        base_url = str(request.base_url) if request else ""
+
+        if collection_id is None:
+            schema_id = urljoin(base_url, "queryables")
+        else:
+            await self.database.check_collection_exists(collection_id)
+            schema_id = urljoin(base_url, f"collections/{collection_id}/queryables")
+
+        properties: Dict[str, Any] = deepcopy(_DEFAULT_QUERYABLES)
+        indexed_fields = await self.database.get_indexed_fields()
+        for name in ("id", "geometry"):
+            if name in indexed_fields:
+                properties[name]["x-indexed"] = True
+
+        sampled = await self.database.get_sampled_queryables(collection_id)
+        for name, schema in sampled.items():
+            field_result = properties.setdefault(name, {})
+            field_result.setdefault("title", name.replace("_", " ").title())
+            field_result.update(schema)
+
+        return {
+            "$schema": "https://json-schema.org/draft/2019-09/schema",
+            "$id": schema_id,
+            "type": "object",
+            "title": "Queryables for STAC API",
+            "description": "Queryable names for the STAC API Item Search filter.",
+            "properties": properties,
+            "additionalProperties": True,
+        }
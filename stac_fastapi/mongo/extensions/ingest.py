@@ -0,0 +1,60 @@
+"""Ingest extension."""
+
+from typing import List, Optional
+
+import attr
+from fastapi import APIRouter, FastAPI, Path
+from typing_extensions import Annotated
+
+from stac_fastapi.mongo.ingest import IngestQueue
+from stac_fastapi.types.extension import ApiExtension
+
+
+@attr.s
+class IngestExtension(ApiExtension):
+    """Ingest Extension.
+
+    The Ingest extension runs the worker of an ingest queue with the application and
+    adds a `GET /ingest/jobs/{job_id}` endpoint reporting the progress of a job: its
+    status, `queued`, `succeeded` or `failed` when some items could not be written, the
+    numbers of items accepted, written and failed, and the errors of the failed ones.
+    The item POSTs of a `TransactionsClient` given the same queue are accepted as jobs,
+    see `IngestQueue`.
+
+    Attributes:
+        queue (IngestQueue): The ingest queue.
+        conformance_classes (list): Defines the list of conformance classes for
+            the extension
+    """
+
+    queue: IngestQueue = attr.ib()
+    conformance_classes: List[str] = attr.ib(factory=list)
+    schema_href: Optional[str] = attr.ib(default=None)
+    router: APIRouter = attr.ib(factory=APIRouter)
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app (fastapi.FastAPI): target FastAPI application.
+
+        Returns:
+            None
+        """
+
+        async def get_job(
+            job_id: Annotated[str, Path(description="Ingest job ID")],
+        ):
+            """Get the progress of an ingest job."""
+            return await self.queue.job_status(job_id)
+
+        self.router.prefix = app.state.router_prefix
+        self.router.add_api_route(
+            name="Get Ingest Job",
+            path="/ingest/jobs/{job_id}",
+            methods=["GET"],
+            endpoint=get_job,
+        )
+        app.include_router(self.router, tags=["Ingest Extension"])
+        app.add_event_handler("startup", self.queue.start)
+        app.add_event_handler("shutdown", self.queue.close)
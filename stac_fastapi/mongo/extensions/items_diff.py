@@ -0,0 +1,102 @@
+"""Items diff extension."""
+
+import os
+from typing import Any, List, Optional
+
+import attr
+from fastapi import APIRouter, FastAPI, HTTPException, Path, Request
+from pydantic import BaseModel, Field
+from typing_extensions import Annotated
+
+from stac_fastapi.types.extension import ApiExtension
+
+
+class ItemVersion(BaseModel):
+    """An item id, with the checksum or the update time of its content."""
+
+    id: str = Field(..., description="Id of the item.")
+    checksum: Optional[str] = Field(
+        None,
+        description="SHA-256 of the item JSON with sorted keys, no whitespace and "
+        "integral numbers written as integers, without its `created` and `updated` "
+        "properties.",
+    )
+    updated: Optional[str] = Field(
+        None, description="Time the item was last updated at the source."
+    )
+
+
+class ItemsDiffRequest(BaseModel):
+    """Schema of the POST request."""
+
+    items: List[ItemVersion] = Field(
+        ...,
+        description="Items to compare with the items of the collection.",
+        json_schema_extra={
+            "example": [
+                {"id": "item-1", "updated": "2024-01-01T00:00:00Z"},
+                {"id": "item-2"},
+            ]
+        },
+    )
+
+
+@attr.s
+class ItemsDiffExtension(ApiExtension):
+    """Items Diff Extension.
+
+    The Items Diff extension adds a `POST /collections/{collection_id}/items/diff`
+    endpoint taking a list of item ids with the checksum or the update time of their
+    content. The response lists the ids of the items that are `missing` from the
+    collection, `stale` or `current`, so that harvesters only send the difference.
+
+    Attributes:
+        client: Core client comparing the items, see `CoreClient.diff_items`.
+        max_items (int): Maximum number of items of a request, `STAC_ITEMS_DIFF_MAX_ITEMS`.
+        conformance_classes (list): Defines the list of conformance classes for
+            the extension
+    """
+
+    client: Any = attr.ib()
+    max_items: int = attr.ib(
+        factory=lambda: int(os.getenv("STAC_ITEMS_DIFF_MAX_ITEMS", "10000"))
+    )
+    conformance_classes: List[str] = attr.ib(factory=list)
+    schema_href: Optional[str] = attr.ib(default=None)
+    router: APIRouter = attr.ib(factory=APIRouter)
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app (fastapi.FastAPI): target FastAPI application.
+
+        Returns:
+            None
+        """
+
+        async def diff_items(
+            request: Request,
+            collection_id: Annotated[str, Path(description="Collection ID")],
+            items_diff_request: ItemsDiffRequest,
+        ):
+            """Compare items with the items of a collection."""
+            if len(items_diff_request.items) > self.max_items:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"At most {self.max_items} items can be compared",
+                )
+            return await self.client.diff_items(
+                collection_id,
+                [item.model_dump() for item in items_diff_request.items],
+                request=request,
+            )
+
+        self.router.prefix = app.state.router_prefix
+        self.router.add_api_route(
+            name="Diff Items",
+            path="/collections/{collection_id}/items/diff",
+            methods=["POST"],
+            endpoint=diff_items,
+        )
+        app.include_router(self.router, tags=["Items Diff Extension"])
@@ -0,0 +1,80 @@
+"""Items get extension."""
+
+import os
+from typing import Any, List, Optional
+
+import attr
+from fastapi import APIRouter, FastAPI, HTTPException, Path, Request
+from pydantic import BaseModel, Field
+from typing_extensions import Annotated
+
+from stac_fastapi.types.extension import ApiExtension
+
+
+class ItemsGetRequest(BaseModel):
+    """Schema of the POST request."""
+
+    ids: List[str] = Field(
+        ...,
+        description="Ids of the items to get.",
+        json_schema_extra={"example": ["item-1", "item-2"]},
+    )
+
+
+@attr.s
+class ItemsGetExtension(ApiExtension):
+    """Items Get Extension.
+
+    The Items Get extension adds a `POST /collections/{collection_id}/items/get`
+    endpoint taking a list of item ids. The items of the collection with these ids are
+    read by one query and returned as an item collection, in the order of the ids.
+    Unknown ids are left out.
+
+    Attributes:
+        client: Core client reading the items, see `CoreClient.get_items`.
+        max_ids (int): Maximum number of ids of a request, `STAC_ITEMS_GET_MAX_IDS`.
+        conformance_classes (list): Defines the list of conformance classes for
+            the extension
+    """
+
+    client: Any = attr.ib()
+    max_ids: int = attr.ib(
+        factory=lambda: int(os.getenv("STAC_ITEMS_GET_MAX_IDS", "1000"))
+    )
+    conformance_classes: List[str] = attr.ib(factory=list)
+    schema_href: Optional[str] = attr.ib(default=None)
+    router: APIRouter = attr.ib(factory=APIRouter)
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app (fastapi.FastAPI): target FastAPI application.
+
+        Returns:
+            None
+        """
+
+        async def get_items(
+            request: Request,
+            collection_id: Annotated[str, Path(description="Collection ID")],
+            items_get_request: ItemsGetRequest,
+        ):
+            """Get the items of a collection by id."""
+            if len(items_get_request.ids) > self.max_ids:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"At most {self.max_ids} items can be requested",
+                )
+            return await self.client.get_items(
+                collection_id, items_get_request.ids, request=request
+            )
+
+        self.router.prefix = app.state.router_prefix
+        self.router.add_api_route(
+            name="Get Items",
+            path="/collections/{collection_id}/items/get",
+            methods=["POST"],
+            endpoint=get_items,
+        )
+        app.include_router(self.router, tags=["Items Get Extension"])
@@ -0,0 +1,86 @@
+"""Near extension."""
+
+from typing import List, Optional
+
+import attr
+from fastapi import FastAPI, Query
+from pydantic import BaseModel, Field
+from typing_extensions import Annotated
+
+from stac_fastapi.types.extension import ApiExtension
+from stac_fastapi.types.search import APIRequest
+
+
+def _near_converter(
+    val: Annotated[
+        Optional[str],
+        Query(
+            description="Longitude and latitude of the point to sort the items by distance to.",
+            openapi_examples={
+                "user-provided": {"value": None},
+                "Sydney": {"value": "151.21,-33.87"},
+            },
+        ),
+    ] = None,
+) -> Optional[List[float]]:
+    if not val:
+        return None
+    return [float(coordinate) for coordinate in val.split(",")]
+
+
+@attr.s
+class NearExtensionGetRequest(APIRequest):
+    """Additional fields for the GET request."""
+
+    near: Optional[List[float]] = attr.ib(default=None, converter=_near_converter)
+    max_distance: Annotated[
+        Optional[float],
+        Query(description="Maximum distance to the point, in meters."),
+    ] = attr.ib(default=None)
+
+
+class NearExtensionPostRequest(BaseModel):
+    """Additional fields and schema for the POST request."""
+
+    near: Optional[List[float]] = Field(
+        None,
+        description="Longitude and latitude of the point to sort the items by distance to.",
+        json_schema_extra={"example": [151.21, -33.87]},
+    )
+    max_distance: Optional[float] = Field(
+        None,
+        description="Maximum distance to the point, in meters.",
+        json_schema_extra={"example": 5000},
+    )
+
+
+@attr.s
+class NearExtension(ApiExtension):
+    """Near Extension.
+
+    The Near extension adds opt-in `near` and `max_distance` parameters to the `/search`
+    endpoint. The matched items are then sorted by the distance of their geometry to the
+    point, closest first, optionally within a maximum distance. The distance in meters is
+    returned in the `near:distance` property of each item.
+
+    Attributes:
+        conformance_classes (list): Defines the list of conformance classes for
+            the extension
+    """
+
+    GET = NearExtensionGetRequest
+    POST = NearExtensionPostRequest
+
+    conformance_classes: List[str] = attr.ib(factory=list)
+    schema_href: Optional[str] = attr.ib(default=None)
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app (fastapi.FastAPI): target FastAPI application.
+
+        Returns:
+            None
+        """
+        pass
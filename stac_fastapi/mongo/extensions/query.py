@@ -0,0 +1,64 @@
+"""Query extension with the operators supported by the MongoDB backend."""
+
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+import attr
+from pydantic import BaseModel, Field
+
+from stac_fastapi.extensions.core.query import QueryExtension as QueryExtensionBase
+from stac_fastapi.extensions.core.query.query import QueryConformanceClasses
+
+
+class Operator(str, Enum):
+    """Defines the set of operators supported by the API."""
+
+    eq = "eq"
+    ne = "ne"
+    neq = "neq"
+    lt = "lt"
+    lte = "lte"
+    gt = "gt"
+    gte = "gte"
+    startsWith = "startsWith"
+    endsWith = "endsWith"
+    contains = "contains"
+    in_ = "in"
+
+
+class QueryExtensionPostRequest(BaseModel):
+    """Queryable validation.
+
+    Add operator validation to the POST request
+    to raise errors for unsupported queries.
+    """
+
+    query: Optional[Dict[str, Dict[Operator, Any]]] = Field(
+        None,
+        description="Allows additional filtering based on the properties of Item objects",  # noqa: E501
+        openapi_examples={
+            "user-provided": {"value": None},
+            "cloudy": {"value": '{"eo:cloud_cover": {"gte": 95}}'},
+            "platforms": {"value": '{"platform": {"in": ["landsat-8", "landsat-9"]}}'},
+            "prefix": {"value": '{"landsat:scene_id": {"startsWith": "LC8"}}'},
+        },
+    )
+
+
+@attr.s
+class QueryExtension(QueryExtensionBase):
+    """Query Extension.
+
+    Override the POST request model to validate the operators
+    translated by `DatabaseLogic.apply_stacql_filter`. These are all the operators
+    of the Query extension, `in`, `neq`, `startsWith`, `endsWith` and `contains`
+    included, which its item search conformance class is advertised for. The
+    items of a collection are not filtered by `query`, so the features
+    conformance class is not.
+    """
+
+    conformance_classes: List[str] = attr.ib(
+        factory=lambda: [QueryConformanceClasses.SEARCH]
+    )
+
+    POST = QueryExtensionPostRequest
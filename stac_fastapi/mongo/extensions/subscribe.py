@@ -0,0 +1,119 @@
+"""Subscription extension."""
+
+import logging
+from typing import Any, List, Optional, Type
+
+import attr
+import orjson
+from fastapi import APIRouter, FastAPI, Header, Query, Request
+from pydantic import BaseModel
+from starlette.responses import StreamingResponse
+from typing_extensions import Annotated
+
+from stac_fastapi.mongo.database_logic import DATABASE, check_change_streams
+from stac_fastapi.mongo.subscriptions import ItemSubscriptions, SubscriptionClosed
+from stac_fastapi.mongo.utilities import serialize_doc
+from stac_fastapi.types.extension import ApiExtension
+from stac_fastapi.types.search import BaseSearchPostRequest
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s
+class SubscriptionExtension(ApiExtension):
+    """Subscription Extension.
+
+    The Subscription extension adds a `POST /search/subscribe` endpoint taking a
+    `/search` request body. The response is a stream of server-sent events, one `item`
+    event for each item inserted or updated afterwards that matches the search, see
+    `ItemSubscriptions`. The id of each event is a resume token: a client reconnecting
+    with the id of its last event, in the `Last-Event-ID` header or the `resume_after`
+    parameter, receives the events it missed. An `error` event ends the stream when the
+    client falls too far behind or the change stream fails, the client can then resume.
+    The change streams require MongoDB to run as a replica set, and `MONGO_DB` to name
+    a database other than `admin`, `local` and `config`; the endpoint is not added
+    otherwise.
+
+    Attributes:
+        client: Core client building the searches, see `CoreClient.build_search`.
+        search_post_request_model: Model of the `/search` request bodies.
+        conformance_classes (list): Defines the list of conformance classes for
+            the extension
+    """
+
+    client: Any = attr.ib()
+    search_post_request_model: Type[BaseModel] = attr.ib(default=BaseSearchPostRequest)
+    conformance_classes: List[str] = attr.ib(factory=list)
+    schema_href: Optional[str] = attr.ib(default=None)
+    router: APIRouter = attr.ib(factory=APIRouter)
+    subscriptions: Optional[ItemSubscriptions] = attr.ib(default=None)
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app (fastapi.FastAPI): target FastAPI application.
+
+        Returns:
+            None
+        """
+        try:
+            check_change_streams(DATABASE)
+        except ValueError as e:
+            logger.warning(f"The subscriptions are disabled: {e}")
+            return
+
+        if self.subscriptions is None:
+            self.subscriptions = ItemSubscriptions(self.client.database)
+        subscriptions = self.subscriptions
+        search_post_request_model = self.search_post_request_model
+
+        async def subscribe(
+            request: Request,
+            search_request: search_post_request_model,  # type: ignore
+            resume_after: Annotated[
+                Optional[str],
+                Query(description="Id of the last event received, to resume from."),
+            ] = None,
+            last_event_id: Annotated[Optional[str], Header()] = None,
+        ):
+            """Stream the items written that match a search."""
+            base_url = str(request.base_url)
+            search = self.client.build_search(search_request)
+            query = await self.client.database.build_query(
+                search, search_request.collections  # type: ignore
+            )
+
+            async def stream():
+                try:
+                    async for event in subscriptions.events(
+                        query, resume_after=resume_after or last_event_id
+                    ):
+                        if event is None:
+                            yield ": heartbeat\n\n"
+                            continue
+                        token, document = event
+                        item = self.client.item_serializer.db_to_stac(
+                            serialize_doc(document), base_url=base_url
+                        )
+                        data = orjson.dumps(item).decode()
+                        yield f"id: {token}\nevent: item\ndata: {data}\n\n"
+                except SubscriptionClosed as e:
+                    data = orjson.dumps({"detail": str(e)}).decode()
+                    yield f"event: error\ndata: {data}\n\n"
+
+            return StreamingResponse(
+                stream(),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache"},
+            )
+
+        self.router.prefix = app.state.router_prefix
+        self.router.add_api_route(
+            name="Subscribe",
+            path="/search/subscribe",
+            methods=["POST"],
+            endpoint=subscribe,
+        )
+        app.include_router(self.router, tags=["Subscription Extension"])
+        app.add_event_handler("shutdown", subscriptions.close)
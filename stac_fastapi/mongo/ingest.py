@@ -0,0 +1,505 @@
+"""Asynchronous ingest of items through a local append-only spool."""
+
+import asyncio
+import fcntl
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+import orjson
+from pymongo import UpdateOne
+from pymongo.errors import ConnectionFailure
+
+from stac_fastapi.mongo.database_logic import (
+    CHECKSUM_FIELD,
+    DATABASE,
+    ITEMS_INDEX,
+    DatabaseLogic,
+    item_checksum,
+)
+from stac_fastapi.mongo.timeouts import TIMEOUT_ERRORS
+from stac_fastapi.mongo.utilities import GroupCommitWriter
+from stac_fastapi.types.errors import ConflictError, NotFoundError
+
+logger = logging.getLogger(__name__)
+
+INGEST_SPOOL = os.getenv("STAC_INGEST_SPOOL")
+INGEST_JOBS_INDEX = os.getenv("STAC_INGEST_JOBS_INDEX", "ingest_jobs")
+INGEST_BATCH_SIZE = int(os.getenv("STAC_INGEST_BATCH_SIZE", "1000"))
+INGEST_SPOOL_MAX_BYTES = int(os.getenv("STAC_INGEST_SPOOL_MAX_BYTES", str(1 << 30)))
+INGEST_RETRY_INTERVAL = float(os.getenv("STAC_INGEST_RETRY_INTERVAL", "5"))
+INGEST_MAX_ATTEMPTS = int(os.getenv("STAC_INGEST_MAX_ATTEMPTS", "3"))
+# Errors kept per job, the others are only counted
+INGEST_MAX_ERRORS = 100
+
+# A spooled request: its job id, collection, base URL and items
+SpoolRecord = Dict[str, Any]
+
+# The errors of an unavailable or overloaded database, retried until it recovers
+UNAVAILABLE_ERRORS = (ConnectionFailure, *TIMEOUT_ERRORS)
+
+
+class SpoolFull(Exception):
+    """The spool holds more than its maximum of items waiting to be written."""
+
+
+class SpoolInUse(Exception):
+    """The spool is locked by the ingest queue of another process."""
+
+
+class IngestQueue:
+    """
+    Accept item writes into a local spool and write them to the database in bulk.
+
+    Each accepted request is a job, appended as one line to the spool file, the appends
+    of one event loop tick being written and synced to disk together. A worker reads the
+    spool in batches of at least `batch_size` items, inserts each batch with one
+    unordered write, see `DatabaseLogic.insert_items`, and records the outcome of its
+    jobs in the `STAC_INGEST_JOBS_INDEX` collection. The position of the worker is saved
+    next to the spool, so that the jobs accepted before a restart are written after it.
+    A job whose batch was inserted but not recorded before a crash is written again, its
+    items already stored with the same checksum then counting as written.
+
+    The spool is locked by the process running the queue, each process of the API,
+    such as each worker of a server, needs a spool of its own.
+
+    Batches failing as a whole, when the database is unavailable or overloaded, are
+    retried every `retry_interval` seconds, and requests are refused with `SpoolFull`
+    once the spool holds `max_bytes` not yet written. A batch failing otherwise, such as
+    on an item the database cannot store, is retried `max_attempts` times and its jobs
+    are then recorded as failed.
+
+    Attributes:
+        database (DatabaseLogic): The database the items are written to.
+        path (str): The path of the spool file, `STAC_INGEST_SPOOL`.
+        batch_size (int): Number of items written at once, `STAC_INGEST_BATCH_SIZE`.
+        max_bytes (int): Size of the jobs waiting in the spool above which requests are
+            refused, `STAC_INGEST_SPOOL_MAX_BYTES`.
+        retry_interval (float): Seconds between the attempts to write a failed batch,
+            `STAC_INGEST_RETRY_INTERVAL`.
+        max_attempts (int): Number of attempts to write a batch failing other than on
+            an unavailable database, `STAC_INGEST_MAX_ATTEMPTS`.
+        queued (dict): The collection and number of items of the jobs not yet written.
+    """
+
+    def __init__(
+        self,
+        database: DatabaseLogic,
+        path: str,
+        batch_size: int = INGEST_BATCH_SIZE,
+        max_bytes: int = INGEST_SPOOL_MAX_BYTES,
+        retry_interval: float = INGEST_RETRY_INTERVAL,
+        max_attempts: int = INGEST_MAX_ATTEMPTS,
+    ):
+        """Initialize the IngestQueue, the spool is only opened by `open_spool`."""
+        self.database = database
+        self.path = path
+        self.offset_path = f"{path}.offset"
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.retry_interval = retry_interval
+        self.max_attempts = max_attempts
+        self.queued: Dict[str, Dict[str, Any]] = {}
+        self.appender = GroupCommitWriter(
+            self._append_lines, window=0, max_size=batch_size
+        )
+        self.task: Optional[asyncio.Future] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_file: Optional[IO] = None
+        self.offset = self.size = 0
+
+    @property
+    def jobs(self):
+        """Get the collection of the outcomes of the written jobs."""
+        return self.database.client[DATABASE][INGEST_JOBS_INDEX]
+
+    def open_spool(self) -> None:
+        """
+        Lock the spool for this process and recover the jobs left in it.
+
+        Raises:
+            SpoolInUse: If the queue of another process locked the spool.
+        """
+        lock_file = open(f"{self.path}.lock", "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise SpoolInUse(
+                f"The ingest spool {self.path} is used by another process, give each "
+                "process a STAC_INGEST_SPOOL of its own"
+            )
+        self._lock_file = lock_file
+        self.offset, self.size = self._recover()
+
+    def _recover(self) -> Tuple[int, int]:
+        """Read the saved position, drop a torn last line and list the queued jobs."""
+        offset = 0
+        if os.path.exists(self.offset_path):
+            with open(self.offset_path) as f:
+                offset = int(f.read() or 0)
+        if not os.path.exists(self.path):
+            open(self.path, "ab").close()
+        offset = min(offset, os.path.getsize(self.path))
+
+        with open(self.path, "rb+") as f:
+            f.seek(offset)
+            end = offset
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                record = orjson.loads(line)
+                self.queued[record["job"]] = {
+                    "collection": record["collection"],
+                    "accepted": len(record["items"]),
+                }
+                end += len(line)
+            # A line whose append was interrupted is not a job
+            f.truncate(end)
+        return offset, end
+
+    def _append(self, data: bytes) -> None:
+        with open(self.path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def _append_lines(self, lines: List[bytes]) -> List[Optional[BaseException]]:
+        """Append lines to the spool and sync it, see `GroupCommitWriter`."""
+        data = b"".join(lines)
+        async with self.lock:
+            await asyncio.get_running_loop().run_in_executor(None, self._append, data)
+            self.size += len(data)
+        return [None] * len(lines)
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        """Get the lock of the appends to the spool and of its truncation."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def submit(
+        self, collection_id: str, items: List[Dict[str, Any]], base_url: str
+    ) -> str:
+        """
+        Append the items of a request to the spool.
+
+        Args:
+            collection_id (str): The id of the collection of the items.
+            items (List[Dict[str, Any]]): The validated items.
+            base_url (str): The base URL of the request.
+
+        Returns:
+            str: The id of the job writing the items.
+
+        Raises:
+            SpoolFull: If the spool holds `max_bytes` of jobs waiting to be written.
+        """
+        if self.size - self.offset >= self.max_bytes:
+            raise SpoolFull(
+                f"{self.size - self.offset} bytes are waiting to be written"
+            )
+
+        job_id = uuid.uuid4().hex
+        line = orjson.dumps(
+            {
+                "job": job_id,
+                "collection": collection_id,
+                "base_url": base_url,
+                "items": items,
+            }
+        )
+        # Known before the worker can write it
+        self.queued[job_id] = {"collection": collection_id, "accepted": len(items)}
+        try:
+            await self.appender.write(line + b"\n")
+        except Exception:
+            self.queued.pop(job_id, None)
+            raise
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    async def job_status(self, job_id: str) -> Dict[str, Any]:
+        """
+        Get the progress of a job.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Returns:
+            Dict[str, Any]: The collection of the job, its status, `queued`, `succeeded`
+                or `failed` when some items could not be written, and the numbers of items
+                accepted, written and failed with the errors of the failed ones.
+
+        Raises:
+            NotFoundError: If the job is unknown, or was accepted by another instance and
+                is not written yet.
+        """
+        queued = self.queued.get(job_id)
+        if queued is not None:
+            return {
+                "id": job_id,
+                "status": "queued",
+                **queued,
+                "written": 0,
+                "failed": 0,
+                "errors": [],
+            }
+
+        job = await self.jobs.find_one({"_id": job_id})
+        if job is None:
+            raise NotFoundError(f"Ingest job {job_id} not found")
+        job["id"] = job.pop("_id")
+        job["status"] = "failed" if job["failed"] else "succeeded"
+        return job
+
+    def _read(self, offset: int) -> Tuple[List[SpoolRecord], int]:
+        """Read the jobs following an offset, up to at least `batch_size` items."""
+        records: List[SpoolRecord] = []
+        count = 0
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            while count < self.batch_size:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break
+                records.append(orjson.loads(line))
+                count += len(records[-1]["items"])
+                offset += len(line)
+        return records, offset
+
+    def _save_offset(self, offset: int) -> None:
+        temporary = f"{self.offset_path}.tmp"
+        with open(temporary, "w") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.offset_path)
+
+    async def _write(self, records: List[SpoolRecord]) -> None:
+        """Write the items of a batch of jobs and record their outcome."""
+        recorded = {
+            job["_id"]
+            for job in await self.jobs.find(
+                {"_id": {"$in": [record["job"] for record in records]}}, {"_id": True}
+            ).to_list(length=None)
+        }
+
+        documents: List[Dict[str, Any]] = []
+        owners: List[str] = []
+        outcomes: Dict[str, Dict[str, Any]] = {}
+        existing: Dict[str, bool] = {}
+        for record in records:
+            job_id, collection_id = record["job"], record["collection"]
+            if job_id in recorded:
+                # Written before a restart
+                continue
+            outcome = outcomes[job_id] = {
+                "collection": collection_id,
+                "accepted": len(record["items"]),
+                "written": 0,
+                "errors": [],
+            }
+            if collection_id not in existing:
+                try:
+                    await self.database.check_collection_exists(collection_id)
+                    existing[collection_id] = True
+                except NotFoundError:
+                    existing[collection_id] = False
+            if not existing[collection_id]:
+                outcome["errors"] = [
+                    {
+                        "id": item["id"],
+                        "detail": f"Collection {collection_id} not found",
+                    }
+                    for item in record["items"]
+                ]
+                continue
+
+            for item in record["items"]:
+                document = self.database.item_serializer.stac_to_db(
+                    item, record["base_url"]
+                )
+                document[CHECKSUM_FIELD] = item_checksum(item)
+                documents.append(document)
+                owners.append(job_id)
+
+        if documents:
+            errors = await self.database.insert_items(documents, bulk=True)
+            stored = await self._stored_checksums(
+                [
+                    document
+                    for document, error in zip(documents, errors)
+                    if isinstance(error, ConflictError)
+                ]
+            )
+            for document, job_id, error in zip(documents, owners, errors):
+                key = (document["collection"], document["id"])
+                if stored.get(key) == document[CHECKSUM_FIELD]:
+                    # Inserted by this job before a crash, or by an identical one
+                    error = None
+                if error is None:
+                    outcomes[job_id]["written"] += 1
+                else:
+                    outcomes[job_id]["errors"].append(
+                        {"id": document["id"], "detail": str(error)}
+                    )
+
+        now = datetime.now(timezone.utc)
+        if outcomes:
+            await self.jobs.bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": job_id},
+                        {
+                            "$setOnInsert": {
+                                "collection": outcome["collection"],
+                                "accepted": outcome["accepted"],
+                                "written": outcome["written"],
+                                "failed": len(outcome["errors"]),
+                                "errors": outcome["errors"][:INGEST_MAX_ERRORS],
+                                "completed": now,
+                            }
+                        },
+                        upsert=True,
+                    )
+                    for job_id, outcome in outcomes.items()
+                ],
+                ordered=False,
+            )
+
+    async def _fail(self, records: List[SpoolRecord], error: BaseException) -> None:
+        """Record the jobs of a batch that could not be written as failed."""
+        now = datetime.now(timezone.utc)
+        await self.jobs.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": record["job"]},
+                    {
+                        "$setOnInsert": {
+                            "collection": record["collection"],
+                            "accepted": len(record["items"]),
+                            "written": 0,
+                            "failed": len(record["items"]),
+                            "errors": [
+                                {"id": item.get("id"), "detail": str(error)}
+                                for item in record["items"][:INGEST_MAX_ERRORS]
+                            ],
+                            "completed": now,
+                        }
+                    },
+                    upsert=True,
+                )
+                for record in records
+            ],
+            ordered=False,
+        )
+
+    async def _stored_checksums(
+        self, documents: List[Dict[str, Any]]
+    ) -> Dict[Tuple[str, str], str]:
+        """Get the checksums of the stored items with the ids of documents."""
+        if not documents:
+            return {}
+        items = self.database.client[DATABASE][ITEMS_INDEX]
+        stored = items.find(
+            {
+                "$or": [
+                    {"collection": document["collection"], "id": document["id"]}
+                    for document in documents
+                ]
+            },
+            {"collection": True, "id": True, CHECKSUM_FIELD: True},
+        )
+        return {
+            (item["collection"], item["id"]): item.get(CHECKSUM_FIELD)
+            async for item in stored
+        }
+
+    async def _drain(self) -> None:
+        """Write the spooled jobs as they come, until cancelled."""
+        assert self._wakeup is not None
+        loop = asyncio.get_running_loop()
+        attempts = 0
+        error: Optional[BaseException] = None
+        while True:
+            self._wakeup.clear()
+            records, offset = await loop.run_in_executor(None, self._read, self.offset)
+            if not records:
+                async with self.lock:
+                    if self.size == self.offset and self.offset > 0:
+                        # Everything was written, the spool starts over. The jobs
+                        # read again after a crash in between are skipped as recorded
+                        await loop.run_in_executor(None, self._save_offset, 0)
+                        await loop.run_in_executor(None, os.truncate, self.path, 0)
+                        self.offset = self.size = 0
+                await self._wakeup.wait()
+                continue
+
+            try:
+                if error is None:
+                    await self._write(records)
+                else:
+                    await self._fail(records, error)
+            except UNAVAILABLE_ERRORS as e:
+                logger.error(
+                    f"Failed to write {len(records)} ingest jobs, retrying in "
+                    f"{self.retry_interval} seconds: {e}"
+                )
+                await asyncio.sleep(self.retry_interval)
+                continue
+            except Exception as e:
+                attempts += 1
+                logger.exception(
+                    f"Failed to write {len(records)} ingest jobs, attempt {attempts} "
+                    f"of {self.max_attempts}"
+                )
+                if attempts >= self.max_attempts and error is None:
+                    # Recorded as failed on the next turn, without another attempt
+                    error = e
+                else:
+                    await asyncio.sleep(self.retry_interval)
+                continue
+
+            attempts, error = 0, None
+            await loop.run_in_executor(None, self._save_offset, offset)
+            self.offset = offset
+            for record in records:
+                self.queued.pop(record["job"], None)
+
+    def start(self) -> None:
+        """
+        Open the spool and start writing its jobs.
+
+        Raises:
+            SpoolInUse: If the queue of another process locked the spool.
+        """
+        self.open_spool()
+        self._wakeup = asyncio.Event()
+        self.task = asyncio.ensure_future(self._drain())
+        self.task.add_done_callback(self._drained)
+
+    @staticmethod
+    def _drained(task: asyncio.Future) -> None:
+        """Log the worker stopping otherwise than by `close`."""
+        if not task.cancelled():
+            logger.error(
+                "The ingest worker stopped, the spooled jobs are not written until "
+                "a restart",
+                exc_info=task.exception(),
+            )
+
+    async def close(self) -> None:
+        """Append the accepted jobs and stop writing, the rest is written after a restart."""
+        await self.appender.close()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
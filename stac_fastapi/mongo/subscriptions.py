@@ -0,0 +1,399 @@
+"""Live subscriptions to the item writes, served from one shared change stream."""
+
+import asyncio
+import contextvars
+import logging
+import os
+import re
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from pymongo.errors import PyMongoError
+
+from stac_fastapi.mongo.database_logic import DATABASE, ITEMS_INDEX, DatabaseLogic
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIPTION_QUEUE_SIZE = int(os.getenv("STAC_SUBSCRIPTION_QUEUE_SIZE", "1000"))
+SUBSCRIPTION_REPLAY_SIZE = int(os.getenv("STAC_SUBSCRIPTION_REPLAY_SIZE", "1000"))
+SUBSCRIPTION_HEARTBEAT = float(os.getenv("STAC_SUBSCRIPTION_HEARTBEAT", "15"))
+
+# Item inserts and updates, updates are read with the full item
+CHANGE_STREAM_PIPELINE = [
+    {"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}
+]
+
+# An item written, with the resume token of its change
+ItemEvent = Tuple[str, Dict[str, Any]]
+
+_COMPARISONS = {
+    "$gt": lambda a, b: a > b,
+    "$gte": lambda a, b: a >= b,
+    "$lt": lambda a, b: a < b,
+    "$lte": lambda a, b: a <= b,
+}
+
+
+class SubscriptionClosed(Exception):
+    """The events of a subscription stopped, it can be resumed from its last event."""
+
+
+def _all(results: Iterable[Optional[bool]]) -> Optional[bool]:
+    """Combine results with AND, None standing for an unknown result."""
+    combined: Optional[bool] = True
+    for result in results:
+        if result is False:
+            return False
+        if result is None:
+            combined = None
+    return combined
+
+
+def _any(results: Iterable[Optional[bool]]) -> Optional[bool]:
+    """Combine results with OR, None standing for an unknown result."""
+    combined: Optional[bool] = False
+    for result in results:
+        if result is True:
+            return True
+        if result is None:
+            combined = None
+    return combined
+
+
+def _negate(result: Optional[bool]) -> Optional[bool]:
+    return None if result is None else not result
+
+
+def _values(document: Dict[str, Any], path: str) -> List[Any]:
+    """Return the values of a dotted path, arrays matching by element like in MongoDB."""
+    values: List[Any] = [document]
+    for part in path.split("."):
+        found = []
+        for value in values:
+            if isinstance(value, dict):
+                if part in value:
+                    found.append(value[part])
+            elif isinstance(value, list):
+                if part.isdigit() and int(part) < len(value):
+                    found.append(value[int(part)])
+                found.extend(
+                    v[part] for v in value if isinstance(v, dict) and part in v
+                )
+        values = found
+
+    expanded = []
+    for value in values:
+        expanded.append(value)
+        if isinstance(value, list):
+            expanded.extend(value)
+    return expanded
+
+
+def _equals(values: List[Any], expected: Any) -> bool:
+    if expected is None and not values:
+        # Null matches missing fields
+        return True
+    return any(value == expected for value in values)
+
+
+def _regex(values: List[Any], pattern: Any, options: str = "") -> bool:
+    if not isinstance(pattern, re.Pattern):
+        flags = 0
+        for option, flag in (("i", re.I), ("m", re.M), ("s", re.S), ("x", re.X)):
+            if option in options:
+                flags |= flag
+        pattern = re.compile(pattern, flags)
+    return any(isinstance(value, str) and pattern.search(value) for value in values)
+
+
+def _match_operator(
+    values: List[Any], operator: str, argument: Any, condition: Dict[str, Any]
+) -> Optional[bool]:
+    if operator == "$eq":
+        return _equals(values, argument)
+    if operator == "$ne":
+        return not _equals(values, argument)
+    if operator in _COMPARISONS:
+        compare = _COMPARISONS[operator]
+        matched = False
+        for value in values:
+            try:
+                matched = matched or compare(value, argument)
+            except TypeError:
+                # Values of other types do not match, like in MongoDB
+                pass
+        return matched
+    if operator == "$in":
+        return any(_equals(values, expected) for expected in argument)
+    if operator == "$nin":
+        return not any(_equals(values, expected) for expected in argument)
+    if operator == "$exists":
+        return bool(values) == bool(argument)
+    if operator == "$regex":
+        return _regex(values, argument, condition.get("$options", ""))
+    if operator == "$options":
+        return True
+    if operator == "$not":
+        if isinstance(argument, dict):
+            return _negate(_match_condition(values, argument))
+        return not _regex(values, argument)
+    # Geospatial and other operators are left to the database
+    return None
+
+
+def _match_condition(values: List[Any], condition: Any) -> Optional[bool]:
+    if (
+        isinstance(condition, dict)
+        and condition
+        and all(key.startswith("$") for key in condition)
+    ):
+        return _all(
+            _match_operator(values, operator, argument, condition)
+            for operator, argument in condition.items()
+        )
+    return _equals(values, condition)
+
+
+def match_query(document: Dict[str, Any], query: Dict[str, Any]) -> Optional[bool]:
+    """
+    Evaluate a MongoDB query on a document in process.
+
+    The logical, comparison, element and regular expression operators are evaluated,
+    other operators such as the geospatial ones and `$text` are not.
+
+    Args:
+        document (Dict[str, Any]): The document.
+        query (Dict[str, Any]): The query, as built by `DatabaseLogic.build_query`.
+
+    Returns:
+        Optional[bool]: Whether the document matches the query, None if this depends on
+            operators that are not evaluated in process.
+    """
+    results: List[Optional[bool]] = []
+    for key, condition in query.items():
+        if key == "$and":
+            result = _all(match_query(document, q) for q in condition)
+        elif key == "$or":
+            result = _any(match_query(document, q) for q in condition)
+        elif key == "$nor":
+            result = _negate(_any(match_query(document, q) for q in condition))
+        elif key.startswith("$"):
+            result = None
+        else:
+            result = _match_condition(_values(document, key), condition)
+        if result is False:
+            return False
+        results.append(result)
+    return _all(results)
+
+
+class _Subscriber:
+    """The query of a subscription and the queue of its matching events."""
+
+    def __init__(self, query: Dict[str, Any], queue_size: int):
+        self.query = query
+        # Events whose match is unknown are confirmed by the database before delivery
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed: Optional[str] = None
+
+    def offer(self, event: ItemEvent) -> None:
+        if self.closed:
+            return
+        matched = match_query(event[1], self.query)
+        if matched is False:
+            return
+        try:
+            self.queue.put_nowait((event, matched is None))
+        except asyncio.QueueFull:
+            self.close("The subscriber is too slow, resume from its last event")
+
+    def close(self, reason: str) -> None:
+        self.closed = reason
+        # Wake up the subscriber if it waits for an event
+        if self.queue.empty():
+            self.queue.put_nowait(None)
+
+
+class ItemSubscriptions:
+    """
+    Fan out the item writes of one shared change stream to many subscribers.
+
+    The change stream on the items collection is opened for the first subscriber and
+    closed with the last one. Each written item is matched against the query of every
+    subscriber in process, see `match_query`, and queued for the subscribers it
+    matches. The last events are kept, so that a subscriber reconnecting with the token
+    of its last event resumes without a gap; older tokens are resumed by a change stream
+    of their own.
+
+    Attributes:
+        database (DatabaseLogic): The database of the items.
+        queue_size (int): Maximum number of events queued for a subscriber, a slower
+            subscriber is closed, `STAC_SUBSCRIPTION_QUEUE_SIZE`.
+        replay_size (int): Number of recent events kept for reconnecting subscribers,
+            `STAC_SUBSCRIPTION_REPLAY_SIZE`.
+        heartbeat (float): Seconds without events after which a subscription yields a
+            heartbeat, `STAC_SUBSCRIPTION_HEARTBEAT`.
+    """
+
+    def __init__(
+        self,
+        database: DatabaseLogic,
+        queue_size: int = SUBSCRIPTION_QUEUE_SIZE,
+        replay_size: int = SUBSCRIPTION_REPLAY_SIZE,
+        heartbeat: float = SUBSCRIPTION_HEARTBEAT,
+    ):
+        """Initialize the ItemSubscriptions with no subscriber."""
+        self.database = database
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.subscribers: Set[_Subscriber] = set()
+        self.replay: Deque[ItemEvent] = deque(maxlen=replay_size)
+        self.ready: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Future] = None
+
+    @property
+    def _items(self):
+        return self.database.client[DATABASE][ITEMS_INDEX]
+
+    def _start(self) -> None:
+        ready = self.ready = asyncio.Event()
+        # The stream outlives the request of the first subscriber
+        self.task = contextvars.Context().run(
+            lambda: asyncio.ensure_future(self._watch(ready))
+        )
+
+    def _stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+        self.task = None
+        # The events of a later stream would not follow the kept ones
+        self.replay.clear()
+
+    async def _watch(self, ready: asyncio.Event) -> None:
+        """Read the shared change stream and publish its events."""
+        try:
+            async with self._items.watch(
+                CHANGE_STREAM_PIPELINE, full_document="updateLookup"
+            ) as stream:
+                ready.set()
+                async for change in stream:
+                    self._publish(change)
+        except PyMongoError as e:
+            logger.error(f"Item change stream failed: {e}")
+            for subscriber in self.subscribers:
+                subscriber.close(f"The change stream failed: {e}")
+            self._stop()
+        finally:
+            # The subscribers waiting for the stream are closed if it failed to open
+            ready.set()
+
+    def _publish(self, change: Dict[str, Any]) -> None:
+        document = change.get("fullDocument")
+        if document is None:
+            # The item was deleted before its update could be read
+            return
+        event = (change["_id"]["_data"], document)
+        self.replay.append(event)
+        for subscriber in self.subscribers:
+            subscriber.offer(event)
+
+    async def _confirm(self, document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+        """Match a document with the database, for the operators not evaluated in process."""
+        return (
+            await self._items.find_one(
+                {"$and": [{"_id": document["_id"]}, query]}, {"_id": True}
+            )
+            is not None
+        )
+
+    async def events(
+        self, query: Dict[str, Any], resume_after: Optional[str] = None
+    ) -> AsyncIterator[Optional[ItemEvent]]:
+        """
+        Subscribe to the items written that match a query.
+
+        Args:
+            query (Dict[str, Any]): The query the items must match.
+            resume_after (Optional[str]): The token of the last event received, to resume
+                a subscription from.
+
+        Yields:
+            Optional[ItemEvent]: The token of the change and the item document of the
+                matching writes, None as a heartbeat.
+
+        Raises:
+            SubscriptionClosed: If the subscriber falls too far behind or the change
+                stream fails.
+        """
+        subscriber = _Subscriber(query, self.queue_size)
+        if resume_after:
+            tokens = [token for token, _ in self.replay]
+            if resume_after not in tokens:
+                async for event in self._resume(query, resume_after):
+                    yield event
+                return
+            # Queued before joining, no event can be published in between
+            for event in list(self.replay)[tokens.index(resume_after) + 1 :]:
+                subscriber.offer(event)
+
+        self.subscribers.add(subscriber)
+        if self.task is None:
+            self._start()
+        ready = self.ready
+        try:
+            # The writes made before the stream opened would be missed
+            if ready is not None:
+                await ready.wait()
+            while True:
+                if subscriber.closed and subscriber.queue.empty():
+                    raise SubscriptionClosed(subscriber.closed)
+                try:
+                    queued = await asyncio.wait_for(
+                        subscriber.queue.get(), timeout=self.heartbeat
+                    )
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if queued is None:
+                    # Woken up to be closed
+                    continue
+                event, confirm = queued
+                if not confirm or await self._confirm(event[1], query):
+                    yield event
+        finally:
+            self.subscribers.discard(subscriber)
+            if not self.subscribers:
+                self._stop()
+
+    async def _resume(
+        self, query: Dict[str, Any], resume_after: str
+    ) -> AsyncIterator[Optional[ItemEvent]]:
+        """Follow a change stream of its own from an event the shared stream no longer holds."""
+        last_event = time.monotonic()
+        try:
+            async with self._items.watch(
+                CHANGE_STREAM_PIPELINE,
+                full_document="updateLookup",
+                resume_after={"_data": resume_after},
+            ) as stream:
+                while True:
+                    change = await stream.try_next()
+                    if change is None or change.get("fullDocument") is None:
+                        if time.monotonic() - last_event >= self.heartbeat:
+                            last_event = time.monotonic()
+                            yield None
+                        continue
+                    event = (change["_id"]["_data"], change["fullDocument"])
+                    matched = match_query(event[1], query)
+                    if matched is None:
+                        matched = await self._confirm(event[1], query)
+                    if matched:
+                        last_event = time.monotonic()
+                        yield event
+        except PyMongoError as e:
+            raise SubscriptionClosed(f"Cannot resume after {resume_after}: {e}")
+
+    async def close(self) -> None:
+        """Close the shared change stream."""
+        self._stop()
@@ -0,0 +1,177 @@
+"""Time budgets of the database operations of a request, and cancellation on disconnect."""
+
+import asyncio
+import json
+import os
+import time
+from contextvars import ContextVar
+from typing import Awaitable, Dict, Optional, TypeVar
+
+import pymongo
+from pymongo.errors import (
+    ExecutionTimeout,
+    NetworkTimeout,
+    ServerSelectionTimeoutError,
+    WaitQueueTimeoutError,
+)
+from starlette import status
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from stac_fastapi.mongo.consistency import session_scope
+from stac_fastapi.mongo.utilities import route_endpoint
+
+# Default time budget of the database operations of a request, 0 for none
+MAX_TIME_MS = int(os.getenv("STAC_MAX_TIME_MS", "0"))
+# Time budgets per endpoint, such as {"POST /search": 10000}
+ENDPOINT_MAX_TIME_MS: Dict[str, int] = json.loads(
+    os.getenv("STAC_ENDPOINT_MAX_TIME_MS", "{}")
+)
+
+# Endpoints whose requests last as long as their clients, such as event streams
+UNBOUNDED_ENDPOINTS = {"POST /search/subscribe"}
+
+# The monotonic time the budget of the current request is spent at, if it has one
+_request_deadline: ContextVar[Optional[float]] = ContextVar(
+    "request_deadline", default=None
+)
+
+T = TypeVar("T")
+
+# Status codes of the timeouts, to add to the exception handlers of the application
+TIMEOUT_STATUS_CODES = {
+    ExecutionTimeout: status.HTTP_504_GATEWAY_TIMEOUT,
+    NetworkTimeout: status.HTTP_504_GATEWAY_TIMEOUT,
+    WaitQueueTimeoutError: status.HTTP_504_GATEWAY_TIMEOUT,
+    ServerSelectionTimeoutError: status.HTTP_503_SERVICE_UNAVAILABLE,
+}
+# The timeouts, to let through to their exception handlers
+TIMEOUT_ERRORS = tuple(TIMEOUT_STATUS_CODES)
+
+
+async def within_budget(call: Awaitable[T]) -> T:
+    """
+    Wait for a call shared with other requests, within the budget of the request.
+
+    A shared call runs without the deadline of the request that started it, see
+    `SingleFlight`, so each request stops waiting for it once its own budget is spent.
+
+    Args:
+        call (Awaitable[T]): The shared call.
+
+    Returns:
+        T: The result of the call.
+
+    Raises:
+        ExecutionTimeout: If the budget of the request is spent first.
+    """
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return await call
+    try:
+        return await asyncio.wait_for(call, max(deadline - time.monotonic(), 0))
+    except asyncio.TimeoutError:
+        raise ExecutionTimeout("The time budget of the request is spent", code=50)
+
+
+class QueryTimeoutMiddleware:
+    """
+    Bound the time a request spends in the database, and stop it when its client leaves.
+
+    The database operations of a request run within `pymongo.timeout`: every command,
+    find, aggregate, count or getMore, is sent with the `maxTimeMS` left of the budget of
+    the request, and fails with `ExecutionTimeout` once it is spent, answered `504`, see
+    `TIMEOUT_STATUS_CODES`. The budget is that of the endpoint in `endpoint_max_time_ms`,
+    keyed on the method and path template of the route, see `route_endpoint`, or
+    `max_time_ms`. The `UNBOUNDED_ENDPOINTS` have no budget.
+
+    The request is cancelled when its client disconnects, and the operations and cursors
+    of its session are killed on the server, see `session_scope`. Reads shared with other
+    requests are only cancelled once all their requests are, see `SingleFlight`.
+
+    Attributes:
+        app (ASGIApp): The wrapped application.
+        max_time_ms (int): The default budget in milliseconds, `STAC_MAX_TIME_MS`, 0 for
+            none.
+        endpoint_max_time_ms (Dict[str, int]): The budgets of endpoints such as
+            `POST /search`, `STAC_ENDPOINT_MAX_TIME_MS`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_time_ms: int = MAX_TIME_MS,
+        endpoint_max_time_ms: Optional[Dict[str, int]] = None,
+    ):
+        """Initialize the QueryTimeoutMiddleware."""
+        self.app = app
+        self.max_time_ms = max_time_ms
+        self.endpoint_max_time_ms = (
+            ENDPOINT_MAX_TIME_MS
+            if endpoint_max_time_ms is None
+            else endpoint_max_time_ms
+        )
+
+    def budget(self, scope: Scope) -> int:
+        """Get the time budget of a request in milliseconds, 0 for none."""
+        if not self.max_time_ms and not self.endpoint_max_time_ms:
+            return 0
+        endpoint = route_endpoint(scope)
+        if endpoint in UNBOUNDED_ENDPOINTS:
+            return 0
+        if endpoint is not None:
+            return self.endpoint_max_time_ms.get(endpoint, self.max_time_ms)
+        return self.max_time_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run a request within its time budget, until its client disconnects."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        budget = self.budget(scope)
+        # The messages of the client are read ahead to notice a disconnection
+        messages: asyncio.Queue = asyncio.Queue()
+
+        async def read_ahead() -> None:
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        async def receive_message() -> Message:
+            return await messages.get()
+
+        responded = False
+
+        async def send_message(message: Message) -> None:
+            nonlocal responded
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                responded = True
+
+        async def run() -> None:
+            async with session_scope():
+                if budget > 0:
+                    _request_deadline.set(time.monotonic() + budget / 1000)
+                    with pymongo.timeout(budget / 1000):
+                        await self.app(scope, receive_message, send_message)
+                else:
+                    await self.app(scope, receive_message, send_message)
+
+        request = asyncio.ensure_future(run())
+        reader = asyncio.ensure_future(read_ahead())
+        try:
+            await asyncio.wait({request, reader}, return_when=asyncio.FIRST_COMPLETED)
+            if not request.done() and not responded:
+                # The client disconnected, nobody waits for the response
+                request.cancel()
+            try:
+                await request
+            except asyncio.CancelledError:
+                if not reader.done():
+                    # Cancelled by the server, not by a disconnection
+                    raise
+        finally:
+            reader.cancel()
+            request.cancel()
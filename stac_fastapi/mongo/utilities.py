@@ -1,10 +1,35 @@
 """utilities for stac-fastapi.mongo."""
 
+import asyncio
+import contextvars
+import copy
+import math
+import time
 from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import Counter, deque
+from contextlib import asynccontextmanager
 from datetime import timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
 from bson import ObjectId
 from dateutil import parser  # type: ignore
+from starlette.routing import Match
+from starlette.types import Scope
+
+T = TypeVar("T")
 
 
 def serialize_doc(doc):
@@ -50,3 +75,387 @@ def parse_datestring(dt_str: str) -> str:
 
     # Format the datetime to the specified format
     return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def route_endpoint(scope: Scope) -> Optional[str]:
+    """
+    Get the endpoint of a request, its method and the path template of its route.
+
+    The path template is relative to the router prefix of the application, such as
+    `GET /collections/{collection_id}/items/{item_id}`.
+
+    Args:
+        scope (Scope): The ASGI scope of the request, once handled by the application.
+
+    Returns:
+        Optional[str]: The endpoint, None if no route matches.
+    """
+    app = scope.get("app")
+    if app is None:
+        return None
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            path = route.path
+            prefix = getattr(app.state, "router_prefix", "")
+            if prefix and path.startswith(prefix):
+                path = path[len(prefix) :] or "/"
+            return f"{scope['method']} {path}"
+    return None
+
+
+class SingleFlight:
+    """
+    Share one in-flight call between identical concurrent calls.
+
+    The first call of an operation for a key runs it; the calls made with the same key
+    while it is running wait for its result instead of running it again. When calls
+    were coalesced each of them gets a copy of the result, so that callers can modify
+    it. The in-flight call is not cancelled when the call that started it is, the other
+    calls still wait for it; it is cancelled once all its calls are, such as when their
+    clients disconnected. It runs in an empty context, rather than with the context
+    variables, such as the deadline, of the call that started it.
+
+    Attributes:
+        in_flight (dict): The running calls, their number of coalesced calls and their
+            number of waiting calls, per operation and key.
+        calls (Counter): The number of calls, per operation.
+        coalesced (Counter): The number of calls that waited for an in-flight call,
+            per operation.
+    """
+
+    def __init__(self):
+        """Initialize the SingleFlight with no call in flight."""
+        self.in_flight: Dict[
+            Tuple[str, Hashable], Tuple[asyncio.Future, List[int], List[int]]
+        ] = {}
+        self.calls: Counter = Counter()
+        self.coalesced: Counter = Counter()
+
+    async def do(
+        self, operation: str, key: Hashable, call: Callable[[], Awaitable[T]]
+    ) -> T:
+        """
+        Run a call, or wait for the identical call in flight.
+
+        Args:
+            operation (str): The name of the operation, the metrics are kept per operation.
+            key (Hashable): The normalized arguments of the call.
+            call (Callable[[], Awaitable[T]]): The call to run.
+
+        Returns:
+            T: The result of the call.
+        """
+        self.calls[operation] += 1
+        flight_key = (operation, key)
+        if flight_key in self.in_flight:
+            future, coalesced, waiting = self.in_flight[flight_key]
+            coalesced[0] += 1
+            self.coalesced[operation] += 1
+        else:
+            future = contextvars.Context().run(lambda: asyncio.ensure_future(call()))
+            coalesced, waiting = [0], [0]
+            self.in_flight[flight_key] = (future, coalesced, waiting)
+            future.add_done_callback(lambda _: self.in_flight.pop(flight_key, None))
+
+        waiting[0] += 1
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            waiting[0] -= 1
+            if not waiting[0] and not future.done():
+                # Every call was cancelled, no one waits for the result
+                future.cancel()
+        # The coalesced calls are all known once the call is done
+        return copy.deepcopy(result) if coalesced[0] else result
+
+    def metrics(self) -> Dict[str, Dict[str, int]]:
+        """Return the number of calls and of coalesced calls, per operation."""
+        return {
+            operation: {"calls": calls, "coalesced": self.coalesced[operation]}
+            for operation, calls in self.calls.items()
+        }
+
+
+class BatchLoader:
+    """
+    Merge the loads of single keys made within one event loop tick into one batch.
+
+    The keys requested while the event loop runs the current callbacks are collected,
+    then loaded together by one call of `load_batch`, scheduled for the next tick. A key
+    requested several times in a batch is loaded once, and each extra request gets a
+    copy of its value. A batch is loaded in an empty context, like the calls of
+    `SingleFlight`.
+
+    Attributes:
+        load_batch (Callable): Loads the values of a list of distinct keys, returning
+            them per key. Keys without a value are left out.
+        pending (dict): The futures of the keys of the next batch.
+        dispatching (set): The tasks loading a batch.
+    """
+
+    def __init__(self, load_batch: Callable[[List[Any]], Awaitable[Dict[Any, Any]]]):
+        """Initialize the BatchLoader with the function loading a batch of keys."""
+        self.load_batch = load_batch
+        self.pending: Dict[Hashable, List[asyncio.Future]] = {}
+        self.dispatching: Set[asyncio.Future] = set()
+
+    async def load(self, key: Hashable) -> Optional[Any]:
+        """
+        Load the value of a key with the other keys of the current tick.
+
+        Args:
+            key (Hashable): The key to load.
+
+        Returns:
+            Optional[Any]: The value of the key, None if there is none.
+        """
+        if not self.pending:
+            # The task first runs after the callbacks already scheduled for this tick
+            task = contextvars.Context().run(
+                lambda: asyncio.ensure_future(self._dispatch())
+            )
+            self.dispatching.add(task)
+            task.add_done_callback(self.dispatching.discard)
+        future = asyncio.get_running_loop().create_future()
+        self.pending.setdefault(key, []).append(future)
+        return await future
+
+    async def _dispatch(self) -> None:
+        """Load the pending keys and resolve their futures."""
+        batch, self.pending = self.pending, {}
+        try:
+            values = await self.load_batch(list(batch))
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for key, futures in batch.items():
+            value = values.get(key)
+            for i, future in enumerate(futures):
+                if not future.done():
+                    future.set_result(value if i == 0 else copy.deepcopy(value))
+
+
+class GroupCommitWriter:
+    """
+    Group the writes of single documents made within a short window into one batch.
+
+    The first write of a batch starts a timer of `window` seconds, and the documents
+    written until it fires, or until `max_size` of them are pending, are written
+    together by one call of `write_batch`. Each write then returns or raises with the
+    outcome of its own document. The batch is written in an empty context, rather than
+    with the context variables, such as the deadline, of the write that started it.
+
+    Attributes:
+        write_batch (Callable): Writes a list of documents, returning for each of them
+            None if it was written or the exception it failed with.
+        window (float): Seconds to wait for more documents after the first of a batch.
+        max_size (int): Number of pending documents that are written without waiting.
+        pending (list): The documents of the next batch with the futures of their writes.
+        flushing (set): The tasks writing a batch.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[Any]], Awaitable[List[Optional[BaseException]]]],
+        window: float,
+        max_size: int,
+    ):
+        """Initialize the GroupCommitWriter with the function writing a batch."""
+        self.write_batch = write_batch
+        self.window = window
+        self.max_size = max_size
+        self.pending: List[Tuple[Any, asyncio.Future]] = []
+        self.flushing: Set[asyncio.Future] = set()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def write(self, document: Any) -> None:
+        """
+        Write a document with the other documents of its batch.
+
+        Args:
+            document (Any): The document to write.
+
+        Raises:
+            Exception: The exception the write of the document failed with.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((document, future))
+        if len(self.pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        try:
+            # A cancelled caller does not cancel the write of its document
+            await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The outcome of the write is then left unread
+            future.add_done_callback(lambda f: f.exception())
+            raise
+
+    def _flush(self) -> None:
+        """Start writing the pending documents."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = contextvars.Context().run(
+                lambda: asyncio.ensure_future(self._write(batch))
+            )
+            self.flushing.add(task)
+            task.add_done_callback(self.flushing.discard)
+
+    async def _write(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        """Write a batch and resolve the futures of its documents."""
+        try:
+            errors = await self.write_batch([document for document, _ in batch])
+        except Exception as e:
+            errors = [e] * len(batch)
+
+        for (_, future), error in zip(batch, errors):
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+    async def close(self) -> None:
+        """Write the pending documents and wait for the batches being written."""
+        self._flush()
+        if self.flushing:
+            await asyncio.gather(*self.flushing, return_exceptions=True)
+
+
+class Overloaded(Exception):
+    """A call was refused, too many calls are waiting for their turn.
+
+    Attributes:
+        retry_after (int): Seconds after which a call is likely to be admitted.
+    """
+
+    def __init__(self, message: str, retry_after: int):
+        """Initialize the Overloaded error with the delay to retry after."""
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """
+    Run at most `limit` calls at once, the others waiting in a bounded queue.
+
+    A call over the limit waits for a running call to finish, in arrival order. It is
+    refused with `Overloaded` when `max_queued` calls are already waiting, or once it
+    waited `queue_timeout` seconds, rather than piling up behind the running ones. The
+    `Retry-After` delay of a refused call is estimated from the mean time a call runs
+    and the number of calls waiting.
+
+    Attributes:
+        limit (int): Maximum number of calls running at once.
+        max_queued (int): Maximum number of calls waiting for their turn.
+        queue_timeout (float): Seconds a call waits at most, 0 for no limit.
+        running (int): Number of calls running.
+        waiters (deque): The futures of the waiting calls, in arrival order.
+        admitted (int): Number of calls run.
+        rejected (Counter): Number of refused calls, per reason, `queue_full` or
+            `timeout`.
+        peak_queued (int): Highest number of calls waiting at once.
+        wait_total (float): Total wait of the admitted calls, in seconds.
+        run_time (float): Moving average of the time a call runs, in seconds.
+    """
+
+    def __init__(self, limit: int, max_queued: int, queue_timeout: float = 0):
+        """Initialize the ConcurrencyLimiter with no call running."""
+        self.limit = limit
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected: Counter = Counter()
+        self.peak_queued = 0
+        self.wait_total = 0.0
+        self.run_time = 0.0
+
+    def retry_after(self) -> int:
+        """Estimate the seconds after which a refused call is likely to be admitted."""
+        return max(1, math.ceil(self.run_time * (len(self.waiters) + 1) / self.limit))
+
+    def _refuse(self, reason: str, message: str) -> Overloaded:
+        self.rejected[reason] += 1
+        return Overloaded(message, self.retry_after())
+
+    async def _acquire(self) -> None:
+        """Wait for the turn of a call."""
+        if self.running < self.limit and not self.waiters:
+            self.running += 1
+            return
+        if len(self.waiters) >= self.max_queued:
+            raise self._refuse(
+                "queue_full", f"{len(self.waiters)} requests are already waiting"
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        self.peak_queued = max(self.peak_queued, len(self.waiters))
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout or None)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Given its turn while giving up, the turn goes to the next call
+                self._release()
+            elif waiter in self.waiters:
+                self.waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._refuse(
+                    "timeout", f"Waited {self.queue_timeout} seconds for its turn"
+                )
+            raise
+
+    def _release(self) -> None:
+        """Give the turn of a finished call to the next waiting call."""
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.running -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Run a call once its turn comes.
+
+        Raises:
+            Overloaded: If too many calls are waiting, or the call waited too long.
+        """
+        queued = time.monotonic()
+        await self._acquire()
+        started = time.monotonic()
+        self.admitted += 1
+        self.wait_total += started - queued
+        try:
+            yield
+        finally:
+            # Recent calls weigh more, the estimate follows changes of load
+            self.run_time += (time.monotonic() - started - self.run_time) / 10
+            self._release()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return the calls running and waiting, and the numbers of admitted and refused calls."""
+        return {
+            "limit": self.limit,
+            "running": self.running,
+            "queued": len(self.waiters),
+            "peak_queued": self.peak_queued,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "wait_mean_ms": round(
+                1000 * self.wait_total / self.admitted if self.admitted else 0, 3
+            ),
+            "run_mean_ms": round(1000 * self.run_time, 3),
+        }
@@ -1,7 +1,17 @@
+import json
 import uuid
 from datetime import datetime, timedelta
 
 import pytest
+from httpx import ASGITransport, AsyncClient
+from pymongo.read_preferences import SecondaryPreferred
+
+from stac_fastapi.mongo.consistency import (
+    OPERATION_TIME_HEADER,
+    CausalConsistencyMiddleware,
+    parse_operation_time,
+)
+from stac_fastapi.mongo.database_logic import create_item_index
 
 from ..conftest import create_collection, create_item
 
@@ -30,6 +40,14 @@ ROUTES = {
     "POST /collections/{collection_id}/items",
     "PUT /collections/{collection_id}",
     "PUT /collections/{collection_id}/items/{item_id}",
+    "GET /aggregations",
+    "POST /aggregations",
+    "GET /collections/{collection_id}/aggregations",
+    "POST /collections/{collection_id}/aggregations",
+    "GET /aggregate",
+    "POST /aggregate",
+    "GET /collections/{collection_id}/aggregate",
+    "POST /collections/{collection_id}/aggregate",
 }
 
 
@@ -222,6 +240,85 @@ async def test_app_query_extension_gte(app_client, ctx):
     assert len(resp.json()["features"]) == 1
 
 
+@pytest.mark.asyncio
+async def test_app_query_extension_in(app_client, ctx):
+    platform = ctx.item["properties"]["platform"]
+    params = {"query": {"platform": {"in": [platform, "sentinel-2a"]}}}
+    resp = await app_client.post("/search", json=params)
+
+    assert resp.status_code == 200
+    assert len(resp.json()["features"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_app_query_extension_in_no_list(app_client, ctx):
+    params = {"query": {"platform": {"in": ctx.item["properties"]["platform"]}}}
+    resp = await app_client.post("/search", json=params)
+
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_app_query_extension_conformance(app_client):
+    resp = await app_client.get("/conformance")
+
+    conforms_to = resp.json()["conformsTo"]
+    assert "https://api.stacspec.org/v1.0.0/item-search#query" in conforms_to
+    assert "https://api.stacspec.org/v1.0.0/ogcapi-features#query" not in conforms_to
+
+
+@pytest.mark.asyncio
+async def test_app_query_extension_neq(app_client, ctx):
+    params = {"query": {"platform": {"neq": ctx.item["properties"]["platform"]}}}
+    resp = await app_client.post("/search", json=params)
+
+    assert resp.status_code == 200
+    assert len(resp.json()["features"]) == 0
+
+
+@pytest.mark.asyncio
+async def test_app_query_extension_starts_with(app_client, ctx):
+    scene_id = ctx.item["properties"]["landsat:scene_id"]
+    params = {"query": {"landsat:scene_id": {"startsWith": scene_id[:5]}}}
+    resp = await app_client.post("/search", json=params)
+
+    assert resp.status_code == 200
+    assert len(resp.json()["features"]) == 1
+
+    params = {"query": {"landsat:scene_id": {"startsWith": scene_id[1:5]}}}
+    resp = await app_client.post("/search", json=params)
+
+    assert resp.status_code == 200
+    assert len(resp.json()["features"]) == 0
+
+
+@pytest.mark.asyncio
+async def test_app_query_extension_ends_with_get(app_client, ctx):
+    scene_id = ctx.item["properties"]["landsat:scene_id"]
+    resp = await app_client.get(
+        "/search",
+        params={"query": json.dumps({"landsat:scene_id": {"endsWith": scene_id[-5:]}})},
+    )
+
+    assert resp.status_code == 200
+    assert len(resp.json()["features"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_app_query_extension_contains(app_client, ctx):
+    params = {"query": {"landsat:product_id": {"contains": "_20200212_"}}}
+    resp = await app_client.post("/search", json=params)
+
+    assert resp.status_code == 200
+    assert len(resp.json()["features"]) == 1
+
+    params = {"query": {"landsat:product_id": {"contains": ".*"}}}
+    resp = await app_client.post("/search", json=params)
+
+    assert resp.status_code == 200
+    assert len(resp.json()["features"]) == 0
+
+
 @pytest.mark.asyncio
 async def test_app_query_extension_limit_lt0(app_client):
     assert (await app_client.post("/search", json={"limit": -1})).status_code == 400
@@ -444,3 +541,265 @@ async def test_search_line_string_intersects(app_client, ctx):
 
     resp_json = resp.json()
     assert len(resp_json["features"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_search_facets_post(app_client, ctx):
+    params = {
+        "collections": [ctx.item["collection"]],
+        "facets": ["platform", "eo:cloud_cover"],
+    }
+    resp = await app_client.post("/search", json=params)
+    assert resp.status_code == 200
+
+    resp_json = resp.json()
+    assert len(resp_json["features"]) == 1
+    assert resp_json["numMatched"] == 1
+
+    platform, cloud_cover = resp_json["facets"]
+    assert platform["name"] == "platform"
+    assert platform["buckets"] == [
+        {"key": "landsat-8", "data_type": "string", "frequency": 1}
+    ]
+    assert platform["overflow"] == 0
+    assert [b["frequency"] for b in cloud_cover["buckets"]] == [1, 0, 0, 0]
+    assert cloud_cover["buckets"][0] == {
+        "key": "*-5.0",
+        "data_type": "numeric",
+        "frequency": 1,
+        "to": 5.0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_search_facets_get(app_client, ctx):
+    resp = await app_client.get("/search", params={"facets": "platform,instrument"})
+    assert resp.status_code == 200
+
+    facets = {facet["name"]: facet for facet in resp.json()["facets"]}
+    assert facets["instrument"]["buckets"][0]["key"] == "OLI_TIRS"
+
+
+@pytest.mark.asyncio
+async def test_search_without_facets(app_client, ctx):
+    resp = await app_client.post("/search", json={})
+    assert resp.status_code == 200
+    assert "facets" not in resp.json()
+
+
+@pytest.mark.asyncio
+async def test_search_invalid_facet(app_client, ctx):
+    resp = await app_client.post("/search", json={"facets": ["$where"]})
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_search_free_text(app_client, txn_client, ctx, load_test_data):
+    await create_item_index()
+
+    titled_item = load_test_data("test_item.json")
+    titled_item["id"] = "test-item-titled"
+    titled_item["properties"]["title"] = "Flood extent over Sydney"
+    titled_item["properties"]["description"] = "Sentinel flood mapping"
+    await create_item(txn_client, titled_item)
+
+    described_item = load_test_data("test_item.json")
+    described_item["id"] = "test-item-described"
+    described_item["properties"]["description"] = "Burn scars after the floods"
+    await create_item(txn_client, described_item)
+
+    # Terms are stemmed, and matches in titles rank first
+    resp = await app_client.get("/search", params={"q": "flooding,sydney"})
+    assert resp.status_code == 200
+    assert [f["id"] for f in resp.json()["features"]] == [
+        "test-item-titled",
+        "test-item-described",
+    ]
+
+    resp = await app_client.post("/search", json={"q": ["burn"]})
+    assert resp.status_code == 200
+    assert [f["id"] for f in resp.json()["features"]] == ["test-item-described"]
+
+
+@pytest.mark.asyncio
+async def test_collections_free_text(app_client, txn_client, ctx, load_test_data):
+    other_collection = load_test_data("test_collection.json")
+    other_collection["id"] = "test-collection-sentinel"
+    other_collection["title"] = "Sentinel 2"
+    other_collection["description"] = "Sentinel 2 imagery"
+    other_collection["keywords"] = ["sentinel"]
+    await create_collection(txn_client, other_collection)
+
+    resp = await app_client.get("/collections", params={"q": "landsat"})
+    assert resp.status_code == 200
+    assert [c["id"] for c in resp.json()["collections"]] == [ctx.collection["id"]]
+
+    resp = await app_client.get("/collections", params={"q": "imagery"})
+    assert resp.status_code == 200
+    assert len(resp.json()["collections"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_collections_free_text_paging(
+    app_client, txn_client, ctx, load_test_data
+):
+    for i in range(3):
+        collection = load_test_data("test_collection.json")
+        collection["id"] = f"test-collection-{i}"
+        await create_collection(txn_client, collection)
+
+    resp = await app_client.get("/collections", params={"q": "landsat", "limit": 3})
+    assert resp.status_code == 200
+    first_page = [c["id"] for c in resp.json()["collections"]]
+    next_link = next(link for link in resp.json()["links"] if link["rel"] == "next")
+
+    resp = await app_client.get(next_link["href"])
+    assert resp.status_code == 200
+    second_page = [c["id"] for c in resp.json()["collections"]]
+    assert len(first_page + second_page) == 4
+    assert not set(first_page) & set(second_page)
+
+
+@pytest.mark.asyncio
+async def test_search_prunes_collections_by_extent(
+    app_client, txn_client, ctx, load_test_data
+):
+    archive = load_test_data("test_collection.json")
+    archive["id"] = "test-collection-archive"
+    archive["extent"]["spatial"]["bbox"] = [[0.0, 40.0, 10.0, 50.0]]
+    archive["extent"]["temporal"]["interval"] = [
+        ["2000-01-01T00:00:00Z", "2005-01-01T00:00:00Z"]
+    ]
+    await create_collection(txn_client, archive)
+
+    database = txn_client.database
+    search = database.apply_bbox_filter(database.make_search(), [5, 45, 6, 46])
+    assert set(await database.prune_collections(search, None)) == {
+        archive["id"],
+        ctx.collection["id"],
+    }
+
+    search = database.apply_datetime_filter(
+        database.make_search(), {"gte": "2020-01-01T00:00:00Z", "lte": None}
+    )
+    assert await database.prune_collections(search, [archive["id"]]) == []
+
+    # The extent of the archive cannot hold the items of the search
+    resp = await app_client.post(
+        "/search",
+        json={
+            "collections": [archive["id"]],
+            "datetime": "2020-01-01T00:00:00Z/..",
+        },
+    )
+    assert resp.status_code == 200
+    assert resp.json()["features"] == []
+    assert resp.json()["numMatched"] == 0
+
+
+@pytest.mark.asyncio
+async def test_search_near(app_client, txn_client, ctx, load_test_data):
+    far_item = load_test_data("test_item.json")
+    far_item["id"] = "test-item-far"
+    far_item["geometry"] = {"type": "Point", "coordinates": [0.0, 0.0]}
+    far_item["bbox"] = [0.0, 0.0, 0.0, 0.0]
+    await create_item(txn_client, far_item)
+
+    # The closest item comes first, with its distance in meters
+    params = {"near": [151.0, -33.5], "limit": 1}
+    resp = await app_client.post("/search", json=params)
+    assert resp.status_code == 200
+    resp_json = resp.json()
+    assert [f["id"] for f in resp_json["features"]] == [ctx.item["id"]]
+    assert resp_json["features"][0]["properties"]["near:distance"] == 0
+    assert resp_json["numMatched"] == 2
+
+    next_link = next(link for link in resp_json["links"] if link["rel"] == "next")
+    resp = await app_client.post("/search", json={**params, **next_link["body"]})
+    assert resp.status_code == 200
+    assert [f["id"] for f in resp.json()["features"]] == [far_item["id"]]
+    assert resp.json()["features"][0]["properties"]["near:distance"] > 1e7
+
+    resp = await app_client.get(
+        "/search", params={"near": "151.0,-33.5", "max_distance": 100000}
+    )
+    assert resp.status_code == 200
+    assert [f["id"] for f in resp.json()["features"]] == [ctx.item["id"]]
+
+
+@pytest.mark.asyncio
+async def test_search_near_invalid(app_client, ctx):
+    resp = await app_client.post("/search", json={"near": [200.0, 0.0]})
+    assert resp.status_code == 400
+
+    resp = await app_client.get("/search", params={"near": "151.0,north"})
+    assert resp.status_code in (400, 422)
+
+
+@pytest.mark.asyncio
+async def test_search_batch(app_client, ctx):
+    searches = [
+        {"ids": [ctx.item["id"]]},
+        {"collections": ["non-existent-collection"]},
+        {"ids": [ctx.item["id"]]},
+    ]
+    resp = await app_client.post("/search/batch", json=searches)
+    assert resp.status_code == 200
+
+    item_collections = resp.json()
+    assert len(item_collections) == 3
+    assert [f["id"] for f in item_collections[0]["features"]] == [ctx.item["id"]]
+    assert item_collections[1]["features"] == []
+    assert item_collections[2] == item_collections[0]
+
+    self_link = next(
+        link for link in item_collections[0]["links"] if link["rel"] == "self"
+    )
+    assert self_link["href"].endswith("/search")
+
+
+@pytest.mark.asyncio
+async def test_search_batch_invalid(app_client, ctx):
+    resp = await app_client.post("/search/batch", json=[{"limit": 1}] * 101)
+    assert resp.status_code == 400
+
+    resp = await app_client.post(
+        "/search/batch", json=[{"limit": 1}, {"bbox": [200, 0, 10, 10]}]
+    )
+    assert resp.status_code in (400, 422)
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes(app, ctx, load_test_data, monkeypatch):
+    monkeypatch.setattr(
+        "stac_fastapi.mongo.database_logic.ITEM_READ_PREFERENCE",
+        SecondaryPreferred(max_staleness=90),
+    )
+    monkeypatch.setattr(
+        "stac_fastapi.mongo.database_logic.SEARCH_READ_PREFERENCE",
+        SecondaryPreferred(max_staleness=90),
+    )
+    async with AsyncClient(
+        transport=ASGITransport(app=CausalConsistencyMiddleware(app)),
+        base_url="http://test-server",
+    ) as client:
+        item = load_test_data("test_item.json")
+        item["id"] = "read-your-writes"
+        resp = await client.post(
+            f"/collections/{ctx.collection['id']}/items", json=item
+        )
+        assert resp.status_code == 201
+        operation_time = resp.headers[OPERATION_TIME_HEADER]
+        assert parse_operation_time(operation_time) is not None
+
+        # Read in a causal session, from a secondary once it applied the write
+        headers = {OPERATION_TIME_HEADER: operation_time}
+        resp = await client.get(
+            f"/collections/{ctx.collection['id']}/items/{item['id']}",
+            headers=headers,
+        )
+        assert resp.status_code == 200
+        assert OPERATION_TIME_HEADER not in resp.headers
+
+        resp = await client.post("/search", json={"ids": [item["id"]]}, headers=headers)
+        assert [f["id"] for f in resp.json()["features"]] == [item["id"]]
@@ -1,12 +1,61 @@
+import asyncio
+import time
 import uuid
 from copy import deepcopy
+from types import SimpleNamespace
 from typing import Callable
 
+import pymongo
 import pytest
+from bson import Timestamp
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from pymongo import WriteConcern, _csot, monitoring
+from pymongo.errors import AutoReconnect, ExecutionTimeout, ServerSelectionTimeoutError
 from stac_pydantic import api
+from starlette.requests import Request
 
 from stac_fastapi.extensions.third_party.bulk_transactions import Items
-from stac_fastapi.types.errors import ConflictError, NotFoundError
+from stac_fastapi.mongo.admission import AdmissionControlMiddleware
+from stac_fastapi.mongo.config import (
+    AsyncMongoDBSettings,
+    MongoClients,
+    PoolMetrics,
+    read_preference_from_env,
+    write_concern_from_env,
+)
+from stac_fastapi.mongo.consistency import (
+    format_operation_time,
+    parse_operation_time,
+    record_write,
+    session_scope,
+)
+from stac_fastapi.mongo.database_logic import (
+    COLLECTION_STATS_INDEX,
+    COLLECTIONS_INDEX,
+    DATABASE,
+    ITEMS_INDEX,
+    QUERYABLES_INDEX,
+    DatabaseLogic,
+    check_change_streams,
+    create_item_index,
+)
+from stac_fastapi.mongo.ingest import IngestQueue, SpoolInUse
+from stac_fastapi.mongo.subscriptions import ItemSubscriptions, match_query
+from stac_fastapi.mongo.timeouts import (
+    QueryTimeoutMiddleware,
+    _request_deadline,
+    within_budget,
+)
+from stac_fastapi.mongo.utilities import (
+    BatchLoader,
+    ConcurrencyLimiter,
+    GroupCommitWriter,
+    Overloaded,
+    SingleFlight,
+)
+from stac_fastapi.types.errors import ConflictError, DatabaseError, NotFoundError
+from stac_fastapi.types.search import BaseSearchPostRequest
 
 from ..conftest import MockRequest, create_item
 
@@ -343,3 +392,922 @@ async def test_landing_page_no_collection_title(ctx, core_client, txn_client, ap
     for link in landing_page["links"]:
         if link["href"].split("/")[-1] == ctx.collection["id"]:
             assert link["title"]
+
+
+def _plan_stages(plan) -> set:
+    """Collect the stages of a query plan returned by explain()."""
+    stages = set()
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.add(plan["stage"])
+        for value in plan.values():
+            stages |= _plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            stages |= _plan_stages(value)
+    return stages
+
+
+async def _explain_winning_plan(database, search) -> set:
+    items = database.client[DATABASE][ITEMS_INDEX]
+    plan = await items.find({"$and": search.filters}).explain()
+    return _plan_stages(plan["queryPlanner"]["winningPlan"])
+
+
+@pytest.mark.asyncio
+async def test_query_starts_with_uses_index(ctx, txn_client):
+    await create_item_index()
+    database = txn_client.database
+    prefix = ctx.item["properties"]["datetime"][:7]
+
+    search = database.apply_stacql_filter(
+        database.make_search(), "startsWith", "properties__datetime", prefix
+    )
+
+    stages = await _explain_winning_plan(database, search)
+    assert "IXSCAN" in stages
+    assert "COLLSCAN" not in stages
+
+
+@pytest.mark.asyncio
+async def test_query_in_uses_index(ctx, txn_client):
+    await create_item_index()
+    database = txn_client.database
+
+    search = database.apply_stacql_filter(
+        database.make_search(),
+        "in",
+        "properties__datetime",
+        [ctx.item["properties"]["datetime"], "2021-01-01T00:00:00Z"],
+    )
+
+    stages = await _explain_winning_plan(database, search)
+    assert "IXSCAN" in stages
+    assert "COLLSCAN" not in stages
+
+
+@pytest.mark.asyncio
+async def test_collection_stats(ctx, core_client, txn_client):
+    item = deepcopy(ctx.item)
+    item["id"] = "test-item-stats"
+    item["properties"]["platform"] = "landsat-9"
+    item["properties"]["datetime"] = "2021-03-04T05:06:07Z"
+    await create_item(txn_client, item)
+
+    coll = await core_client.get_collection(ctx.collection["id"], request=MockRequest())
+    stats = coll["stats"]
+    assert stats["count"] == 2
+    assert sorted(stats["summaries"]["platform"]) == ["landsat-8", "landsat-9"]
+    assert stats["extent"]["temporal"]["interval"] == [
+        ["2020-02-12T12:30:22Z", "2021-03-04T05:06:07Z"]
+    ]
+
+    # The count of a search filtered by collection only is read from the statistics
+    fc = await core_client.item_collection(ctx.collection["id"], request=MockRequest())
+    assert fc["numMatched"] == 2
+
+    await txn_client.delete_item(item["id"], ctx.collection["id"])
+
+    # Deletes keep the count exact without reconciling
+    fc = await core_client.item_collection(ctx.collection["id"], request=MockRequest())
+    assert fc["numMatched"] == 1
+
+    await txn_client.database.reconcile_collection_stats()
+
+    coll = await core_client.get_collection(ctx.collection["id"], request=MockRequest())
+    assert coll["stats"]["count"] == 1
+    assert coll["stats"]["summaries"]["platform"] == ["landsat-8"]
+
+
+def test_collection_stats_updates(load_test_data):
+    item = load_test_data("test_item.json")
+
+    (inserted,) = DatabaseLogic._stats_updates([item, item])
+    update = inserted._doc
+    assert update["$inc"] == {"count": 2, "version": 1}
+    assert "$set" not in update
+    # Statistics first created by a write did not count the earlier items
+    assert update["$setOnInsert"] == {"counted": False, "stale": True}
+
+    (replaced,) = DatabaseLogic._stats_updates([item], replaced=True)
+    update = replaced._doc
+    assert update["$inc"] == {"count": 0, "version": 1}
+    assert update["$set"] == {"stale": True}
+    assert update["$setOnInsert"] == {"counted": False}
+
+
+@pytest.mark.asyncio
+async def test_single_flight_item_reads(ctx, txn_client):
+    database = txn_client.database
+    before = database.single_flight.metrics().get("get_one_item", {})
+
+    items = await asyncio.gather(
+        *(
+            database.get_one_item(ctx.collection["id"], ctx.item["id"])
+            for _ in range(10)
+        )
+    )
+
+    assert all(item["id"] == ctx.item["id"] for item in items)
+    # Every caller gets an item of its own
+    assert len({id(item) for item in items}) == 10
+
+    metrics = database.single_flight.metrics()["get_one_item"]
+    assert metrics["calls"] - before.get("calls", 0) == 10
+    assert metrics["coalesced"] - before.get("coalesced", 0) == 9
+
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_cancelled_caller():
+    single_flight = SingleFlight()
+    runs = []
+
+    async def call():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": 1}
+
+    first = asyncio.ensure_future(single_flight.do("op", "key", call))
+    second = asyncio.ensure_future(single_flight.do("op", "key", call))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == {"value": 1}
+    assert runs == [1]
+    assert single_flight.metrics() == {"op": {"calls": 2, "coalesced": 1}}
+    assert not single_flight.in_flight
+
+
+@pytest.mark.asyncio
+async def test_single_flight_cancels_abandoned_call():
+    single_flight = SingleFlight()
+    cancelled = []
+
+    async def call():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    callers = [
+        asyncio.ensure_future(single_flight.do("op", "key", call)) for _ in range(2)
+    ]
+    await asyncio.sleep(0)
+    for caller in callers:
+        caller.cancel()
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert cancelled == [1]
+    assert not single_flight.in_flight
+
+
+@pytest.mark.asyncio
+async def test_shared_calls_run_without_the_request_deadline():
+    single_flight = SingleFlight()
+    deadlines = []
+
+    async def call():
+        deadlines.append(_csot.get_timeout())
+        await asyncio.sleep(0.2)
+        return "done"
+
+    async def leader():
+        _request_deadline.set(time.monotonic() + 0.05)
+        with pymongo.timeout(0.05):
+            return await within_budget(single_flight.do("op", "key", call))
+
+    leading = asyncio.ensure_future(leader())
+    await asyncio.sleep(0)
+    following = asyncio.ensure_future(single_flight.do("op", "key", call))
+    results = await asyncio.gather(leading, following, return_exceptions=True)
+
+    # The leader stops waiting once its budget is spent, the shared call goes on
+    assert isinstance(results[0], ExecutionTimeout)
+    assert results[1] == "done"
+    assert deadlines == [None]
+
+
+@pytest.mark.asyncio
+async def test_query_timeout_middleware():
+    app = FastAPI()
+    seen = {}
+
+    @app.post("/search")
+    async def search(body: dict):
+        seen["timeout"] = _csot.get_timeout()
+        return body
+
+    @app.post("/search/subscribe")
+    async def subscribe():
+        seen["subscribe_timeout"] = _csot.get_timeout()
+        return {}
+
+    @app.get("/slow")
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            seen["cancelled"] = True
+            raise
+
+    app.add_middleware(
+        QueryTimeoutMiddleware,
+        max_time_ms=100,
+        endpoint_max_time_ms={"POST /search": 250},
+    )
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test-server"
+    ) as client:
+        resp = await client.post("/search", json={"limit": 1})
+        assert resp.json() == {"limit": 1}
+        assert seen["timeout"] == 0.25
+        # Event streams last as long as their clients
+        await client.post("/search/subscribe")
+        assert seen["subscribe_timeout"] is None
+
+    # The request stops when its client disconnects
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(0.05)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/slow",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "app": app,
+    }
+    await asyncio.wait_for(QueryTimeoutMiddleware(app)(scope, receive, send), 2)
+    assert seen["cancelled"]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limiter():
+    limiter = ConcurrencyLimiter(limit=1, max_queued=1, queue_timeout=0.05)
+    order = []
+
+    async def call(name, duration):
+        async with limiter.slot():
+            order.append(name)
+            await asyncio.sleep(duration)
+
+    first = asyncio.ensure_future(call("first", 0.02))
+    second = asyncio.ensure_future(call("second", 0))
+    await asyncio.sleep(0)
+    assert limiter.metrics()["queued"] == 1
+
+    with pytest.raises(Overloaded) as e:
+        await call("third", 0)
+    assert e.value.retry_after >= 1
+
+    await asyncio.gather(first, second)
+    assert order == ["first", "second"]
+
+    # A call waiting longer than the queue timeout is refused
+    first = asyncio.ensure_future(call("first", 0.2))
+    await asyncio.sleep(0)
+    with pytest.raises(Overloaded):
+        await call("late", 0)
+    await first
+
+    metrics = limiter.metrics()
+    assert metrics["admitted"] == 3
+    assert metrics["rejected"] == {"queue_full": 1, "timeout": 1}
+    assert (metrics["running"], metrics["queued"]) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_admission_control_middleware():
+    app = FastAPI()
+    release = asyncio.Event()
+
+    @app.post("/search")
+    async def search():
+        await release.wait()
+        return {}
+
+    @app.get("/collections/{collection_id}/items/{item_id}")
+    async def get_item(collection_id: str, item_id: str):
+        return {"id": item_id}
+
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        limiters={
+            "search": ConcurrencyLimiter(limit=1, max_queued=0),
+            "item": ConcurrencyLimiter(limit=1, max_queued=1),
+        },
+    )
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test-server"
+    ) as client:
+        running = asyncio.ensure_future(client.post("/search", json={}))
+        await asyncio.sleep(0.05)
+
+        # Searches are shed while item reads are still served
+        resp = await client.post("/search", json={})
+        assert resp.status_code == 429
+        assert int(resp.headers["Retry-After"]) >= 1
+        resp = await client.get("/collections/a/items/b")
+        assert resp.json() == {"id": "b"}
+
+        release.set()
+        assert (await running).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_batch_search_entries(core_client, monkeypatch):
+    async def post_search(search_request, request):
+        assert request.scope["path"] == "/search"
+        if search_request.ids == ["missing"]:
+            raise NotFoundError("No such item")
+        return {"type": "FeatureCollection", "features": [], "ids": search_request.ids}
+
+    monkeypatch.setattr(core_client, "post_search", post_search)
+    limiter = ConcurrencyLimiter(limit=2, max_queued=10)
+    request = Request(
+        {"type": "http", "method": "POST", "path": "/search/batch", "headers": []}
+    )
+
+    results = await core_client.batch_search(
+        [
+            BaseSearchPostRequest(ids=["a"]),
+            BaseSearchPostRequest(ids=["missing"]),
+            BaseSearchPostRequest(ids=["a"]),
+        ],
+        request=request,
+        limiter=limiter,
+    )
+
+    # A failed search leaves the others answered
+    assert results[0]["ids"] == ["a"] and results[2] == results[0]
+    assert results[1] == {"code": "NotFoundError", "description": "No such item"}
+    # Each distinct search took a turn of the limiter
+    assert limiter.admitted == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_loader_merges_loads_of_one_tick():
+    batches = []
+
+    async def load_batch(keys):
+        batches.append(sorted(keys))
+        return {key: {"key": key} for key in keys if key != "missing"}
+
+    loader = BatchLoader(load_batch)
+    values = await asyncio.gather(
+        *(loader.load(key) for key in ["a", "b", "missing", "a"])
+    )
+
+    assert batches == [["a", "b", "missing"]]
+    assert values == [{"key": "a"}, {"key": "b"}, None, {"key": "a"}]
+    assert values[0] is not values[3]
+
+    assert await loader.load("c") == {"key": "c"}
+    assert batches[-1] == ["c"]
+
+
+def test_match_query():
+    document = {
+        "collection": "test-collection",
+        "properties": {"platform": "landsat-8", "eo:cloud_cover": 12, "tags": ["a"]},
+    }
+
+    assert match_query(document, {"collection": {"$in": ["test-collection"]}})
+    assert match_query(document, {"properties.tags": "a"})
+    assert match_query(
+        document, {"properties.platform": {"$regex": "^LAND", "$options": "i"}}
+    )
+    assert not match_query(
+        document,
+        {"$and": [{"properties.eo:cloud_cover": {"$lt": 10}}, {"collection": "x"}]},
+    )
+    assert match_query(document, {"properties.missing": None})
+    assert not match_query(document, {"properties.missing": {"$exists": True}})
+    # Geospatial operators are left to the database
+    geometry = {"geometry": {"$geoIntersects": {"$geometry": {"type": "Point"}}}}
+    assert match_query(document, geometry) is None
+    assert match_query(document, {"$or": [geometry, {"collection": "x"}]}) is None
+    assert match_query(document, {**geometry, "collection": "x"}) is False
+
+
+class _SlowChangeStream:
+    """A change stream taking a while to open, then yielding one change."""
+
+    def __init__(self, change):
+        self.change = change
+
+    async def __aenter__(self):
+        await asyncio.sleep(0.05)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def __aiter__(self):
+        yield self.change
+        await asyncio.Event().wait()
+
+
+@pytest.mark.asyncio
+async def test_item_subscriptions_wait_for_the_stream():
+    document = {"_id": 1, "collection": "test-collection"}
+    change = {"_id": {"_data": "token"}, "fullDocument": document}
+    items = SimpleNamespace(watch=lambda *args, **kwargs: _SlowChangeStream(change))
+    database = SimpleNamespace(client={DATABASE: {ITEMS_INDEX: items}})
+    subscriptions = ItemSubscriptions(database, heartbeat=0.01)
+
+    events = subscriptions.events({"collection": "test-collection"})
+    try:
+        # No heartbeat is sent before the stream opened and the change was published
+        event = await asyncio.wait_for(events.__anext__(), timeout=1)
+        assert event == ("token", document)
+    finally:
+        await events.aclose()
+
+
+def test_check_change_streams():
+    check_change_streams("stac")
+    for database in ("admin", "local", "config"):
+        with pytest.raises(ValueError, match="MONGO_DB"):
+            check_change_streams(database)
+
+
+@pytest.mark.asyncio
+async def test_item_subscriptions(ctx, txn_client, load_test_data):
+    subscriptions = ItemSubscriptions(txn_client.database, heartbeat=5)
+    query = {"collection": {"$in": [ctx.collection["id"]]}}
+    events = subscriptions.events(query)
+    first = asyncio.ensure_future(events.__anext__())
+    await asyncio.sleep(0)
+    await subscriptions.ready.wait()
+
+    item = load_test_data("test_item.json")
+    item["id"] = str(uuid.uuid4())
+    await create_item(txn_client, item)
+
+    token, document = await asyncio.wait_for(first, timeout=5)
+    assert document["id"] == item["id"]
+
+    # A reconnecting subscriber resumes after its last event
+    other = deepcopy(item)
+    other["id"] = str(uuid.uuid4())
+    await create_item(txn_client, other)
+    resumed = subscriptions.events(query, resume_after=token)
+    _, document = await asyncio.wait_for(resumed.__anext__(), timeout=5)
+    assert document["id"] == other["id"]
+
+    await events.aclose()
+    await resumed.aclose()
+    assert subscriptions.task is None
+
+
+def test_cache_invalidation_events():
+    database = DatabaseLogic()
+
+    def fill():
+        for cache in (database.collection_cache, database.queryables_cache):
+            cache.update({"a": (0, {}), "b": (0, {})})
+
+    fill()
+    database._invalidate_change(
+        {"ns": {"coll": COLLECTION_STATS_INDEX}, "documentKey": {"_id": "a"}}
+    )
+    assert set(database.collection_cache) == {"b"}
+    assert set(database.queryables_cache) == {"a", "b"}
+
+    database._invalidate_change(
+        {"ns": {"coll": QUERYABLES_INDEX}, "documentKey": {"_id": None}}
+    )
+    assert set(database.queryables_cache) == {"a", "b"}
+
+    fill()
+    database._invalidate_change(
+        {
+            "operationType": "insert",
+            "ns": {"coll": COLLECTIONS_INDEX},
+            "fullDocument": {"id": "b"},
+        }
+    )
+    assert set(database.collection_cache) == set(database.queryables_cache) == {"a"}
+
+    database._invalidate_change(
+        {"operationType": "delete", "ns": {"coll": COLLECTIONS_INDEX}}
+    )
+    assert not database.collection_cache and not database.queryables_cache
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidation_refuses_system_databases(monkeypatch):
+    monkeypatch.setattr("stac_fastapi.mongo.database_logic.DATABASE", "admin")
+    with pytest.raises(ValueError, match="MONGO_DB"):
+        await DatabaseLogic().watch_cache_invalidations()
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidation_from_other_replicas(ctx, txn_client, monkeypatch):
+    monkeypatch.setattr("stac_fastapi.mongo.database_logic.COLLECTION_CACHE_TTL", 3600)
+    database = txn_client.database
+    collection_id = ctx.collection["id"]
+    ready = asyncio.Event()
+    watcher = asyncio.ensure_future(database.watch_cache_invalidations(ready))
+    try:
+        await asyncio.wait_for(ready.wait(), timeout=5)
+        await database.find_collection(collection_id)
+        assert collection_id in database.collection_cache
+
+        # Written by another replica, without going through this database logic
+        await database.client[DATABASE][COLLECTION_STATS_INDEX].update_one(
+            {"_id": collection_id}, {"$inc": {"count": 1}}
+        )
+        for _ in range(50):
+            if collection_id not in database.collection_cache:
+                break
+            await asyncio.sleep(0.1)
+        assert collection_id not in database.collection_cache
+
+        collection = await database.find_collection(collection_id)
+        assert collection["stats"]["count"] == 2
+    finally:
+        watcher.cancel()
+
+
+@pytest.mark.asyncio
+async def test_bulk_sync_counts_inserted_items_on_conflict(
+    ctx, txn_client, load_test_data
+):
+    database = txn_client.database
+    item = load_test_data("test_item.json")
+    item["id"] = str(uuid.uuid4())
+
+    with pytest.raises(ConflictError):
+        database.bulk_sync(
+            ctx.collection["id"], [api.Item(**ctx.item), api.Item(**item)]
+        )
+
+    # The item inserted next to the duplicate is counted
+    stats = await database.client[DATABASE][COLLECTION_STATS_INDEX].find_one(
+        {"_id": ctx.collection["id"]}
+    )
+    assert stats["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_group_commit_writer_batches_writes():
+    batches = []
+
+    async def write_batch(documents):
+        batches.append(list(documents))
+        return [ValueError(d) if d == "bad" else None for d in documents]
+
+    writer = GroupCommitWriter(write_batch, window=0.01, max_size=3)
+    results = await asyncio.gather(
+        *(writer.write(d) for d in ["a", "bad", "b", "c"]), return_exceptions=True
+    )
+
+    # The first three documents fill a batch, the last one waits for the window
+    assert batches == [["a", "bad", "b"], ["c"]]
+    assert results[0] is None and results[2] is None and results[3] is None
+    assert isinstance(results[1], ValueError)
+
+    await writer.close()
+    assert not writer.pending and not writer.flushing
+
+
+@pytest.mark.asyncio
+async def test_group_commit_writer_ignores_the_context_of_writers():
+    deadlines = []
+
+    async def write_batch(documents):
+        deadlines.append(_csot.get_timeout())
+        return [None] * len(documents)
+
+    writer = GroupCommitWriter(write_batch, window=0.01, max_size=10)
+    with pymongo.timeout(0.5):
+        await writer.write("a")
+
+    # The deadline of the first writer does not bound the writes of the others
+    assert deadlines == [None]
+
+
+@pytest.mark.asyncio
+async def test_group_commit_batch_failures(monkeypatch):
+    database = DatabaseLogic()
+    writer = GroupCommitWriter(database._insert_items, window=0.01, max_size=10)
+
+    async def insert_items(documents):
+        raise AutoReconnect("connection closed")
+
+    monkeypatch.setattr(database, "insert_items", insert_items)
+    results = await asyncio.gather(
+        writer.write({"id": "a"}), writer.write({"id": "b"}), return_exceptions=True
+    )
+    # A failed batch is a database error, not a conflict of every item
+    assert all(isinstance(result, DatabaseError) for result in results)
+
+    async def insert_items_timeout(documents):
+        raise ServerSelectionTimeoutError("no primary")
+
+    monkeypatch.setattr(database, "insert_items", insert_items_timeout)
+    with pytest.raises(ServerSelectionTimeoutError):
+        await writer.write({"id": "c"})
+
+
+@pytest.mark.asyncio
+async def test_group_commit_create_item(ctx, txn_client, load_test_data, monkeypatch):
+    monkeypatch.setattr("stac_fastapi.mongo.database_logic.GROUP_COMMIT", True)
+    database = txn_client.database
+
+    items = []
+    for _ in range(5):
+        item = load_test_data("test_item.json")
+        item["id"] = str(uuid.uuid4())
+        items.append(item)
+    duplicate = deepcopy(ctx.item)
+
+    results = await asyncio.gather(
+        *(database.create_item(deepcopy(item)) for item in [*items, duplicate]),
+        return_exceptions=True,
+    )
+
+    assert [result["id"] for result in results[:5]] == [item["id"] for item in items]
+    assert isinstance(results[5], ConflictError)
+    for item in items:
+        assert (await database.get_one_item(item["collection"], item["id"]))["id"]
+    collection = await database.find_collection(ctx.collection["id"])
+    assert collection["stats"]["count"] == 6
+
+
+@pytest.mark.asyncio
+async def test_ingest_queue_recovers_spool(tmp_path):
+    spool = tmp_path / "spool.jsonl"
+    job = b'{"job":"a","collection":"c","base_url":"","items":[{"id":"1"}]}\n'
+    spool.write_bytes(job + b'{"job":"b","collection":"c","base_ur')
+
+    queue = IngestQueue(None, str(spool))
+    # Building the queue leaves the spool alone
+    assert spool.read_bytes().endswith(b"base_ur")
+
+    queue.open_spool()
+    try:
+        # The interrupted append is dropped
+        assert spool.read_bytes() == job
+        assert queue.queued == {"a": {"collection": "c", "accepted": 1}}
+        assert (queue.offset, queue.size) == (0, len(job))
+
+        # The queue of another process cannot share the spool
+        with pytest.raises(SpoolInUse):
+            IngestQueue(None, str(spool)).open_spool()
+    finally:
+        await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_ingest_queue(ctx, txn_client, load_test_data, tmp_path):
+    spool = tmp_path / "spool.jsonl"
+    queue = IngestQueue(txn_client.database, str(spool), batch_size=10)
+    queue.start()
+    try:
+        items = []
+        for _ in range(3):
+            item = load_test_data("test_item.json")
+            item["id"] = str(uuid.uuid4())
+            items.append(item)
+        job_id = await queue.submit(ctx.collection["id"], items, "http://test/")
+        # An item already stored as is counts as written, as after a crash
+        replayed_id = await queue.submit(
+            ctx.collection["id"], [deepcopy(ctx.item)], "http://test/"
+        )
+        conflicting = deepcopy(ctx.item)
+        conflicting["properties"]["platform"] = "another-platform"
+        conflict_id = await queue.submit(
+            ctx.collection["id"], [conflicting], "http://test/"
+        )
+
+        for _ in range(50):
+            if not queue.queued:
+                break
+            await asyncio.sleep(0.1)
+
+        job = await queue.job_status(job_id)
+        assert job["status"] == "succeeded"
+        assert (job["accepted"], job["written"], job["failed"]) == (3, 3, 0)
+        for item in items:
+            await txn_client.database.get_one_item(ctx.collection["id"], item["id"])
+
+        job = await queue.job_status(replayed_id)
+        assert (job["status"], job["written"], job["failed"]) == ("succeeded", 1, 0)
+
+        job = await queue.job_status(conflict_id)
+        assert job["status"] == "failed"
+        assert job["errors"][0]["id"] == ctx.item["id"]
+
+        with pytest.raises(NotFoundError):
+            await queue.job_status("unknown")
+
+        # The written jobs are dropped from the spool
+        for _ in range(50):
+            if queue.size == 0:
+                break
+            await asyncio.sleep(0.1)
+        assert spool.read_bytes() == b""
+    finally:
+        await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_ingest_queue_failing_batch(
+    ctx, txn_client, load_test_data, tmp_path, monkeypatch, caplog
+):
+    async def insert_items(documents, bulk=False):
+        raise ValueError("cannot encode the item")
+
+    monkeypatch.setattr(txn_client.database, "insert_items", insert_items)
+    spool = tmp_path / "spool.jsonl"
+    queue = IngestQueue(
+        txn_client.database, str(spool), retry_interval=0, max_attempts=2
+    )
+    queue.start()
+    try:
+        item = load_test_data("test_item.json")
+        item["id"] = str(uuid.uuid4())
+        job_id = await queue.submit(ctx.collection["id"], [item], "http://test/")
+
+        for _ in range(50):
+            if not queue.queued:
+                break
+            await asyncio.sleep(0.1)
+
+        # The worker gives up on the batch instead of retrying it forever
+        job = await queue.job_status(job_id)
+        assert (job["status"], job["written"], job["failed"]) == ("failed", 0, 1)
+        assert "cannot encode the item" in job["errors"][0]["detail"]
+        assert not queue.task.done()
+    finally:
+        await queue.close()
+    assert "The ingest worker stopped" not in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_ingest_queue_logs_worker_exit(tmp_path, caplog):
+    queue = IngestQueue(None, str(tmp_path / "spool.jsonl"))
+
+    async def drain():
+        raise RuntimeError("worker bug")
+
+    queue._drain = drain
+    queue.start()
+    try:
+        with pytest.raises(RuntimeError):
+            await queue.task
+        await asyncio.sleep(0)
+        assert "The ingest worker stopped" in caplog.text
+    finally:
+        await queue.close()
+
+
+def test_write_concern_from_env(monkeypatch):
+    assert write_concern_from_env("MONGO_TEST_WRITE_CONCERN") is None
+
+    monkeypatch.setenv("MONGO_TEST_WRITE_CONCERN", "w=1, j=false")
+    assert write_concern_from_env("MONGO_TEST_WRITE_CONCERN").document == {
+        "w": 1,
+        "j": False,
+    }
+
+    monkeypatch.setenv("MONGO_TEST_WRITE_CONCERN", "w=majority,wtimeout=5000")
+    assert write_concern_from_env("MONGO_TEST_WRITE_CONCERN").document == {
+        "w": "majority",
+        "wtimeout": 5000,
+    }
+
+    monkeypatch.setenv("MONGO_TEST_WRITE_CONCERN", "j=maybe")
+    with pytest.raises(ValueError):
+        write_concern_from_env("MONGO_TEST_WRITE_CONCERN")
+
+
+@pytest.mark.asyncio
+async def test_write_concern_per_operation_class(ctx, txn_client, monkeypatch):
+    monkeypatch.setattr(
+        "stac_fastapi.mongo.database_logic.ITEM_WRITE_CONCERN",
+        WriteConcern(w=1, j=False),
+    )
+    database = txn_client.database
+    assert database.get_database(WriteConcern(w=1, j=False)).write_concern.document == {
+        "w": 1,
+        "j": False,
+    }
+
+    # Acknowledged by the primary alone, without waiting for the journal
+    await database.delete_item(ctx.item["id"], ctx.collection["id"])
+    with pytest.raises(NotFoundError):
+        await database.get_one_item(ctx.collection["id"], ctx.item["id"])
+
+
+def test_read_preference_from_env(monkeypatch):
+    assert read_preference_from_env("MONGO_TEST_READ_PREFERENCE") is None
+
+    monkeypatch.setenv(
+        "MONGO_TEST_READ_PREFERENCE",
+        "readPreference=secondaryPreferred, maxStalenessSeconds=120",
+    )
+    assert read_preference_from_env("MONGO_TEST_READ_PREFERENCE").document == {
+        "mode": "secondaryPreferred",
+        "maxStalenessSeconds": 120,
+    }
+
+    monkeypatch.setenv("MONGO_TEST_READ_PREFERENCE", "readPreference=nearest")
+    assert read_preference_from_env("MONGO_TEST_READ_PREFERENCE").mode == 4
+
+    for value in (
+        "readPreference=anywhere",
+        "maxStalenessSeconds=120",
+        "readPreference=primary,maxStalenessSeconds=120",
+    ):
+        monkeypatch.setenv("MONGO_TEST_READ_PREFERENCE", value)
+        with pytest.raises(ValueError):
+            read_preference_from_env("MONGO_TEST_READ_PREFERENCE")
+
+
+def test_operation_time_header():
+    operation_time = Timestamp(1700000000, 7)
+    assert format_operation_time(operation_time) == "1700000000.7"
+    assert parse_operation_time("1700000000.7") == operation_time
+    assert parse_operation_time("1700000000") is None
+    assert parse_operation_time("soon.7") is None
+
+
+@pytest.mark.asyncio
+async def test_only_writes_are_recorded():
+    async with session_scope() as state:
+        # Getting the database of the writes is not a write
+        DatabaseLogic().get_database(WriteConcern(w=1))
+        assert not state.wrote
+        record_write()
+        assert state.wrote
+
+
+def test_client_settings(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "250")
+    monkeypatch.setenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "zlib")
+
+    options = AsyncMongoDBSettings().client_options
+
+    assert options["maxPoolSize"] == 250
+    assert options["waitQueueTimeoutMS"] == 2000
+    assert options["compressors"] == "zlib"
+    assert "maxIdleTimeMS" not in options
+
+
+def test_pool_metrics():
+    metrics = PoolMetrics()
+    address = ("localhost", 27017)
+
+    metrics.connection_created(monitoring.ConnectionCreatedEvent(address, 1))
+    for _ in range(2):
+        metrics.connection_check_out_started(
+            monitoring.ConnectionCheckOutStartedEvent(address)
+        )
+        metrics.connection_checked_out(monitoring.ConnectionCheckedOutEvent(address, 1))
+    metrics.connection_checked_in(monitoring.ConnectionCheckedInEvent(address, 1))
+    metrics.connection_check_out_started(
+        monitoring.ConnectionCheckOutStartedEvent(address)
+    )
+    metrics.connection_check_out_failed(
+        monitoring.ConnectionCheckOutFailedEvent(
+            address, monitoring.ConnectionCheckOutFailedReason.TIMEOUT
+        )
+    )
+
+    report = metrics.metrics()
+    assert report["checkouts"] == 2
+    assert report["failures"] == {"timeout": 1}
+    assert (report["checked_out"], report["max_checked_out"]) == (1, 2)
+    assert report["connections"] == 1
+    assert report["wait_max_ms"] >= report["wait_mean_ms"] >= 0
+
+
+def test_mongo_clients_are_lazy_and_fork_safe():
+    clients = MongoClients()
+    assert clients._async_client is None and clients._sync_client is None
+
+    client = clients.async_client
+    assert clients.async_client is client
+
+    # A forked process does not reuse the clients of its parent
+    clients._pid = -1
+    assert clients.async_client is not client
+
+    clients.close()
+    assert clients._async_client is None and clients._sync_client is None
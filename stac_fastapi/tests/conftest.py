@@ -11,15 +11,16 @@ from stac_pydantic import api
 
 from stac_fastapi.api.app import StacApi
 from stac_fastapi.api.models import create_get_request_model, create_post_request_model
-from stac_fastapi.core.core import (
-    BulkTransactionsClient,
-    CoreClient,
-    TransactionsClient,
-)
-from stac_fastapi.core.extensions import QueryExtension
+from stac_fastapi.core.core import BulkTransactionsClient, TransactionsClient
 from stac_fastapi.core.route_dependencies import get_route_dependencies
 
 if os.getenv("BACKEND", "elasticsearch").lower() == "opensearch":
+    from stac_fastapi.core.core import CoreClient
+    from stac_fastapi.core.core import EsAsyncBaseFiltersClient as FiltersClient
+    from stac_fastapi.core.extensions import QueryExtension
+    from stac_fastapi.core.extensions.aggregation import (
+        EsAsyncAggregationClient as AggregationClient,
+    )
     from stac_fastapi.opensearch.config import AsyncOpensearchSettings as AsyncSettings
     from stac_fastapi.opensearch.config import OpensearchSettings as SearchSettings
     from stac_fastapi.opensearch.database_logic import (
@@ -29,7 +30,26 @@ if os.getenv("BACKEND", "elasticsearch").lower() == "opensearch":
 elif os.getenv("BACKEND", "elasticsearch").lower() == "mongo":
     from stac_fastapi.mongo.config import AsyncMongoDBSettings as AsyncSettings
     from stac_fastapi.mongo.config import MongoDBSettings as SearchSettings
+    from stac_fastapi.mongo.core import CoreClient
     from stac_fastapi.mongo.database_logic import DatabaseLogic, create_collection_index
+    from stac_fastapi.mongo.extensions import (
+        BatchSearchExtension,
+        ChangesExtension,
+        FacetsExtension,
+        ItemsDiffExtension,
+        ItemsGetExtension,
+    )
+    from stac_fastapi.mongo.extensions import (
+        MongoAsyncAggregationClient as AggregationClient,
+    )
+    from stac_fastapi.mongo.extensions import (
+        MongoAsyncBaseFiltersClient as FiltersClient,
+    )
+    from stac_fastapi.mongo.extensions import (
+        NearExtension,
+        QueryExtension,
+        SubscriptionExtension,
+    )
 else:
     from stac_fastapi.elasticsearch.config import (
         ElasticsearchSettings as SearchSettings,
@@ -39,14 +59,31 @@ else:
         DatabaseLogic,
         create_collection_index,
     )
+    from stac_fastapi.core.core import CoreClient
+    from stac_fastapi.core.core import EsAsyncBaseFiltersClient as FiltersClient
+    from stac_fastapi.core.extensions.aggregation import (
+        EsAsyncAggregationClient as AggregationClient,
+    )
+    from stac_fastapi.core.extensions import QueryExtension
 
+from stac_fastapi.core.extensions.aggregation import (
+    EsAggregationExtensionGetRequest,
+    EsAggregationExtensionPostRequest,
+)
 from stac_fastapi.extensions.core import (
+    AggregationExtension,
+    CollectionSearchExtension,
+    CollectionSearchFilterExtension,
     FieldsExtension,
     FilterExtension,
+    FreeTextExtension,
     SortExtension,
     TokenPaginationExtension,
     TransactionExtension,
 )
+from stac_fastapi.extensions.core.fields import FieldsConformanceClasses
+from stac_fastapi.extensions.core.free_text import FreeTextConformanceClasses
+from stac_fastapi.extensions.core.sort import SortConformanceClasses
 from stac_fastapi.types.config import Settings
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
@@ -187,7 +224,14 @@ def bulk_txn_client():
 @pytest_asyncio.fixture(scope="session")
 async def app():
     settings = AsyncSettings()
-    extensions = [
+
+    aggregation_extension = AggregationExtension(
+        client=AggregationClient(database=database, session=None, settings=settings)
+    )
+    aggregation_extension.POST = EsAggregationExtensionPostRequest
+    aggregation_extension.GET = EsAggregationExtensionGetRequest
+
+    search_extensions = [
         TransactionExtension(
             client=TransactionsClient(
                 database=database, session=None, settings=settings
@@ -199,21 +243,56 @@ async def app():
         FieldsExtension(),
         QueryExtension(),
         TokenPaginationExtension(),
-        FilterExtension(),
+        FilterExtension(client=FiltersClient(database=database)),
+        FreeTextExtension(),
     ]
+    if os.getenv("BACKEND", "elasticsearch").lower() == "mongo":
+        search_extensions += [FacetsExtension(), NearExtension()]
+
+    collection_search_extension = CollectionSearchExtension.from_extensions(
+        [
+            FreeTextExtension(
+                conformance_classes=[FreeTextConformanceClasses.COLLECTIONS]
+            ),
+            CollectionSearchFilterExtension(),
+            SortExtension(conformance_classes=[SortConformanceClasses.COLLECTIONS]),
+            FieldsExtension(conformance_classes=[FieldsConformanceClasses.COLLECTIONS]),
+        ]
+    )
 
-    post_request_model = create_post_request_model(extensions)
+    extensions = [
+        aggregation_extension,
+        collection_search_extension,
+    ] + search_extensions
+
+    post_request_model = create_post_request_model(search_extensions)
+
+    client = CoreClient(
+        database=database,
+        session=None,
+        extensions=extensions,
+        post_request_model=post_request_model,
+    )
+
+    if os.getenv("BACKEND", "elasticsearch").lower() == "mongo":
+        extensions += [
+            BatchSearchExtension(
+                client=client, search_post_request_model=post_request_model
+            ),
+            ItemsGetExtension(client=client),
+            ItemsDiffExtension(client=client),
+            ChangesExtension(client=client),
+            SubscriptionExtension(
+                client=client, search_post_request_model=post_request_model
+            ),
+        ]
 
     return StacApi(
         settings=settings,
-        client=CoreClient(
-            database=database,
-            session=None,
-            extensions=extensions,
-            post_request_model=post_request_model,
-        ),
+        client=client,
         extensions=extensions,
-        search_get_request_model=create_get_request_model(extensions),
+        collections_get_request_model=collection_search_extension.GET,
+        search_get_request_model=create_get_request_model(search_extensions),
         search_post_request_model=post_request_model,
     ).app
 
@@ -284,7 +363,7 @@ async def app_basic_auth():
         FieldsExtension(),
         QueryExtension(),
         TokenPaginationExtension(),
-        FilterExtension(),
+        FilterExtension(client=FiltersClient(database=database)),
         # FreeTextExtension(),
     ]
 
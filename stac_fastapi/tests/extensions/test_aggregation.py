@@ -0,0 +1,129 @@
+import pytest
+
+from stac_fastapi.mongo.database_logic import _geohash
+
+
+def _aggregation(resp, name):
+    return next(agg for agg in resp.json()["aggregations"] if agg["name"] == name)
+
+
+@pytest.mark.asyncio
+async def test_get_aggregations(app_client, ctx):
+    resp = await app_client.get("/aggregations")
+    assert resp.status_code == 200
+
+    names = [agg["name"] for agg in resp.json()["aggregations"]]
+    assert "platform_frequency" in names
+    assert "centroid_geohash_grid_frequency" in names
+
+
+@pytest.mark.asyncio
+async def test_aggregate_total_count_and_datetime_range(app_client, ctx):
+    resp = await app_client.get(
+        "/aggregate",
+        params={"aggregations": "total_count,datetime_min,datetime_max"},
+    )
+    assert resp.status_code == 200
+
+    assert _aggregation(resp, "total_count")["value"] == 1
+    assert _aggregation(resp, "datetime_min")["value"] == "2020-02-12T12:30:22.000Z"
+    assert _aggregation(resp, "datetime_max")["value"] == "2020-02-12T12:30:22.000Z"
+
+
+@pytest.mark.asyncio
+async def test_aggregate_datetime_frequency(app_client, ctx):
+    resp = await app_client.post(
+        "/aggregate",
+        json={
+            "aggregations": ["datetime_frequency"],
+            "datetime_frequency_interval": "year",
+        },
+    )
+    assert resp.status_code == 200
+
+    buckets = _aggregation(resp, "datetime_frequency")["buckets"]
+    assert [(b["key"], b["frequency"]) for b in buckets] == [
+        ("2020-01-01T00:00:00.000Z", 1)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_aggregate_term_frequencies(app_client, ctx):
+    resp = await app_client.post(
+        f"/collections/{ctx.collection['id']}/aggregate",
+        json={"aggregations": ["collection_frequency", "platform_frequency"]},
+    )
+    assert resp.status_code == 200
+
+    collections = _aggregation(resp, "collection_frequency")
+    assert collections["buckets"][0]["key"] == ctx.collection["id"]
+    assert collections["buckets"][0]["frequency"] == 1
+    assert collections["overflow"] == 0
+
+    platforms = _aggregation(resp, "platform_frequency")
+    assert platforms["buckets"][0]["key"] == "landsat-8"
+
+
+@pytest.mark.asyncio
+async def test_aggregate_cloud_cover_ranges(app_client, ctx):
+    resp = await app_client.post(
+        "/aggregate", json={"aggregations": ["cloud_cover_frequency"]}
+    )
+    assert resp.status_code == 200
+
+    buckets = _aggregation(resp, "cloud_cover_frequency")["buckets"]
+    assert [b["key"] for b in buckets] == [
+        "*-5.0",
+        "5.0-15.0",
+        "15.0-40.0",
+        "40.0-*",
+    ]
+    assert [b["frequency"] for b in buckets] == [1, 0, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_aggregate_centroid_grids(app_client, ctx):
+    resp = await app_client.post(
+        "/aggregate",
+        json={
+            "aggregations": [
+                "centroid_geohash_grid_frequency",
+                "centroid_geotile_grid_frequency",
+            ],
+            "centroid_geohash_grid_frequency_precision": 3,
+            "centroid_geotile_grid_frequency_precision": 2,
+        },
+    )
+    assert resp.status_code == 200
+
+    geohashes = _aggregation(resp, "centroid_geohash_grid_frequency")["buckets"]
+    assert [(b["key"], b["frequency"]) for b in geohashes] == [("r65", 1)]
+
+    tiles = _aggregation(resp, "centroid_geotile_grid_frequency")["buckets"]
+    assert [(b["key"], b["frequency"]) for b in tiles] == [("2/3/2", 1)]
+
+
+@pytest.mark.asyncio
+async def test_aggregate_filtered_by_search(app_client, ctx):
+    resp = await app_client.post(
+        "/aggregate",
+        json={
+            "aggregations": ["total_count"],
+            "filter": {"op": "=", "args": [{"property": "platform"}, "sentinel-2"]},
+        },
+    )
+    assert resp.status_code == 200
+    assert _aggregation(resp, "total_count")["value"] == 0
+
+
+@pytest.mark.asyncio
+async def test_aggregate_unsupported_aggregation(app_client, ctx):
+    resp = await app_client.post(
+        "/aggregate", json={"aggregations": ["geometry_geohash_grid_frequency"]}
+    )
+    assert resp.status_code == 400
+
+
+def test_geohash():
+    # Cell of (-5.6, 42.6), the example of https://en.wikipedia.org/wiki/Geohash
+    assert _geohash(3968, 3017, 5) == "ezs42"
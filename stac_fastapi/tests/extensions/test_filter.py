@@ -5,6 +5,8 @@ from os.path import isfile, join
 
 import pytest
 
+from stac_fastapi.mongo.database_logic import DatabaseLogic, item_property_schemas
+
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
@@ -400,3 +402,103 @@ async def test_search_filter_extension_between(app_client, ctx):
 
     assert resp.status_code == 200
     assert len(resp.json()["features"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_search_filter_extension_timestamp_literal(app_client, ctx):
+    params = {
+        "filter": {
+            "op": "=",
+            "args": [
+                {"property": "datetime"},
+                {"timestamp": ctx.item["properties"]["datetime"]},
+            ],
+        }
+    }
+    resp = await app_client.post("/search", json=params)
+
+    assert resp.status_code == 200
+    assert len(resp.json()["features"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_search_filter_extension_coerces_to_summary_type(app_client, ctx):
+    # gsd is summarized as an integer by the test collection
+    params = {
+        "collections": [ctx.collection["id"]],
+        "filter": {
+            "op": "=",
+            "args": [{"property": "gsd"}, str(ctx.item["properties"]["gsd"])],
+        },
+    }
+    resp = await app_client.post("/search", json=params)
+
+    assert resp.status_code == 200
+    assert len(resp.json()["features"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_search_filter_extension_invalid_literal_for_type(app_client, ctx):
+    params = {
+        "filter": {"op": "<", "args": [{"property": "cloud_cover"}, "cloudy"]},
+    }
+    resp = await app_client.post("/search", json=params)
+
+    assert resp.status_code == 400
+
+
+def test_translate_cql2_keeps_declared_string_literal():
+    _filter = {"op": "=", "args": [{"property": "landsat:row"}, "161"]}
+    queryables = {"properties.landsat:row": {"type": "string"}}
+
+    assert DatabaseLogic.translate_cql2_to_mongo(_filter, queryables) == {
+        "properties.landsat:row": {"$eq": "161"}
+    }
+    assert DatabaseLogic.translate_cql2_to_mongo(_filter) == {
+        "properties.landsat:row": {"$eq": 161}
+    }
+
+
+@pytest.mark.asyncio
+async def test_collection_queryables_sampled_from_items(app_client, ctx):
+    resp = await app_client.get(f"/collections/{ctx.collection['id']}/queryables")
+    assert resp.status_code == 200
+
+    properties = resp.json()["properties"]
+    assert properties["platform"]["type"] == "string"
+    assert properties["gsd"]["type"] == "integer"
+    assert properties["datetime"]["format"] == "date-time"
+    assert properties["datetime"]["x-indexed"] is True
+
+
+@pytest.mark.asyncio
+async def test_collection_queryables_unknown_collection(app_client, ctx):
+    resp = await app_client.get("/collections/does-not-exist/queryables")
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_queryables_sampled_across_collections(app_client, ctx):
+    resp = await app_client.get("/queryables")
+    assert resp.status_code == 200
+    assert resp.json()["properties"]["platform"]["type"] == "string"
+
+
+def test_item_property_schemas():
+    items = [
+        {
+            "properties": {
+                "datetime": "2020-02-12T12:30:22Z",
+                "gsd": 15,
+                "eo:cloud_cover": 12.5,
+                "instruments": ["oli"],
+            }
+        }
+    ]
+
+    schemas = item_property_schemas(items)
+
+    assert schemas["datetime"] == {"type": "string", "format": "date-time"}
+    assert schemas["gsd"]["type"] == "integer"
+    assert schemas["eo:cloud_cover"]["type"] == "number"
+    assert schemas["instruments"]["type"] == "array"
@@ -201,3 +201,95 @@ async def test_pagination_collection(app_client, ctx, txn_client):
 
     # Confirm we have paginated through all collections
     assert collection_ids == ids
+
+
+@pytest.mark.asyncio
+async def test_collection_search_bbox(app_client, ctx, txn_client, load_test_data):
+    """Test searching collections by their spatial extent"""
+    sydney = load_test_data("test_collection.json")
+    sydney["id"] = "test-collection-sydney"
+    sydney["extent"]["spatial"]["bbox"] = [[150.0, -35.0, 152.0, -33.0]]
+    await create_collection(txn_client, sydney)
+
+    fiji = load_test_data("test_collection.json")
+    fiji["id"] = "test-collection-fiji"
+    fiji["extent"]["spatial"]["bbox"] = [[175.0, -20.0, -178.0, -15.0]]
+    await create_collection(txn_client, fiji)
+
+    resp = await app_client.get("/collections", params={"bbox": "151,-34,151.5,-33.5"})
+    assert resp.status_code == 200
+    assert {c["id"] for c in resp.json()["collections"]} == {
+        ctx.collection["id"],
+        sydney["id"],
+    }
+
+    # The extent of the Fiji collection crosses the antimeridian
+    resp = await app_client.get("/collections", params={"bbox": "-179,-18,-178.5,-17"})
+    assert resp.status_code == 200
+    assert {c["id"] for c in resp.json()["collections"]} == {
+        ctx.collection["id"],
+        fiji["id"],
+    }
+    assert "_extent" not in resp.json()["collections"][0]
+
+
+@pytest.mark.asyncio
+async def test_collection_search_datetime(app_client, ctx, txn_client, load_test_data):
+    """Test searching collections by their temporal extent"""
+    archive = load_test_data("test_collection.json")
+    archive["id"] = "test-collection-archive"
+    archive["extent"]["temporal"]["interval"] = [
+        ["2000-01-01T00:00:00Z", "2005-01-01T00:00:00Z"]
+    ]
+    await create_collection(txn_client, archive)
+
+    resp = await app_client.get(
+        "/collections", params={"datetime": "2001-01-01T00:00:00Z/2002-01-01T00:00:00Z"}
+    )
+    assert resp.status_code == 200
+    assert [c["id"] for c in resp.json()["collections"]] == [archive["id"]]
+
+    # The temporal extent of the test collection is open-ended
+    resp = await app_client.get(
+        "/collections", params={"datetime": "2030-01-01T00:00:00Z/.."}
+    )
+    assert resp.status_code == 200
+    assert [c["id"] for c in resp.json()["collections"]] == [ctx.collection["id"]]
+
+
+@pytest.mark.asyncio
+async def test_collection_search_filter_sort_fields(
+    app_client, ctx, txn_client, load_test_data
+):
+    """Test filtering, sorting and selecting the fields of collections"""
+    for i in range(3):
+        collection = load_test_data("test_collection.json")
+        collection["id"] = f"test-collection-{i}"
+        collection["license"] = "CC-BY-4.0"
+        await create_collection(txn_client, collection)
+
+    resp = await app_client.get(
+        "/collections",
+        params={
+            "filter": "license = 'CC-BY-4.0'",
+            "sortby": "-id",
+            "fields": "title",
+            "limit": 2,
+        },
+    )
+    assert resp.status_code == 200
+    collections = resp.json()["collections"]
+    assert [c["id"] for c in collections] == ["test-collection-2", "test-collection-1"]
+    assert set(collections[0]) == {"id", "title", "links"}
+
+    next_link = next(link for link in resp.json()["links"] if link["rel"] == "next")
+    resp = await app_client.get(next_link["href"])
+    assert resp.status_code == 200
+    assert [c["id"] for c in resp.json()["collections"]] == ["test-collection-0"]
+
+
+@pytest.mark.asyncio
+async def test_collection_search_invalid_filter(app_client, ctx):
+    """Test that an invalid collection filter is rejected"""
+    resp = await app_client.get("/collections", params={"filter": "license = "})
+    assert resp.status_code == 400
@@ -13,6 +13,7 @@ from stac_pydantic import api
 
 from stac_fastapi.core.core import CoreClient
 from stac_fastapi.core.datetime_utils import datetime_to_str, now_to_rfc3339_str
+from stac_fastapi.mongo.database_logic import item_checksum
 from stac_fastapi.types.core import LandingPageMixin
 
 from ..conftest import create_item, refresh_indices
@@ -190,6 +191,162 @@ async def test_get_item(app_client, ctx):
     assert get_item.status_code == 200
 
 
+@pytest.mark.asyncio
+async def test_get_items_by_id(app_client, ctx, txn_client):
+    """Test read items by id with one request"""
+    second_item = deepcopy(ctx.item)
+    second_item["id"] = "test-item-get-2"
+    await create_item(txn_client, second_item)
+
+    resp = await app_client.post(
+        f"/collections/{ctx.item['collection']}/items/get",
+        json={"ids": [second_item["id"], "missing-item", ctx.item["id"]]},
+    )
+    assert resp.status_code == 200
+    assert [f["id"] for f in resp.json()["features"]] == [
+        second_item["id"],
+        ctx.item["id"],
+    ]
+
+    resp = await app_client.post(
+        "/collections/missing-collection/items/get", json={"ids": [ctx.item["id"]]}
+    )
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_diff_items(app_client, ctx):
+    """Test compare items with the items of a collection"""
+    url = f"/collections/{ctx.item['collection']}/items/diff"
+
+    resp = await app_client.post(
+        url,
+        json={
+            "items": [
+                {"id": ctx.item["id"], "checksum": item_checksum(ctx.item)},
+                {"id": "missing-item"},
+            ]
+        },
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "missing": ["missing-item"],
+        "stale": [],
+        "current": [ctx.item["id"]],
+    }
+
+    for version, state in [
+        ({"checksum": "0" * 64}, "stale"),
+        ({"updated": "2999-01-01T00:00:00Z"}, "stale"),
+        ({"updated": "2000-01-01T00:00:00Z"}, "current"),
+        ({}, "current"),
+    ]:
+        resp = await app_client.post(
+            url, json={"items": [{"id": ctx.item["id"], **version}]}
+        )
+        assert resp.status_code == 200
+        assert resp.json()[state] == [ctx.item["id"]]
+
+    resp = await app_client.post(
+        url, json={"items": [{"id": ctx.item["id"], "updated": "yesterday"}]}
+    )
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_diff_items_after_collection_rename(app_client, ctx, txn_client):
+    """Test the items moved by a collection rename are still current"""
+    new_id = "test-collection-renamed"
+    await txn_client.database.update_collection(
+        ctx.collection["id"], {**ctx.collection, "id": new_id}
+    )
+
+    item = {**ctx.item, "collection": new_id}
+    resp = await app_client.post(
+        f"/collections/{new_id}/items/diff",
+        json={"items": [{"id": item["id"], "checksum": item_checksum(item)}]},
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {"missing": [], "stale": [], "current": [item["id"]]}
+
+
+@pytest.mark.asyncio
+async def test_changes_feed(app_client, ctx, txn_client, monkeypatch):
+    """Test page through the changes of the items of a collection"""
+    monkeypatch.setattr("stac_fastapi.mongo.database_logic.CHANGES_SETTLE_SECONDS", 0)
+    url = f"/collections/{ctx.item['collection']}/changes"
+
+    second_item = deepcopy(ctx.item)
+    second_item["id"] = "test-item-changes-2"
+    await create_item(txn_client, second_item)
+    await txn_client.delete_item(ctx.item["id"], ctx.item["collection"])
+
+    resp = await app_client.get(url, params={"limit": 2})
+    assert resp.status_code == 200
+    changes = resp.json()["changes"]
+    assert [(c["id"], c["operation"]) for c in changes] == [
+        (ctx.item["id"], "upsert"),
+        (second_item["id"], "upsert"),
+    ]
+    assert changes[0]["sequence"] < changes[1]["sequence"]
+    assert changes[1]["item"]["id"] == second_item["id"]
+
+    next_link = next(link for link in resp.json()["links"] if link["rel"] == "next")
+    resp = await app_client.get(next_link["href"])
+    assert resp.status_code == 200
+    assert [(c["id"], c["operation"]) for c in resp.json()["changes"]] == [
+        (ctx.item["id"], "delete")
+    ]
+
+    # The last page still links to the changes following it
+    next_link = next(link for link in resp.json()["links"] if link["rel"] == "next")
+    resp = await app_client.get(next_link["href"])
+    assert resp.status_code == 200
+    assert resp.json()["changes"] == []
+    resumed = next(link for link in resp.json()["links"] if link["rel"] == "next")
+    assert resumed["href"] == next_link["href"]
+
+    third_item = deepcopy(ctx.item)
+    third_item["id"] = "test-item-changes-3"
+    await create_item(txn_client, third_item)
+    resp = await app_client.get(resumed["href"])
+    assert [c["id"] for c in resp.json()["changes"]] == [third_item["id"]]
+
+    resp = await app_client.get(url, params={"since": "2999-01-01T00:00:00Z"})
+    assert resp.status_code == 200
+    assert resp.json()["changes"] == []
+
+    resp = await app_client.get(url, params={"since": "yesterday"})
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_changes_feed_after_collection_rename(
+    app_client, ctx, txn_client, monkeypatch
+):
+    """Test the items moved by a collection rename are changes of both collections"""
+    monkeypatch.setattr("stac_fastapi.mongo.database_logic.CHANGES_SETTLE_SECONDS", 0)
+    old_id, new_id = ctx.collection["id"], "test-collection-renamed"
+    resp = await app_client.get(f"/collections/{old_id}/changes")
+    created = resp.json()["changes"][0]
+    token = next(link for link in resp.json()["links"] if link["rel"] == "next")
+
+    await txn_client.database.update_collection(
+        old_id, {**ctx.collection, "id": new_id}
+    )
+
+    # Clients following the old collection see the item deleted
+    resp = await app_client.get(token["href"])
+    assert [(c["id"], c["operation"]) for c in resp.json()["changes"]] == [
+        (ctx.item["id"], "delete")
+    ]
+    resp = await app_client.get(f"/collections/{new_id}/changes")
+    changes = resp.json()["changes"]
+    assert [(c["id"], c["operation"]) for c in changes] == [(ctx.item["id"], "upsert")]
+    # Numbered after the writes the clients of the old collection have seen
+    assert changes[0]["sequence"] > created["sequence"]
+
+
 @pytest.mark.asyncio
 async def test_returns_valid_item(app_client, ctx):
     """Test validates fetched item with jsonschema"""